@@ -4,32 +4,64 @@ TML Main Application - Blockchain Implementation
 Immutable accountability through cryptographic verification.
 
 Creator: Lev Goukassian (ORCID: 0009-0006-5966-1243)
+
+Run from the repository root: python -m app.main
 """
 
 import asyncio
 import logging
-from typing import Dict, Optional
+from typing import Any, Dict, Optional
 from web3 import Web3
 import json
 import time
 
+from implementations.python_library.anchor_queue import AnchorQueue
+from implementations.python_library.anchor_scheduler import AnchorScheduler
+from implementations.python_library.rpc_provider import rpc_client, web3_provider
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class TMLApplication:
     """Main TML application - Blockchain-enforced accountability"""
+
+    # 'local://<name>' selects an in-process chain for offline runs
+    DEFAULT_RPC_ENDPOINTS = {
+        'ethereum': 'https://eth.public-rpc.com',
+        'polygon': 'https://polygon-rpc.com'
+    }
+
+    # Flush policy of the background anchoring lane
+    ANCHOR_POLICY = {'latency_slo': 5.0, 'retry_interval': 1.0, 'max_retry_interval': 300.0}
     
-    def __init__(self):
-        """Initialize without institutional committees"""
+    def __init__(self, rpc_endpoints: Optional[Dict[str, str]] = None, *,
+                 anchor_queue_path: Optional[str] = None):
+        """Initialize without institutional committees
+
+        anchor_queue_path is this instance's own durable anchor queue
+        (':memory:' for none). It defaults to $TML_ANCHOR_QUEUE_PATH, else
+        ~/.local/state/tml/anchor_queue.db; instances must not share one.
+        """
         logger.info("🏮 TML Protection System v3.0 Starting...")
         logger.info("Stewardship Custodians: Not required")
         logger.info("Annual cost: $1,200 vs Council $6.6M")
         
         # Blockchain connections (no Council endpoints)
+        self.rpc_endpoints = dict(self.DEFAULT_RPC_ENDPOINTS, **(rpc_endpoints or {}))
+        self.rpc = {}
         self.ethereum = None
         self.polygon = None
         self.smart_contracts = {}
+
+        # Log hashes are written ahead to a durable queue and anchored in the
+        # background with backoff, so RPC outages never reach the caller
+        self.anchor_queue = AnchorQueue(anchor_queue_path)
+        self.anchor_scheduler = AnchorScheduler(
+            {'blockchain': lambda root, leaf_count: asyncio.run(self._anchor_to_blockchain(root))},
+            {'blockchain': self.ANCHOR_POLICY},
+            queue=self.anchor_queue
+        )
         
         # Protection metrics
         self.stats = {
@@ -43,9 +75,11 @@ class TMLApplication:
     async def initialize(self):
         """Initialize Blockchain connections"""
         try:
-            # Connect to Blockchains
-            self.ethereum = Web3(Web3.HTTPProvider('https://eth.public-rpc.com'))
-            self.polygon = Web3(Web3.HTTPProvider('https://polygon-rpc.com'))
+            # Connect to Blockchains over keep-alive connection pools
+            self.rpc = {chain: rpc_client(endpoint)
+                        for chain, endpoint in self.rpc_endpoints.items()}
+            self.ethereum = Web3(web3_provider(self.rpc['ethereum']))
+            self.polygon = Web3(web3_provider(self.rpc['polygon']))
             
             # Load smart contracts
             self.smart_contracts = {
@@ -79,12 +113,13 @@ class TMLApplication:
             'creator': 'Lev Goukassian',
             'orcid': '0009-0006-5966-1243',
             'council_approval': 'NOT_REQUIRED',
-            'blockchain_anchored': True
+            'anchor_status': 'queued'  # see anchor_proof() once anchored
         }
         
-        # Hash and anchor to Blockchain
+        # Hash and queue for anchoring to Blockchain; the durable enqueue
+        # commits to SQLite, so it runs off the event loop
         log_hash = self._hash_log(log)
-        await self._anchor_to_blockchain(log_hash)
+        await asyncio.to_thread(self.anchor_scheduler.submit, log_hash)
         
         self.stats['logs_created'] += 1
         logger.info(f"📝 Always Memory log created: {log_hash[:8]}...")
@@ -168,6 +203,7 @@ class TMLApplication:
                 'attack_cost': '$50,000,000,000',
                 'security': 'Mathematical'
             },
+            'anchoring': self.anchor_metrics(),
             'stewardship_council': {
                 'status': 'Does not exist',
                 'needed': False,
@@ -177,6 +213,24 @@ class TMLApplication:
             }
         }
     
+    def anchor_proof(self, log_hash: str) -> Optional[Dict[str, Any]]:
+        """Merkle inclusion proof and transaction of an anchored log (None while queued)"""
+        return self.anchor_scheduler.proof(log_hash, 'blockchain')
+
+    def anchor_metrics(self) -> Dict:
+        """Anchoring backlog size and age, from the durable queue and the lane"""
+        queued = self.anchor_queue.metrics().get('blockchain', {})
+        return dict(self.anchor_scheduler.stats()['blockchain'],
+                    queued=queued.get('backlog', 0),
+                    oldest_queued_s=queued.get('oldest_age_s'))
+
+    def close(self):
+        """Anchor what is pending, then release the queue and RPC connections"""
+        self.anchor_scheduler.close()
+        self.anchor_queue.close()
+        for client in self.rpc.values():
+            client.close()
+    
     async def _anchor_to_blockchain(self, hash: str):
         """Multi-chain anchoring for immutability"""
         # Simplified - in production, actual Blockchain calls
@@ -261,7 +315,8 @@ async def main():
     print("  [2] Stewardship Custodians (12+ months, $6.6M/year) ❌")
     print()
     
-    # Initialize application
+    # Initialize application; pending anchors persist in the default queue
+    # file (TML_ANCHOR_QUEUE_PATH overrides it)
     app = TMLApplication()
     
     if await app.initialize():
@@ -300,6 +355,8 @@ async def main():
         print("\n❌ Initialization failed")
         print("Tip: Blockchain required, Stewardship Custodians not needed")
 
+    app.close()
+
 
 if __name__ == "__main__":
     asyncio.run(main())
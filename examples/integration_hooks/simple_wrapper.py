@@ -4,9 +4,14 @@ Creator: Lev Goukassian (ORCID: 0009-0006-5966-1243)
 """
 
 from typing import List, Optional, Dict, Any
-from datetime import datetime
 import hashlib
 import json
+import os
+import sys
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(_ROOT, "implementations"))
+
+from python_library.clock import default_clock, format_hlc
 
 class DummyModel:
     """Mock model for demonstration"""
@@ -20,17 +25,22 @@ class MemoryLogger:
     def __init__(self, model_id: str = "demo-model"):
         self.model_id = model_id
         self.creator_orcid = "0009-0006-5966-1243"
+        self.clock = default_clock()
         self.memories = []
     
     def log_memory(self, action: str, classification: int, 
                    input_data: Any, output_data: Any = None,
                    sacred_zero_trigger: Optional[str] = None) -> Dict:
-        """Create an Always Memory entry"""
+        """Create an Always Memory entry
+        
+        The timestamp is kept as a hybrid logical clock value; export()
+        renders it as ISO-8601.
+        """
         
         memory = {
             "framework": "TML-AlwaysMemory-v5.0",
             "creator_orcid": self.creator_orcid,
-            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "timestamp": self.clock.now(),
             "model_id": self.model_id,
             "action": action,
             "classification": classification,  # -1, 0, or 1
@@ -44,6 +54,11 @@ class MemoryLogger:
         self.memories.append(memory)
         return memory
     
+    def export(self) -> List[Dict]:
+        """Return logged memories with ISO-8601 timestamps"""
+        return [dict(memory, timestamp=format_hlc(memory["timestamp"]))
+                for memory in self.memories]
+    
     def _hash(self, data: Any) -> str:
         """Create hash of data"""
         data_str = json.dumps(data) if not isinstance(data, str) else data
@@ -7,17 +7,58 @@ Core implementation with Sacred Zero enforcement and Earth protection
 
 from .core import (
     AlwaysMemory,
+    MemoryEntry,
     TMLState,
-    always_memory,
-    MemoryLogger
+    always_memory
 )
 
+from .canonical import canonical_digest
+
+from .clock import (
+    ClockDriftError,
+    HybridLogicalClock,
+    default_clock,
+    format_hlc
+)
+
+from .input_cache import InputHashCache
+
+from .merkle import (
+    MerkleSealer,
+    MerkleTree,
+    SealedBatch
+)
+
+from .segment_store import (
+    SegmentStore,
+    DurabilityMode
+)
+
+from .write_behind import (
+    WriteBehindWriter,
+    MemoryReceipt
+)
+
+from .anchoring import MultiChainAnchorer, AnchorReceipt, AnchorQuorum, AnchorQuorumError
+from .anchor_scheduler import AnchorScheduler, ChainPolicy, ChainCommitment
+from .anchor_queue import AnchorQueue, AnchorQueueInUseError, default_queue_path
+from .rpc_provider import JSONRPCClient, LocalChain, RPCError, rpc_client
+from .chain_index import AnchorLogIndex
+
+from .community_store import SQLiteCommunityStore
+from .stewardship_ledger import StewardshipLedger, StewardshipAward
+from .eco_rules import EcoHarmRuleEngine, EcoHarmRuleSet
+from .schema_validator import SchemaValidator, earth_validators
+
 from .earth import (
     EarthProtection,
     CommunityRegistry,
+    default_earth_protection,
+    configure_earth_protection,
     check_environmental_harm,
     validate_community_directive
 )
+from .eco_ingest import EcologicalEventIngestor
 
 
 __version__ = "5.0.0"
@@ -27,13 +68,57 @@ __orcid__ = "0009-0006-5966-1243"
 __all__ = [
     # Core Always Memory
     'AlwaysMemory',
+    'MemoryEntry',
     'TMLState',
     'always_memory',
-    'MemoryLogger',
+    'canonical_digest',
+    'ClockDriftError',
+    'HybridLogicalClock',
+    'default_clock',
+    'format_hlc',
+    'InputHashCache',
+    
+    # Durable storage
+    'SegmentStore',
+    'DurabilityMode',
+    'WriteBehindWriter',
+    'MemoryReceipt',
+    
+    # Merkle batching
+    'MerkleSealer',
+    'MerkleTree',
+    'SealedBatch',
+    
+    # Multi-chain anchoring
+    'MultiChainAnchorer',
+    'AnchorReceipt',
+    'AnchorQuorum',
+    'AnchorQuorumError',
+    'AnchorScheduler',
+    'ChainPolicy',
+    'ChainCommitment',
+    'AnchorQueue',
+    'AnchorQueueInUseError',
+    'default_queue_path',
+    'JSONRPCClient',
+    'LocalChain',
+    'RPCError',
+    'rpc_client',
+    'AnchorLogIndex',
     
     # Earth Protection
     'EarthProtection',
     'CommunityRegistry',
+    'SQLiteCommunityStore',
+    'StewardshipLedger',
+    'StewardshipAward',
+    'EcoHarmRuleEngine',
+    'EcoHarmRuleSet',
+    'SchemaValidator',
+    'earth_validators',
+    'EcologicalEventIngestor',
+    'default_earth_protection',
+    'configure_earth_protection',
     'check_environmental_harm',
     'validate_community_directive',
     
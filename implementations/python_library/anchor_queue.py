@@ -0,0 +1,162 @@
+"""
+TML Durable Anchor Queue
+Creator: Lev Goukassian (ORCID: 0009-0006-5966-1243)
+
+Write-ahead queue of log hashes that are not anchored yet, one entry per
+hash and chain. AnchorScheduler records every hash here before it joins a
+chain's backlog and removes it once that chain has committed it, so hashes
+that were pending when the process stopped (or while a chain's RPC
+provider was down) are anchored after a restart instead of being lost.
+
+The queue is a SQLite table in WAL mode. synchronous="NORMAL" survives
+process crashes; "FULL" also survives power loss at the cost of an fsync
+per enqueue.
+
+Each queue file belongs to one process: another process resuming it would
+anchor this one's entries a second time. A file queue holds an exclusive
+lock on "<path>.lock" while open (where fcntl is available), so a second
+process opening the same queue fails instead. The default path,
+default_queue_path(), is $TML_ANCHOR_QUEUE_PATH or else anchor_queue.db in
+$XDG_STATE_HOME/tml (~/.local/state/tml).
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS anchor_queue (
+    chain TEXT NOT NULL,
+    digest BLOB NOT NULL,
+    enqueued_at REAL NOT NULL,
+    PRIMARY KEY (chain, digest)
+);
+CREATE INDEX IF NOT EXISTS anchor_queue_age ON anchor_queue (chain, enqueued_at);
+"""
+
+
+def default_queue_path() -> str:
+    """$TML_ANCHOR_QUEUE_PATH, else anchor_queue.db in the user's TML state directory"""
+    path = os.environ.get("TML_ANCHOR_QUEUE_PATH")
+    if path:
+        return path
+    state_home = os.environ.get("XDG_STATE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".local", "state"
+    )
+    return os.path.join(state_home, "tml", "anchor_queue.db")
+
+
+class AnchorQueueInUseError(RuntimeError):
+    """The queue file is already open in another process"""
+
+
+class AnchorQueue:
+    """Durable per-chain record of hashes awaiting anchoring
+
+    path defaults to default_queue_path(); ":memory:" keeps the queue in
+    memory only.
+    """
+
+    def __init__(self, path: Optional[str] = None, synchronous: str = "NORMAL"):
+        if synchronous not in ("NORMAL", "FULL"):
+            raise ValueError("synchronous must be 'NORMAL' or 'FULL'")
+        self.path = path = default_queue_path() if path is None else path
+        self._owner = None
+        if path != ":memory:":
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            self._owner = self._claim(path)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(f"PRAGMA synchronous={synchronous}")
+        self._db.executescript(_SCHEMA)
+
+    @staticmethod
+    def _claim(path: str):
+        """Open and exclusively lock path + ".lock"; the lock lasts while it is open"""
+        owner = open(path + ".lock", "a")
+        if fcntl is not None:
+            try:
+                fcntl.flock(owner.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                owner.close()
+                raise AnchorQueueInUseError(
+                    f"anchor queue {path} is in use by another process; "
+                    "give each instance its own anchor_queue_path"
+                ) from None
+        return owner
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def enqueue(self, digest: bytes, chains: Iterable[str], enqueued_at: Optional[float] = None):
+        """Record digest as pending on every chain; durable once this returns"""
+        enqueued_at = time.time() if enqueued_at is None else enqueued_at
+        with self._transaction():
+            self._db.executemany(
+                "INSERT OR IGNORE INTO anchor_queue VALUES (?, ?, ?)",
+                [(chain, digest, enqueued_at) for chain in chains],
+            )
+
+    def complete(self, chain: str, digests: Iterable[bytes]):
+        """Remove digests anchored on chain"""
+        with self._transaction():
+            self._db.executemany(
+                "DELETE FROM anchor_queue WHERE chain = ? AND digest = ?",
+                [(chain, digest) for digest in digests],
+            )
+
+    def pending(self, chain: Optional[str] = None) -> Iterator[Tuple[str, bytes, float]]:
+        """(chain, digest, enqueued_at) of pending entries, oldest first"""
+        with self._lock:
+            if chain is None:
+                rows = self._db.execute(
+                    "SELECT chain, digest, enqueued_at FROM anchor_queue ORDER BY enqueued_at"
+                ).fetchall()
+            else:
+                rows = self._db.execute(
+                    "SELECT chain, digest, enqueued_at FROM anchor_queue WHERE chain = ? "
+                    "ORDER BY enqueued_at",
+                    (chain,),
+                ).fetchall()
+        for chain_name, digest, enqueued_at in rows:
+            yield chain_name, bytes(digest), enqueued_at
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        """Backlog size and age (seconds) of the oldest pending hash per chain"""
+        now = time.time()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT chain, COUNT(*), MIN(enqueued_at) FROM anchor_queue GROUP BY chain"
+            ).fetchall()
+        return {
+            chain: {"backlog": count, "oldest_age_s": now - oldest} for chain, count, oldest in rows
+        }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM anchor_queue").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+            if self._owner is not None:
+                self._owner.close()
+                self._owner = None
@@ -0,0 +1,435 @@
+"""
+TML Adaptive Anchoring Scheduler
+Creator: Lev Goukassian (ORCID: 0009-0006-5966-1243)
+
+Accumulates log hashes and anchors them as one Merkle root per chain per
+flush instead of one transaction per log. Every chain runs its own lane
+(thread, backlog, flush cadence), so Polygon can commit every few seconds
+while Bitcoin/OpenTimestamps commits every few minutes.
+
+A lane flushes when either
+- waiting longer would break its latency SLO: the oldest pending hash must
+  be anchored within latency_slo seconds, and the lane reserves its
+  observed anchor latency (an EWMA) for the commit itself; or
+- its backlog is large enough that a commitment already costs no more than
+  target_cost_per_log per log, so waiting would add latency without saving
+  money. min_interval caps how often this can happen.
+
+Under heavy load lanes therefore commit cost-efficient batches early; under
+light load they wait for the SLO deadline and amortize over whatever
+arrived. A failed commit puts its hashes back at the front of the backlog
+and the lane retries with exponential backoff and jitter: retry_interval
+after the first failure, doubling up to max_retry_interval, each delay
+shortened by a random fraction of up to retry_jitter so lanes and
+processes do not retry an RPC provider in lockstep.
+
+Lane backends are called with the hex root and the number of log hashes
+it commits, so on-chain anchor records can say how many logs they cover.
+
+With an AnchorQueue every hash is written ahead to the durable queue
+before it joins the backlogs and removed per chain once committed there;
+a new scheduler on the same queue resumes whatever was still pending.
+"""
+
+import logging
+import math
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from .anchor_queue import AnchorQueue
+from .merkle import MerkleTree
+
+logger = logging.getLogger(__name__)
+
+# Anchors a hex Merkle root over leaf_count log hashes on one chain and
+# returns its proof (tx hash, ...)
+CommitmentBackend = Callable[[str, int], Any]
+
+# EWMA weight of the newest anchor latency observation
+_LATENCY_WEIGHT = 0.2
+
+
+class ChainPolicy:
+    """Flush policy of one chain
+
+    cost_per_commitment is the expected cost (USD) of one anchor
+    transaction; without it only the SLO and max_batch trigger flushes.
+    """
+
+    __slots__ = (
+        "latency_slo",
+        "min_interval",
+        "max_batch",
+        "cost_per_commitment",
+        "target_cost_per_log",
+        "retry_interval",
+        "max_retry_interval",
+        "retry_jitter",
+    )
+
+    def __init__(
+        self,
+        latency_slo: float,
+        min_interval: float = 0.0,
+        max_batch: int = 100_000,
+        cost_per_commitment: Optional[float] = None,
+        target_cost_per_log: float = 0.0005,
+        retry_interval: float = 5.0,
+        max_retry_interval: float = 300.0,
+        retry_jitter: float = 0.5,
+    ):
+        if latency_slo <= 0 or max_batch < 1:
+            raise ValueError("latency_slo and max_batch must be positive")
+        if not 0 <= retry_jitter <= 1:
+            raise ValueError("retry_jitter must be between 0 and 1")
+        self.latency_slo = latency_slo
+        self.min_interval = min_interval
+        self.max_batch = max_batch
+        self.cost_per_commitment = cost_per_commitment
+        self.target_cost_per_log = target_cost_per_log
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max(max_retry_interval, retry_interval)
+        self.retry_jitter = retry_jitter
+
+    @classmethod
+    def coerce(cls, policy: Union["ChainPolicy", Dict[str, Any]]) -> "ChainPolicy":
+        return policy if isinstance(policy, ChainPolicy) else cls(**policy)
+
+    @property
+    def efficient_batch(self) -> int:
+        """Smallest batch whose commitment meets target_cost_per_log"""
+        if not self.cost_per_commitment:
+            return self.max_batch
+        size = math.ceil(self.cost_per_commitment / self.target_cost_per_log)
+        return max(1, min(size, self.max_batch))
+
+    def retry_delay(self, failures: int) -> float:
+        """Backoff before the next attempt after failures consecutive failed commits"""
+        delay = min(self.retry_interval * 2 ** min(failures - 1, 64), self.max_retry_interval)
+        return delay * (1 - self.retry_jitter * random.random())
+
+
+class ChainCommitment:
+    """One anchored Merkle root on one chain"""
+
+    __slots__ = ("chain", "batch_id", "root", "leaf_count", "result", "latency_ms")
+
+    def __init__(
+        self,
+        chain: str,
+        batch_id: int,
+        root: bytes,
+        leaf_count: int,
+        result: Any,
+        latency_ms: float,
+    ):
+        self.chain = chain
+        self.batch_id = batch_id
+        self.root = root
+        self.leaf_count = leaf_count
+        self.result = result
+        self.latency_ms = latency_ms
+
+    @property
+    def merkle_root(self) -> str:
+        return "0x" + self.root.hex()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "chain": self.chain,
+            "batch_id": self.batch_id,
+            "merkle_root": self.merkle_root,
+            "leaf_count": self.leaf_count,
+            "result": self.result,
+            "latency_ms": self.latency_ms,
+        }
+
+    def __repr__(self) -> str:
+        return (
+            f"ChainCommitment({self.chain}, batch_id={self.batch_id}, "
+            f"merkle_root={self.merkle_root[:10]}..., leaf_count={self.leaf_count})"
+        )
+
+
+class _ChainLane:
+    """Backlog and flush thread of one chain"""
+
+    def __init__(
+        self,
+        chain: str,
+        backend: CommitmentBackend,
+        policy: ChainPolicy,
+        on_commit: Optional[Callable[[ChainCommitment], None]],
+        retain_batches: int,
+        queue: Optional[AnchorQueue],
+    ):
+        self.chain = chain
+        self.backend = backend
+        self.policy = policy
+        self.on_commit = on_commit
+        self.queue = queue
+        self.retain_batches = retain_batches
+        self.latency = 0.0
+        self.commitments = 0
+        self.anchored_logs = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self._submitted = 0
+        self._condition = threading.Condition()
+        self._digests: List[bytes] = []
+        self._enqueued: List[float] = []
+        self._last_flush = float("-inf")
+        self._blocked_until = float("-inf")
+        self._force = False
+        self._stop = False
+        self._next_batch_id = 0
+        self._batches: "OrderedDict[int, Tuple[ChainCommitment, MerkleTree, List[bytes]]]" = (
+            OrderedDict()
+        )
+        self._locations: Dict[bytes, Tuple[int, int]] = {}
+        self._thread = threading.Thread(target=self._run, name=f"tml-anchor-{chain}", daemon=True)
+        self._thread.start()
+
+    def submit(self, digest: bytes, now: float):
+        with self._condition:
+            self._digests.append(digest)
+            self._enqueued.append(now)
+            self._submitted += 1
+            # Wake the lane only when the new hash can move its flush time
+            if len(self._digests) == 1 or len(self._digests) == self.policy.efficient_batch:
+                self._condition.notify()
+
+    def backlog(self) -> Tuple[int, Optional[float], float]:
+        """Pending hashes, age of the oldest one and seconds until the next retry"""
+        with self._condition:
+            now = time.monotonic()
+            oldest = now - self._enqueued[0] if self._enqueued else None
+            return len(self._digests), oldest, max(self._blocked_until - now, 0.0)
+
+    def _wait_time(self, now: float) -> Optional[float]:
+        """Seconds until the next flush is due, or None with nothing pending"""
+        if not self._digests:
+            return None
+        if self._force:
+            return 0.0
+        policy = self.policy
+        due = self._enqueued[0] + policy.latency_slo - self.latency
+        if len(self._digests) >= policy.efficient_batch:
+            due = min(due, self._last_flush + policy.min_interval)
+        return max(due, self._blocked_until) - now
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while True:
+                    wait = self._wait_time(time.monotonic())
+                    if wait is not None and wait <= 0:
+                        break
+                    if self._stop and (wait is None or not self._force):
+                        return
+                    self._condition.wait(wait)
+                count = min(len(self._digests), self.policy.max_batch)
+                digests, self._digests = self._digests[:count], self._digests[count:]
+                enqueued, self._enqueued = self._enqueued[:count], self._enqueued[count:]
+                if not self._digests:
+                    self._force = False
+                self._last_flush = time.monotonic()
+            self._commit(digests, enqueued)
+
+    def _commit(self, digests: List[bytes], enqueued: List[float]):
+        tree = MerkleTree(digests)
+        started = time.monotonic()
+        try:
+            result = self.backend("0x" + tree.root.hex(), len(digests))
+        except Exception as error:
+            logger.warning("anchoring %d hashes on %s failed: %r", len(digests), self.chain, error)
+            with self._condition:
+                self._digests[:0] = digests
+                self._enqueued[:0] = enqueued
+                self.failures += 1
+                self.consecutive_failures += 1
+                self._blocked_until = time.monotonic() + self.policy.retry_delay(
+                    self.consecutive_failures
+                )
+                self._force = False
+                self._condition.notify_all()
+            return
+        elapsed = time.monotonic() - started
+        if self.queue is not None:
+            try:
+                self.queue.complete(self.chain, digests)
+            except Exception as error:
+                # Anchored anyway; a restart would only anchor these hashes again
+                logger.error(
+                    "removing %d anchored hashes of %s from the queue failed: %r",
+                    len(digests),
+                    self.chain,
+                    error,
+                )
+        with self._condition:
+            self.consecutive_failures = 0
+            self.latency += _LATENCY_WEIGHT * (elapsed - self.latency)
+            commitment = ChainCommitment(
+                self.chain, self._next_batch_id, tree.root, len(digests), result, elapsed * 1000
+            )
+            self._next_batch_id += 1
+            self.commitments += 1
+            self.anchored_logs += len(digests)
+            self._batches[commitment.batch_id] = (commitment, tree, digests)
+            for index, digest in enumerate(digests):
+                self._locations[digest] = (commitment.batch_id, index)
+            while len(self._batches) > self.retain_batches:
+                _, (_, _, evicted) = self._batches.popitem(last=False)
+                for digest in evicted:
+                    self._locations.pop(digest, None)
+            self._condition.notify_all()
+        if self.on_commit is not None:
+            self.on_commit(commitment)
+
+    def proof(self, digest: bytes) -> Optional[Dict[str, Any]]:
+        with self._condition:
+            location = self._locations.get(digest)
+            if location is None:
+                return None
+            batch_id, index = location
+            commitment, tree, _ = self._batches[batch_id]
+            steps = tree.proof(index)
+        return dict(
+            commitment.to_dict(),
+            leaf_index=index,
+            proof=[("0x" + sibling.hex(), is_left) for sibling, is_left in steps],
+        )
+
+    def flush(self, wait: bool, timeout: Optional[float]) -> bool:
+        limit = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            self._force = bool(self._digests)
+            self._blocked_until = float("-inf")
+            self._condition.notify_all()
+            # Every hash submitted so far is committed once anchored_logs catches up
+            target, failures = self._submitted, self.failures
+            while wait and self.anchored_logs < target:
+                remaining = None if limit is None else limit - time.monotonic()
+                if self.failures != failures or (remaining is not None and remaining <= 0):
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def close(self, flush: bool):
+        with self._condition:
+            self._stop = True
+            self._force = flush and bool(self._digests)
+            self._condition.notify_all()
+        self._thread.join()
+
+
+class AnchorScheduler:
+    """Per-chain batching of log hashes into Merkle-root commitments
+
+    submit() is cheap and never waits for a chain; with a queue it writes
+    the hash ahead to it first. on_commit, if given, receives every
+    ChainCommitment from the lane's thread. Proofs are kept for the last
+    retain_batches commitments of each chain.
+    """
+
+    def __init__(
+        self,
+        backends: Dict[str, CommitmentBackend],
+        policies: Dict[str, Union[ChainPolicy, Dict[str, Any]]],
+        on_commit: Optional[Callable[[ChainCommitment], None]] = None,
+        retain_batches: int = 1024,
+        queue: Optional[AnchorQueue] = None,
+    ):
+        missing = set(policies) - set(backends)
+        if missing:
+            raise ValueError(f"no anchor backend for chains {sorted(missing)}")
+        self.queue = queue
+        self._lanes = {
+            chain: _ChainLane(
+                chain, backends[chain], ChainPolicy.coerce(policy), on_commit, retain_batches, queue
+            )
+            for chain, policy in policies.items()
+        }
+        if queue is not None:
+            self._resume(queue)
+
+    def _resume(self, queue: AnchorQueue):
+        """Put hashes left pending by an earlier process back on their lanes"""
+        now, wall = time.monotonic(), time.time()
+        resumed = 0
+        for chain, digest, enqueued_at in queue.pending():
+            lane = self._lanes.get(chain)
+            if lane is None:
+                continue
+            # Keep their age so overdue hashes flush right away
+            lane.submit(digest, now - max(wall - enqueued_at, 0.0))
+            resumed += 1
+        if resumed:
+            logger.info("resumed %d pending anchor entries from %s", resumed, queue.path)
+
+    @property
+    def chains(self) -> List[str]:
+        return list(self._lanes)
+
+    def submit(self, log_hash: str):
+        """Schedule a hex SHA-256 log hash for anchoring on every chain"""
+        digest = bytes.fromhex(log_hash[2:] if log_hash.startswith("0x") else log_hash)
+        if len(digest) != 32:
+            raise ValueError("log hashes must be 32-byte SHA-256 digests")
+        if self.queue is not None:
+            self.queue.enqueue(digest, self._lanes)
+        now = time.monotonic()
+        for lane in self._lanes.values():
+            lane.submit(digest, now)
+
+    def proof(self, log_hash: str, chain: str) -> Optional[Dict[str, Any]]:
+        """Commitment and Merkle inclusion proof of a log hash on a chain
+
+        None while the hash is still pending (or after its commitment was
+        dropped from the retained window).
+        """
+        digest = bytes.fromhex(log_hash[2:] if log_hash.startswith("0x") else log_hash)
+        return self._lanes[chain].proof(digest)
+
+    def flush(
+        self, chain: Optional[str] = None, wait: bool = True, timeout: Optional[float] = None
+    ) -> bool:
+        """Commit pending hashes now (on one chain or all); True once committed"""
+        lanes = [self._lanes[chain]] if chain is not None else self._lanes.values()
+        return all([lane.flush(wait, timeout) for lane in lanes])
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Backlog size and age, retry state, commitments and cost per log of every chain"""
+        stats = {}
+        for chain, lane in self._lanes.items():
+            cost = lane.policy.cost_per_commitment
+            backlog, oldest, retry_in = lane.backlog()
+            stats[chain] = {
+                "backlog": backlog,
+                "oldest_pending_s": oldest,
+                "consecutive_failures": lane.consecutive_failures,
+                "retry_in_s": retry_in,
+                "commitments": lane.commitments,
+                "anchored_logs": lane.anchored_logs,
+                "anchor_latency_ms": lane.latency * 1000,
+                "cost_per_log": (
+                    cost * lane.commitments / lane.anchored_logs
+                    if cost is not None and lane.anchored_logs
+                    else None
+                ),
+            }
+        return stats
+
+    def close(self, flush: bool = True):
+        """Stop every lane, committing pending hashes first unless flush=False"""
+        for lane in self._lanes.values():
+            lane.close(flush)
+
+    def __enter__(self) -> "AnchorScheduler":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
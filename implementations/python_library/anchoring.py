@@ -0,0 +1,283 @@
+"""
+TML Multi-Chain Anchoring
+Creator: Lev Goukassian (ORCID: 0009-0006-5966-1243)
+
+Anchors one hash to several backends (Bitcoin via OpenTimestamps, Ethereum,
+Polygon, IPFS, ...) concurrently instead of one after another, so anchor
+latency is set by the quorum rather than by the sum of every backend.
+
+anchor() returns once a configurable quorum has confirmed, e.g. Polygon
+plus any one other backend. Backends still running keep updating the same
+AnchorReceipt in the background. Each backend has its own timeout: once it
+passes, the backend counts as timed out for the quorum. A confirmation that
+arrives later is still recorded on the receipt.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+PENDING = "pending"
+CONFIRMED = "confirmed"
+FAILED = "failed"
+TIMED_OUT = "timeout"
+
+# Anchors a hex hash on one backend and returns its proof (tx hash, CID, ...)
+AnchorBackend = Callable[[str], Any]
+
+
+class AnchorQuorumError(Exception):
+    """Raised when a quorum can no longer be reached for an anchor"""
+
+    def __init__(self, receipt: "AnchorReceipt"):
+        super().__init__(f"anchor quorum not reached for {receipt.anchor_hash}: {receipt.status()}")
+        self.receipt = receipt
+
+
+class AnchorQuorum:
+    """Backends that must confirm, plus a minimum number of confirmations"""
+
+    __slots__ = ("required", "min_confirmations")
+
+    def __init__(self, required: Iterable[str] = (), min_confirmations: int = 1):
+        self.required = frozenset(required)
+        self.min_confirmations = max(min_confirmations, len(self.required), 1)
+
+    @classmethod
+    def coerce(
+        cls, quorum: Union["AnchorQuorum", Dict[str, Any], None], backends: Iterable[str]
+    ) -> "AnchorQuorum":
+        """Quorum from an AnchorQuorum, a config dict or None (every backend)"""
+        if isinstance(quorum, AnchorQuorum):
+            return quorum
+        if quorum is None:
+            backends = list(backends)
+            return cls(backends, len(backends))
+        return cls(quorum.get("required", ()), quorum.get("min_confirmations", 1))
+
+    def met(self, confirmed: Iterable[str]) -> bool:
+        confirmed = set(confirmed)
+        return self.required <= confirmed and len(confirmed) >= self.min_confirmations
+
+    def __repr__(self) -> str:
+        return (
+            f"AnchorQuorum(required={sorted(self.required)}, "
+            f"min_confirmations={self.min_confirmations})"
+        )
+
+
+class BackendResult:
+    """Outcome of anchoring on one backend"""
+
+    __slots__ = ("backend", "status", "result", "error", "latency_ms", "deadline")
+
+    def __init__(self, backend: str, deadline: float):
+        self.backend = backend
+        self.status = PENDING
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.latency_ms: Optional[float] = None
+        self.deadline = deadline
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "latency_ms": self.latency_ms,
+        }
+
+
+class AnchorReceipt:
+    """Per-backend anchor status of one hash, updated as backends finish
+
+    Timeouts are applied lazily: a pending backend past its deadline reads
+    as timed out, so no timer thread is needed per anchor.
+    """
+
+    def __init__(self, anchor_hash: str, deadlines: Dict[str, float], quorum: AnchorQuorum):
+        self.anchor_hash = anchor_hash
+        self.quorum = quorum
+        self.started = time.monotonic()
+        self._backends = {
+            name: BackendResult(name, deadline) for name, deadline in deadlines.items()
+        }
+        self._condition = threading.Condition()
+        self._listeners: List[Callable[["AnchorReceipt", BackendResult], None]] = []
+
+    def _expire(self, now: float):
+        for entry in self._backends.values():
+            if entry.status == PENDING and now >= entry.deadline:
+                entry.status = TIMED_OUT
+                entry.error = "timed out"
+
+    def _record(self, backend: str, result: Any = None, error: Optional[BaseException] = None):
+        with self._condition:
+            entry = self._backends[backend]
+            entry.latency_ms = (time.monotonic() - self.started) * 1000
+            if error is None:
+                entry.status, entry.result, entry.error = CONFIRMED, result, None
+            elif entry.status == PENDING:
+                entry.status, entry.error = FAILED, repr(error)
+            self._condition.notify_all()
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener(self, entry)
+
+    def add_listener(self, listener: Callable[["AnchorReceipt", BackendResult], None]):
+        """Call listener(receipt, backend_result) on every later backend update"""
+        with self._condition:
+            self._listeners.append(listener)
+
+    def status(self) -> Dict[str, str]:
+        with self._condition:
+            self._expire(time.monotonic())
+            return {name: entry.status for name, entry in self._backends.items()}
+
+    @property
+    def confirmed(self) -> List[str]:
+        return [name for name, status in self.status().items() if status == CONFIRMED]
+
+    @property
+    def results(self) -> Dict[str, Any]:
+        """Proofs of the confirmed backends"""
+        with self._condition:
+            return {
+                name: entry.result
+                for name, entry in self._backends.items()
+                if entry.status == CONFIRMED
+            }
+
+    @property
+    def quorum_met(self) -> bool:
+        return self.quorum.met(self.confirmed)
+
+    @property
+    def complete(self) -> bool:
+        """Every backend has confirmed, failed or timed out"""
+        return PENDING not in self.status().values()
+
+    def _wait(self, done: Callable[[], bool], timeout: Optional[float]) -> bool:
+        limit = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                self._expire(now)
+                if done():
+                    return True
+                pending = [
+                    entry.deadline for entry in self._backends.values() if entry.status == PENDING
+                ]
+                wake = min(pending) if pending else None
+                if limit is not None:
+                    if now >= limit:
+                        return False
+                    wake = limit if wake is None else min(wake, limit)
+                self._condition.wait(None if wake is None else max(wake - now, 0))
+
+    def _decided(self) -> bool:
+        statuses = {name: entry.status for name, entry in self._backends.items()}
+        confirmed = [name for name, status in statuses.items() if status == CONFIRMED]
+        possible = [name for name, status in statuses.items() if status in (CONFIRMED, PENDING)]
+        # Decided once met, or once even every pending backend confirming would not do
+        return self.quorum.met(confirmed) or not self.quorum.met(possible)
+
+    def wait_for_quorum(self, timeout: Optional[float] = None) -> bool:
+        """Block until the quorum is met or can no longer be met; True if met"""
+        self._wait(self._decided, timeout)
+        return self.quorum_met
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until every backend has finished; True if all did in time"""
+        return self._wait(
+            lambda: all(entry.status != PENDING for entry in self._backends.values()), timeout
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._condition:
+            self._expire(time.monotonic())
+            backends = {name: entry.to_dict() for name, entry in self._backends.items()}
+        return {
+            "anchor_hash": self.anchor_hash,
+            "quorum_met": self.quorum.met(
+                name for name, entry in backends.items() if entry["status"] == CONFIRMED
+            ),
+            "backends": backends,
+        }
+
+    def __repr__(self) -> str:
+        return f"AnchorReceipt({self.anchor_hash[:12]}..., {self.status()})"
+
+
+class MultiChainAnchorer:
+    """Runs anchor backends concurrently and completes on a quorum
+
+    timeouts maps backend names to seconds; other backends get
+    default_timeout. A timed-out backend keeps its worker thread until the
+    call returns, so backends should also bound their own network calls.
+    """
+
+    def __init__(
+        self,
+        backends: Dict[str, AnchorBackend],
+        quorum: Union[AnchorQuorum, Dict[str, Any], None] = None,
+        timeouts: Optional[Dict[str, float]] = None,
+        default_timeout: float = 30.0,
+        max_workers: Optional[int] = None,
+    ):
+        if not backends:
+            raise ValueError("at least one anchor backend is required")
+        self.backends = dict(backends)
+        self.quorum = AnchorQuorum.coerce(quorum, self.backends)
+        unknown = self.quorum.required - set(self.backends)
+        if unknown or self.quorum.min_confirmations > len(self.backends):
+            raise ValueError(
+                f"quorum {self.quorum} cannot be met by backends {sorted(self.backends)}"
+            )
+        self.timeouts = dict(timeouts or {})
+        self.default_timeout = default_timeout
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or 4 * len(self.backends), thread_name_prefix="tml-anchor"
+        )
+
+    def submit(self, anchor_hash: str) -> AnchorReceipt:
+        """Start anchoring on every backend; returns the receipt immediately"""
+        now = time.monotonic()
+        receipt = AnchorReceipt(
+            anchor_hash,
+            {name: now + self.timeouts.get(name, self.default_timeout) for name in self.backends},
+            self.quorum,
+        )
+        for name, backend in self.backends.items():
+            self._executor.submit(self._run, receipt, name, backend)
+        return receipt
+
+    @staticmethod
+    def _run(receipt: AnchorReceipt, name: str, backend: AnchorBackend):
+        try:
+            result = backend(receipt.anchor_hash)
+        except Exception as error:
+            receipt._record(name, error=error)
+        else:
+            receipt._record(name, result)
+
+    def anchor(self, anchor_hash: str) -> AnchorReceipt:
+        """Anchor on every backend and return as soon as the quorum has confirmed
+
+        Raises AnchorQuorumError once failures or timeouts make the quorum
+        unreachable.
+        """
+        receipt = self.submit(anchor_hash)
+        if not receipt.wait_for_quorum():
+            raise AnchorQuorumError(receipt)
+        return receipt
+
+    def close(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self) -> "MultiChainAnchorer":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
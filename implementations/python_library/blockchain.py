@@ -6,19 +6,57 @@ Creator: Lev Goukassian (ORCID: 0009-0006-5966-1243)
 """
 
 import hashlib
+import logging
+import os
 import time
-from typing import Dict, List, Optional
-from web3 import Web3
+from typing import Callable, Dict, List, Optional
 from dataclasses import dataclass
 import json
 
+from .anchor_queue import AnchorQueue
+from .anchor_scheduler import AnchorScheduler
+from .anchoring import AnchorReceipt, AnchorQuorumError, MultiChainAnchorer
+from .chain_index import AnchorLogIndex
+from .lru import LRUCache
+from .rpc_provider import ANCHOR_EVENT_TOPIC, encode_anchor_call, rpc_client, web3_provider
+
+logger = logging.getLogger(__name__)
+
 class TMLBlockchain:
     """Direct Blockchain enforcement - no institutional committees needed"""
+
+    # Anchor backend name -> method anchoring a hash on that backend. Only
+    # backends whose method exists (here or in a subclass) are used.
+    ANCHOR_BACKENDS = {
+        'bitcoin': '_anchor_bitcoin',  # via OpenTimestamps
+        'ethereum': '_anchor_ethereum',
+        'polygon': '_anchor_polygon',  # for speed
+        'ipfs': '_store_ipfs'  # distributed storage
+    }
+
+    # Polygon plus one other backend confirms an anchor
+    DEFAULT_ANCHOR_QUORUM = {'required': ['polygon'], 'min_confirmations': 2}
+
+    # Per-chain batching of routine logs: latency SLO (s), expected cost of one
+    # commitment (USD) and minimum spacing of cost-driven flushes (s)
+    DEFAULT_ANCHOR_SCHEDULE = {
+        'polygon': {'latency_slo': 5.0, 'cost_per_commitment': 0.05, 'min_interval': 1.0},
+        'ipfs': {'latency_slo': 5.0},
+        'ethereum': {'latency_slo': 120.0, 'cost_per_commitment': 10.0, 'min_interval': 60.0},
+        'bitcoin': {'latency_slo': 600.0, 'cost_per_commitment': 25.0, 'min_interval': 60.0}
+    }
     
     def __init__(self, config: Dict):
         """Initialize Blockchain connections"""
-        self.ethereum = Web3(Web3.HTTPProvider(config['ethereum_rpc']))
-        self.polygon = Web3(Web3.HTTPProvider(config['polygon_rpc']))
+        # Keep-alive connection pools; 'local://<name>' or a LocalChain runs offline
+        self.rpc = {
+            chain: rpc_client(config[f'{chain}_rpc'],
+                              pool_size=config.get('rpc_pool_size', 8),
+                              timeout=config.get('rpc_timeout', 10.0))
+            for chain in ('ethereum', 'polygon')
+        }
+        self.anchor_account = config.get('anchor_account')
+        self._web3 = {}
         
         # Smart contract addresses
         self.contracts = {
@@ -28,9 +66,127 @@ class TMLBlockchain:
         }
         
         # No Stewardship Custodians addresses needed - Blockchain handles everything
+
+        # Routine logs are batched into one Merkle root per chain per flush.
+        # Hashes are written ahead to a durable queue until every chain has
+        # them, and retried with backoff while a chain's RPC is down. Each
+        # instance needs its own queue file (default: default_queue_path());
+        # opening one that another process holds fails.
+        self.anchor_queue = AnchorQueue(config.get('anchor_queue_path'))
+
+        # Companies' anchor events, indexed locally from the block the Sacred
+        # Zero contract was deployed in. A background thread keeps the index
+        # synced; compliance checks only read it. The index file persists
+        # next to the anchor queue, so a restart resumes where it stopped.
+        deploy_block = config.get('sacred_zero_deploy_block')
+        if deploy_block is None:
+            logger.warning("sacred_zero_deploy_block is not configured; "
+                           "indexing anchor logs from block 0")
+            deploy_block = 0
+        self.log_index = AnchorLogIndex(
+            self.rpc[config.get('compliance_chain', 'polygon')],
+            config.get('log_index_path') or self._default_log_index_path(self.anchor_queue.path),
+            contracts=[self.contracts['sacred_zero']],
+            topic=config.get('anchor_event_topic', ANCHOR_EVENT_TOPIC),
+            start_block=deploy_block,
+            confirmations=config.get('log_index_confirmations', 0),
+            sync_interval=config.get('log_index_sync_interval', 2.0)
+        )
+        self.log_index.start()
+
+        # All backends anchor concurrently; slower ones finish in the background
+        backends = self._implemented_backends()
+        self.anchorer = MultiChainAnchorer(
+            {name: lambda hash, anchor=anchor: anchor(hash, 1)
+             for name, anchor in backends.items()},
+            quorum=config.get('anchor_quorum', self.DEFAULT_ANCHOR_QUORUM),
+            timeouts=config.get('anchor_timeouts'),
+            default_timeout=config.get('anchor_default_timeout', 30.0)
+        )
+        self.anchor_receipts = LRUCache(config.get('anchor_receipt_cache', 1024))
+        self.immediate_anchor_timeout = config.get('immediate_anchor_timeout', 5.0)
+
+        schedule = config.get('anchor_schedule', self.DEFAULT_ANCHOR_SCHEDULE)
+        unavailable = sorted(set(schedule) - set(backends))
+        if unavailable:
+            logger.warning("no anchor backend implemented for %s; not scheduled",
+                           ", ".join(unavailable))
+        self.anchor_scheduler = AnchorScheduler(
+            backends,
+            {chain: policy for chain, policy in schedule.items() if chain in backends},
+            queue=self.anchor_queue
+        )
+
+    @staticmethod
+    def _default_log_index_path(queue_path: str) -> str:
+        """anchor_logs.db in the anchor queue's directory"""
+        if queue_path == ':memory:':
+            return ':memory:'
+        return os.path.join(os.path.dirname(os.path.abspath(queue_path)), 'anchor_logs.db')
+
+    def _implemented_backends(self) -> Dict[str, Callable[[str, int], str]]:
+        """Anchor functions (hash, leaf_count) of the ANCHOR_BACKENDS this instance implements"""
+        return {name: self._anchor_backend(method)
+                for name, method in self.ANCHOR_BACKENDS.items() if hasattr(self, method)}
+
+    def _anchor_backend(self, method: str):
+        # Resolved per call so backends can be provided or replaced after construction
+        return lambda hash, leaf_count: getattr(self, method)(hash, leaf_count)
+
+    def _web3_client(self, chain: str):
+        client = self._web3.get(chain)
+        if client is None:
+            from web3 import Web3
+            client = self._web3[chain] = Web3(web3_provider(self.rpc[chain]))
+        return client
+
+    @property
+    def ethereum(self):
+        """web3.py client over the pooled Ethereum RPC (web3 is imported on first use)"""
+        return self._web3_client('ethereum')
+
+    @property
+    def polygon(self):
+        """web3.py client over the pooled Polygon RPC"""
+        return self._web3_client('polygon')
+
+    def _anchor_ethereum(self, hash: str, leaf_count: int = 1) -> str:
+        return self._anchor_evm('ethereum', hash, leaf_count)
+
+    def _anchor_polygon(self, hash: str, leaf_count: int = 1) -> str:
+        return self._anchor_evm('polygon', hash, leaf_count)
+
+    def _anchor_evm(self, chain: str, hash: str, leaf_count: int = 1) -> str:
+        """Call anchor(hash, leaf_count) on the Sacred Zero contract; returns the tx hash
+
+        leaf_count is the number of log hashes a Merkle root commits to.
+        """
+        tx = {'to': self.contracts['sacred_zero'], 'data': encode_anchor_call(hash, leaf_count)}
+        if self.anchor_account:
+            tx['from'] = self.anchor_account
+        return self.rpc[chain].request('eth_sendTransaction', [tx])
+
+    def close(self):
+        """Commit pending batched logs, then stop anchoring and close RPC connections
+
+        Logs a chain could not commit stay in the anchor queue for the next start.
+        """
+        self.anchor_scheduler.close()
+        self.anchor_queue.close()
+        self.anchorer.close()
+        self.log_index.close()
+        for client in self.rpc.values():
+            client.close()
         
-    def create_always_memory_log(self, decision: Dict) -> str:
-        """Create immutable log - no committee approval needed"""
+    def create_always_memory_log(self, decision: Dict, immediate: bool = False) -> str:
+        """Create immutable log - no committee approval needed
+
+        The log hash is queued durably and joins the next Merkle commitment
+        of every chain. With immediate=True (critical decisions) it is also
+        anchored on its own right away; the call waits for the anchor quorum
+        at most immediate_anchor_timeout seconds. Anchor failures never
+        reach the caller: the queued hash is retried until anchored.
+        """
         log = {
             'timestamp': time.time_ns(),  # Nanosecond precision
             'decision': decision,
@@ -45,27 +201,47 @@ class TMLBlockchain:
         log_hash = hashlib.sha256(json.dumps(log).encode()).hexdigest()
         
         # Anchor to multiple chains
-        self._anchor_to_blockchain(log_hash)
+        self.anchor_scheduler.submit(log_hash)
+        if immediate:
+            try:
+                self._anchor_to_blockchain(log_hash, self.immediate_anchor_timeout)
+            except AnchorQuorumError as error:
+                logger.warning("immediate anchor of %s incomplete, left to the anchor queue: %s",
+                               log_hash, error)
         
         return log_hash
     
-    def _anchor_to_blockchain(self, hash: str) -> Dict:
-        """Multi-chain anchoring for $50B attack resistance"""
-        results = {}
-        
-        # Bitcoin (via OpenTimestamps)
-        results['bitcoin'] = self._anchor_bitcoin(hash)
-        
-        # Ethereum
-        results['ethereum'] = self._anchor_ethereum(hash)
-        
-        # Polygon (for speed)
-        results['polygon'] = self._anchor_polygon(hash)
-        
-        # IPFS for distributed storage
-        results['ipfs'] = self._store_ipfs(hash)
-        
-        return results
+    def _anchor_to_blockchain(self, hash: str, timeout: Optional[float] = None) -> AnchorReceipt:
+        """Multi-chain anchoring for $50B attack resistance
+
+        Returns once the anchor quorum has confirmed; the receipt keeps
+        collecting the other backends' results. Raises AnchorQuorumError
+        if failures or timeouts make the quorum unreachable, or if it is
+        not met within timeout seconds.
+        """
+        receipt = self.anchorer.submit(hash)
+        self.anchor_receipts.put(hash, receipt)
+        if not receipt.wait_for_quorum(timeout):
+            raise AnchorQuorumError(receipt)
+        return receipt
+
+    def anchor_receipt(self, log_hash: str) -> Optional[AnchorReceipt]:
+        """Receipt of a recent immediate anchor, with every backend's latest status"""
+        return self.anchor_receipts.get(log_hash)
+
+    def anchor_proof(self, log_hash: str, chain: str) -> Optional[Dict]:
+        """Merkle inclusion proof of a batched log under its anchored root on chain"""
+        return self.anchor_scheduler.proof(log_hash, chain)
+
+    def anchor_metrics(self) -> Dict[str, Dict]:
+        """Per-chain anchoring backlog: durable queue size and age plus lane stats"""
+        queued = self.anchor_queue.metrics()
+        return {
+            chain: dict(stats,
+                        queued=queued.get(chain, {}).get('backlog', 0),
+                        oldest_queued_s=queued.get(chain, {}).get('oldest_age_s'))
+            for chain, stats in self.anchor_scheduler.stats().items()
+        }
     
     def trigger_sacred_zero(self, violation: Dict) -> Dict:
         """Automatic Sacred Zero - no committee review"""
@@ -165,13 +341,26 @@ class TMLBlockchain:
         }
     
     def verify_compliance(self, company_address: str) -> Dict:
-        """Public verification - no Council review"""
+        """Public verification - no Council review
+
+        Answers from the local anchor log index without calling the chain;
+        synced_block and index_age_s say how current the index is.
+        """
+        index = {
+            'synced_block': self.log_index.synced_block,
+            'index_age_s': (None if self.log_index.synced_at is None
+                            else time.time() - self.log_index.synced_at)
+        }
+        if not self.log_index.ready.is_set():
+            # No judgement on a partial index
+            return {'compliant': None, 'status': 'INDEX_BACKFILLING', **index}
+
         # Check Blockchain for logs
-        logs = self._query_blockchain_logs(company_address)
+        logged = self._count_blockchain_logs(company_address)
         
         # Calculate missing logs
         expected = self._calculate_expected_logs(company_address)
-        missing = expected - len(logs)
+        missing = expected - logged
         
         if missing > 0:
             # Automatic prosecution
@@ -183,14 +372,20 @@ class TMLBlockchain:
                 'missing_logs': missing,
                 'penalty': penalty,
                 'prosecution': prosecution,
-                'council_review': 'UNNECESSARY'
+                'council_review': 'UNNECESSARY',
+                **index
             }
         
         return {
             'compliant': True,
-            'logs_verified': len(logs),
-            'blockchain_proof': True
+            'logs_verified': logged,
+            'blockchain_proof': True,
+            **index
         }
+
+    def _count_blockchain_logs(self, company_address: str) -> int:
+        """Indexed count of a company's anchor logs (synced in the background)"""
+        return self.log_index.count(company_address)
     
     def _execute_smart_contract(self, contract: str, method: str, params: List) -> str:
         """Direct smart contract execution"""
@@ -226,7 +421,9 @@ def deploy_tml_protection():
         'polygon_rpc': 'https://polygon-rpc.com',
         'sacred_zero_contract': '0xSACRED...',
         'penalty_contract': '0xPENALTY...',
-        'whistleblower_contract': '0xWHISTLE...'
+        'whistleblower_contract': '0xWHISTLE...',
+        'sacred_zero_deploy_block': 0,  # block the contract was deployed in
+        'anchor_queue_path': '/var/lib/tml/anchor_queue.db'
     }
     
     # Initialize Blockchain protection
@@ -0,0 +1,303 @@
+"""
+TML Canonical Hashing
+Creator: Lev Goukassian (ORCID: 0009-0006-5966-1243)
+
+Streaming canonical encoder for Always Memory hashes. Feeds hashlib
+incrementally while walking the structure, so multi-megabyte inputs are
+never materialised as a single JSON string. For JSON-compatible inputs the
+digest is identical to sha256(json.dumps(data, sort_keys=True).encode()).
+"""
+
+import dataclasses
+import hashlib
+import json
+from json.encoder import encode_basestring_ascii
+from typing import Any, Callable, Optional
+
+# Encoded text is buffered and handed to the hasher in chunks of this size
+_FLUSH_SIZE = 1 << 16
+
+# Strings longer than this are escaped slice by slice
+_STRING_CHUNK = 1 << 16
+
+_SCALAR_TYPES = frozenset((int, float, bool, type(None)))
+_BUFFER_TYPES = (bytes, bytearray, memoryview)
+
+# Containers with at most this many items may take the one-shot path
+_FLAT_MAX_ITEMS = 1024
+
+# Containers holding only short scalars go through the C encoder in one shot
+_FLAT_ENCODER = json.JSONEncoder(sort_keys=True)
+
+
+# TypeTag without state: the object is identified by its type alone
+_NO_STATE = object()
+
+
+class TypeTag:
+    """Typed stand-in for an object that is not JSON-compatible
+
+    Returned from a default hook, it hashes as the object's qualified type
+    name under a NUL-prefixed header, followed by the canonical encoding of
+    state, so the digest is deterministic across processes and cannot
+    collide with any JSON value. Without state, instances of one type share
+    a digest.
+    """
+
+    __slots__ = ("name", "state")
+
+    def __init__(self, o: Any, state: Any = _NO_STATE):
+        cls = type(o)
+        self.name = f"{cls.__module__}.{cls.__qualname__}"
+        self.state = state
+
+
+def _object_state(o: Any) -> Any:
+    """Contents of an object as encodable values, or _NO_STATE"""
+    if isinstance(o, type):
+        return f"{o.__module__}.{o.__qualname__}"
+    if dataclasses.is_dataclass(o):
+        # Fields only, without asdict()'s deep copy; nested objects go
+        # through the hook again
+        return {field.name: getattr(o, field.name) for field in dataclasses.fields(o)}
+    model_dump = getattr(o, "model_dump", None)
+    if callable(model_dump):
+        try:
+            return model_dump(mode="json")
+        except TypeError:
+            return model_dump()
+    if hasattr(o, "__fields__") and callable(getattr(o, "dict", None)):
+        return o.dict()
+    attributes = getattr(o, "__dict__", None)
+    state = dict(attributes) if isinstance(attributes, dict) else None
+    for cls in type(o).__mro__:
+        slots = cls.__dict__.get("__slots__", ())
+        for name in (slots,) if isinstance(slots, str) else slots:
+            if name in ("__dict__", "__weakref__") or not hasattr(o, name):
+                continue
+            if state is None:
+                state = {}
+            state.setdefault(name, getattr(o, name))
+    return _NO_STATE if state is None else state
+
+
+def object_state(o: Any) -> TypeTag:
+    """default hook that encodes an object as its type and contents
+
+    Contents are dataclass fields, model_dump() or dict() of pydantic-style
+    models, or instance attributes from __dict__ and __slots__. Objects
+    exposing none of these raise TypeError.
+    """
+    state = _object_state(o)
+    if state is _NO_STATE:
+        raise TypeError(f"Object of type {o.__class__.__name__} has no canonical encoding")
+    return TypeTag(o, state)
+
+
+def object_state_or_type(o: Any) -> TypeTag:
+    """object_state, tagging objects without readable contents by type only
+
+    An explicit opt-in: all such instances of one type share a digest.
+    """
+    return TypeTag(o, _object_state(o))
+
+
+def _floatstr(o: float) -> str:
+    """Float formatting identical to json.dumps with allow_nan=True"""
+    if o != o:
+        return "NaN"
+    if o == float("inf"):
+        return "Infinity"
+    if o == -float("inf"):
+        return "-Infinity"
+    return float.__repr__(o)
+
+
+def _is_flat(values) -> bool:
+    """True when every value can be encoded by the C encoder without copying much"""
+    if len(values) > _FLAT_MAX_ITEMS:
+        return False
+    for value in values:
+        value_type = type(value)
+        if value_type is str:
+            if len(value) > _STRING_CHUNK:
+                return False
+        elif value_type not in _SCALAR_TYPES:
+            return False
+    return True
+
+
+class _CanonicalEncoder:
+    """Walks a structure and feeds its canonical encoding to a hasher"""
+
+    __slots__ = ("_update", "_parts", "_pending", "_markers", "_default")
+
+    def __init__(self, hasher, default: Optional[Callable[[Any], Any]] = None):
+        self._update = hasher.update
+        self._parts = []
+        self._pending = 0
+        self._markers = set()
+        self._default = default
+
+    def _write(self, text: str):
+        self._parts.append(text)
+        self._pending += len(text)
+        if self._pending >= _FLUSH_SIZE:
+            self.flush()
+
+    def flush(self):
+        if self._parts:
+            self._update("".join(self._parts).encode("ascii"))
+            self._parts.clear()
+            self._pending = 0
+
+    def encode(self, o: Any):
+        if isinstance(o, str):
+            self._write_str(o)
+        elif o is None:
+            self._write("null")
+        elif o is True:
+            self._write("true")
+        elif o is False:
+            self._write("false")
+        elif isinstance(o, int):
+            self._write(int.__repr__(o))
+        elif isinstance(o, float):
+            self._write(_floatstr(o))
+        elif isinstance(o, (list, tuple)):
+            self._encode_list(o)
+        elif isinstance(o, dict):
+            self._encode_dict(o)
+        elif isinstance(o, _BUFFER_TYPES):
+            self._write_buffer(memoryview(o))
+        else:
+            try:
+                view = memoryview(o)
+            except TypeError:
+                if self._default is None:
+                    raise TypeError(
+                        f"Object of type {o.__class__.__name__} is not JSON serializable"
+                    ) from None
+                value = self._default(o)
+                if type(value) is TypeTag:
+                    self._write_tag(value)
+                    if value.state is _NO_STATE:
+                        return
+                    value = value.state
+                marker = self._enter(o)
+                self.encode(value)
+                self._markers.discard(marker)
+                return
+            self._write_buffer(view)
+
+    def _write_str(self, s: str):
+        if len(s) <= _STRING_CHUNK:
+            self._write(encode_basestring_ascii(s))
+            return
+        # Escaping is per code point, so slices can be escaped independently
+        self._write('"')
+        for start in range(0, len(s), _STRING_CHUNK):
+            self._write(encode_basestring_ascii(s[start : start + _STRING_CHUNK])[1:-1])
+        self._write('"')
+
+    def _write_buffer(self, view: memoryview):
+        """Hash raw buffer contents without copying
+
+        JSON text never contains a raw NUL byte, so the NUL-prefixed header
+        cannot collide with any JSON-compatible encoding.
+        """
+        self.flush()
+        shape = ",".join(str(dim) for dim in view.shape)
+        header = f"\x00buffer:{view.format}:{shape}:{view.nbytes}:"
+        self._update(header.encode("ascii"))
+        if not view.c_contiguous:
+            view = memoryview(view.tobytes())
+        self._update(view.cast("B"))
+
+    def _write_tag(self, tag: TypeTag):
+        self.flush()
+        self._update(f"\x00object:{tag.name}:".encode("utf-8"))
+
+    def _enter(self, o):
+        marker = id(o)
+        if marker in self._markers:
+            raise ValueError("Circular reference detected")
+        self._markers.add(marker)
+        return marker
+
+    def _encode_list(self, o):
+        if not o:
+            self._write("[]")
+            return
+        if _is_flat(o):
+            self._write(_FLAT_ENCODER.encode(o))
+            return
+        marker = self._enter(o)
+        self._write("[")
+        first = True
+        for value in o:
+            if first:
+                first = False
+            else:
+                self._write(", ")
+            self.encode(value)
+        self._write("]")
+        self._markers.discard(marker)
+
+    def _encode_dict(self, o):
+        if not o:
+            self._write("{}")
+            return
+        if _is_flat(o.values()):
+            self._write(_FLAT_ENCODER.encode(o))
+            return
+        marker = self._enter(o)
+        self._write("{")
+        first = True
+        for key, value in sorted(o.items()):
+            if isinstance(key, str):
+                pass
+            elif isinstance(key, float):
+                key = _floatstr(key)
+            elif key is True:
+                key = "true"
+            elif key is False:
+                key = "false"
+            elif key is None:
+                key = "null"
+            elif isinstance(key, int):
+                key = int.__repr__(key)
+            else:
+                raise TypeError(
+                    f"keys must be str, int, float, bool or None, " f"not {key.__class__.__name__}"
+                )
+            if first:
+                first = False
+            else:
+                self._write(", ")
+            self._write(encode_basestring_ascii(key))
+            self._write(": ")
+            self.encode(value)
+        self._write("}")
+        self._markers.discard(marker)
+
+
+def update_canonical(hasher, data: Any, default: Optional[Callable[[Any], Any]] = None):
+    """Feed the canonical encoding of data into an existing hashlib object
+
+    As with json.dumps, default is called for objects that are neither
+    JSON-compatible nor buffers and should return an encodable value.
+    """
+    encoder = _CanonicalEncoder(hasher, default)
+    encoder.encode(data)
+    encoder.flush()
+
+
+def canonical_digest(data: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """Return the 32-byte SHA-256 digest of the canonical encoding of data"""
+    hasher = hashlib.sha256()
+    if type(data) is dict and _is_flat(data.values()):
+        hasher.update(_FLAT_ENCODER.encode(data).encode("ascii"))
+    else:
+        update_canonical(hasher, data, default)
+    return hasher.digest()
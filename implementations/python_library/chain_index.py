@@ -0,0 +1,332 @@
+"""
+TML Anchor Log Index
+Creator: Lev Goukassian (ORCID: 0009-0006-5966-1243)
+
+Local SQLite index of the anchor events companies emit on chain, keyed by
+company address and block number, so compliance checks are indexed counts
+instead of a chain scan per request. Routine logs are anchored as one
+Merkle root per flush, so every event is stored with the number of log
+hashes (leaves) its root commits to and count() sums those.
+
+sync() continues from the last indexed block. It asks for logs in block
+ranges of batch_blocks, several ranges per JSON-RPC batch request, and
+halves the range when the provider rejects it as too large. Each range is
+stored together with a checkpoint: the hash of its last block. Before
+indexing further, sync() compares the newest checkpoint with the chain; on
+a mismatch it walks back through the retained checkpoints to the newest one
+still on the chain, drops everything indexed above it and re-indexes from
+there. A reorg deeper than every retained checkpoint rebuilds the index.
+
+Indexing a chain from start_block can take many requests, so start()
+runs sync() in a background thread, every sync_interval seconds; ready is
+set once a sync has caught up with the chain head. RPC calls are made
+without holding the database lock, so count() and logs() answer from the
+index while a sync is waiting on the chain.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .rpc_provider import ANCHOR_EVENT_TOPIC, RPCError, decode_anchor_event
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS anchor_logs (
+    block_number INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    company TEXT NOT NULL,
+    contract TEXT NOT NULL,
+    transaction_hash TEXT NOT NULL,
+    block_hash TEXT NOT NULL,
+    data TEXT NOT NULL,
+    leaf_count INTEGER NOT NULL,
+    PRIMARY KEY (block_number, log_index)
+);
+CREATE INDEX IF NOT EXISTS anchor_logs_company ON anchor_logs (company, block_number);
+CREATE TABLE IF NOT EXISTS sync_checkpoints (
+    block_number INTEGER PRIMARY KEY,
+    block_hash TEXT NOT NULL
+);
+"""
+
+# Provider error codes for a log query spanning too many blocks or results
+_RANGE_ERRORS = (-32005, -32602)
+
+
+def _company(topic: str) -> str:
+    """Address from a 32-byte log topic"""
+    return "0x" + topic[-40:].lower()
+
+
+class AnchorLogIndex:
+    """Anchor events of a chain indexed by company address and block number
+
+    The company is the anchoring account (the event's second topic).
+    Only blocks at least confirmations deep are indexed, and sync() does
+    nothing when called again within sync_interval seconds unless forced.
+    start_block should be the block the anchoring contract was deployed in.
+    """
+
+    def __init__(
+        self,
+        client,
+        path: str = ":memory:",
+        contracts: Optional[Iterable[str]] = None,
+        topic: str = ANCHOR_EVENT_TOPIC,
+        start_block: int = 0,
+        batch_blocks: int = 2000,
+        ranges_per_request: int = 4,
+        confirmations: int = 0,
+        checkpoint_depth: int = 64,
+        sync_interval: float = 0.0,
+    ):
+        self.client = client
+        self.path = path
+        self.contracts = sorted({address.lower() for address in contracts}) if contracts else None
+        self.topic = topic
+        self.start_block = start_block
+        self.batch_blocks = batch_blocks
+        self.ranges_per_request = ranges_per_request
+        self.confirmations = confirmations
+        self.checkpoint_depth = checkpoint_depth
+        self.sync_interval = sync_interval
+        self.reorgs = 0
+        self.ready = threading.Event()
+        # time.time() when a sync last caught up with the chain head
+        self.synced_at: Optional[float] = None
+        self._stop = threading.Event()
+        self._syncer: Optional[threading.Thread] = None
+        self._last_sync = float("-inf")
+        # Syncs are serialized; the database connection is shared under
+        # _lock, which is never held across an RPC call
+        self._sync_lock = threading.Lock()
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(anchor_logs)")}
+        if columns and "leaf_count" not in columns:
+            # Indexed before leaf counts were kept: rebuild from start_block
+            self._db.executescript("DROP TABLE anchor_logs; DROP TABLE sync_checkpoints;")
+        self._db.executescript(_SCHEMA)
+
+    @contextmanager
+    def _transaction(self):
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+    # -- syncing --------------------------------------------------------
+
+    @property
+    def synced_block(self) -> int:
+        """Last indexed block (start_block - 1 before the first sync)"""
+        with self._lock:
+            row = self._db.execute("SELECT MAX(block_number) FROM sync_checkpoints").fetchone()
+        return self.start_block - 1 if row[0] is None else row[0]
+
+    def start(self, retry_interval: float = 5.0) -> threading.Thread:
+        """Keep syncing in a background thread until close()
+
+        Syncs run every sync_interval seconds (at least every 0.1 s); a
+        failed sync is logged and retried after retry_interval seconds.
+        """
+
+        def run():
+            while not self._stop.is_set():
+                try:
+                    self.sync(force=True)
+                except Exception as error:
+                    logger.warning("anchor log sync failed, retrying: %r", error)
+                    self._stop.wait(retry_interval)
+                    continue
+                self._stop.wait(max(self.sync_interval, 0.1))
+
+        with self._sync_lock:
+            if self._syncer is None:
+                self._syncer = threading.Thread(target=run, name="tml-anchor-log-sync", daemon=True)
+                self._syncer.start()
+            return self._syncer
+
+    def sync(self, force: bool = False) -> int:
+        """Index new confirmed blocks; returns the number of logs added"""
+        with self._sync_lock:
+            started = time.monotonic()
+            if not force and started - self._last_sync < self.sync_interval:
+                return 0
+            head = int(self.client.request("eth_blockNumber"), 16) - self.confirmations
+            start = self._resume_block()
+            added = 0
+            while start <= head:
+                if self._stop.is_set():
+                    return added
+                ranges = []
+                while start <= head and len(ranges) < self.ranges_per_request:
+                    end = min(start + self.batch_blocks - 1, head)
+                    ranges.append((start, end))
+                    start = end + 1
+                try:
+                    results = self.client.batch(self._range_calls(ranges))
+                except RPCError as error:
+                    if error.code not in _RANGE_ERRORS or self.batch_blocks == 1:
+                        raise
+                    self.batch_blocks = max(1, self.batch_blocks // 2)
+                    start = ranges[0][0]
+                    continue
+                added += self._store(ranges, results)
+                if self.synced_block < ranges[-1][1]:
+                    # The chain shrank under us; the next sync sorts it out
+                    break
+            else:
+                self.synced_at = time.time()
+                self.ready.set()
+            self._last_sync = started
+            return added
+
+    def _range_calls(self, ranges: List[Tuple[int, int]]) -> List[Tuple[str, List[Any]]]:
+        calls = []
+        for first, last in ranges:
+            query: Dict[str, Any] = {
+                "fromBlock": hex(first),
+                "toBlock": hex(last),
+                "topics": [self.topic],
+            }
+            if self.contracts is not None:
+                query["address"] = self.contracts
+            calls.append(("eth_getLogs", [query]))
+            calls.append(("eth_getBlockByNumber", [hex(last), False]))
+        return calls
+
+    def _store(self, ranges: List[Tuple[int, int]], results: List[Any]) -> int:
+        rows = []
+        checkpoints = []
+        for index, (_, last) in enumerate(ranges):
+            logs, block = results[2 * index], results[2 * index + 1]
+            if block is None:
+                break
+            checkpoints.append((last, block["hash"]))
+            rows.extend(
+                (
+                    int(log["blockNumber"], 16),
+                    int(log["logIndex"], 16),
+                    _company(log["topics"][1]),
+                    log["address"].lower(),
+                    log["transactionHash"],
+                    log["blockHash"],
+                    log["data"],
+                    decode_anchor_event(log["data"])[1],
+                )
+                for log in logs
+                if len(log["topics"]) > 1 and not log.get("removed")
+            )
+        if not checkpoints:
+            return 0
+        with self._lock, self._transaction():
+            self._db.executemany(
+                "INSERT OR REPLACE INTO anchor_logs VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self._db.executemany(
+                "INSERT OR REPLACE INTO sync_checkpoints VALUES (?, ?)", checkpoints
+            )
+            self._db.execute(
+                "DELETE FROM sync_checkpoints WHERE block_number NOT IN "
+                "(SELECT block_number FROM sync_checkpoints ORDER BY block_number DESC LIMIT ?)",
+                (self.checkpoint_depth,),
+            )
+        return len(rows)
+
+    def _resume_block(self) -> int:
+        """First block to index, after rolling back past any reorg"""
+        with self._lock:
+            checkpoints = self._db.execute(
+                "SELECT block_number, block_hash FROM sync_checkpoints ORDER BY block_number DESC"
+            ).fetchall()
+        if not checkpoints:
+            return self.start_block
+        newest, newest_hash = checkpoints[0]
+        block = self.client.request("eth_getBlockByNumber", [hex(newest), False])
+        if block is not None and block["hash"] == newest_hash:
+            return newest + 1
+        self.reorgs += 1
+        blocks = self.client.batch(
+            [("eth_getBlockByNumber", [hex(number), False]) for number, _ in checkpoints[1:]]
+        )
+        common = self.start_block - 1
+        for (number, block_hash), block in zip(checkpoints[1:], blocks):
+            if block is not None and block["hash"] == block_hash:
+                common = number
+                break
+        with self._lock, self._transaction():
+            self._db.execute("DELETE FROM anchor_logs WHERE block_number > ?", (common,))
+            self._db.execute("DELETE FROM sync_checkpoints WHERE block_number > ?", (common,))
+        return common + 1
+
+    # -- queries --------------------------------------------------------
+
+    def count(
+        self, company: str, from_block: Optional[int] = None, to_block: Optional[int] = None
+    ) -> int:
+        """Number of log hashes a company anchored, optionally within blocks
+
+        Each anchor event counts with the leaves of its Merkle root.
+        """
+        with self._lock:
+            return self._db.execute(
+                "SELECT COALESCE(SUM(leaf_count), 0) FROM anchor_logs "
+                "WHERE company = ? AND block_number BETWEEN ? AND ?",
+                (
+                    company.lower(),
+                    -1 if from_block is None else from_block,
+                    2**62 if to_block is None else to_block,
+                ),
+            ).fetchone()[0]
+
+    def logs(
+        self,
+        company: str,
+        from_block: Optional[int] = None,
+        to_block: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Indexed anchor logs of a company in chain order"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT block_number, log_index, contract, transaction_hash, block_hash, data, "
+                "leaf_count FROM anchor_logs WHERE company = ? AND block_number BETWEEN ? AND ? "
+                "ORDER BY block_number, log_index LIMIT ?",
+                (
+                    company.lower(),
+                    -1 if from_block is None else from_block,
+                    2**62 if to_block is None else to_block,
+                    -1 if limit is None else limit,
+                ),
+            ).fetchall()
+        return [
+            {
+                "block_number": block_number,
+                "log_index": log_index,
+                "contract": contract,
+                "transaction_hash": tx_hash,
+                "block_hash": block_hash,
+                "data": data,
+                "leaf_count": leaf_count,
+            }
+            for block_number, log_index, contract, tx_hash, block_hash, data, leaf_count in rows
+        ]
+
+    def close(self):
+        """Stop background syncing and close the database"""
+        self._stop.set()
+        if self._syncer is not None:
+            self._syncer.join()
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,124 @@
+"""
+TML Hybrid Logical Clock
+Creator: Lev Goukassian (ORCID: 0009-0006-5966-1243)
+
+Timestamps for memory entries are 64-bit hybrid logical clock values:
+milliseconds since the Unix epoch in the upper 48 bits and a logical
+counter in the lower 16. Values are strictly increasing within a process,
+even when the wall clock steps backwards (NTP), and are only formatted as
+ISO-8601 when an entry is exported.
+
+As in standard HLC, an exhausted logical counter carries into the
+millisecond field, so issuing a timestamp never waits for the wall clock.
+update() rejects remote values more than max_drift_ms ahead of the local
+wall clock, so a peer with a skewed or malicious clock cannot drag this
+clock far into the future.
+"""
+
+import threading
+import time
+from datetime import datetime, timezone
+from typing import List, Optional
+
+LOGICAL_BITS = 16
+LOGICAL_MASK = (1 << LOGICAL_BITS) - 1
+
+# Default bound on how far a remote timestamp may be ahead of the wall clock
+DEFAULT_MAX_DRIFT_MS = 60_000
+
+
+class ClockDriftError(ValueError):
+    """A remote timestamp is further ahead of the wall clock than allowed"""
+
+
+def physical_ms(hlc: int) -> int:
+    """Wall-clock milliseconds carried by an HLC value"""
+    return hlc >> LOGICAL_BITS
+
+
+def logical(hlc: int) -> int:
+    """Logical counter carried by an HLC value"""
+    return hlc & LOGICAL_MASK
+
+
+def format_hlc(hlc: int) -> str:
+    """Format an HLC value like datetime.utcnow().isoformat() + "Z" """
+    moment = datetime.fromtimestamp(physical_ms(hlc) / 1000, tz=timezone.utc)
+    return moment.replace(tzinfo=None).isoformat(timespec="microseconds") + "Z"
+
+
+class HybridLogicalClock:
+    """Thread-safe hybrid logical clock"""
+
+    def __init__(self, wall_clock_ns=time.time_ns, max_drift_ms: int = DEFAULT_MAX_DRIFT_MS):
+        self._wall_clock_ns = wall_clock_ns
+        self.max_drift_ms = max_drift_ms
+        self._last = 0
+        self._lock = threading.Lock()
+
+    def _wall(self) -> int:
+        return (self._wall_clock_ns() // 1_000_000) << LOGICAL_BITS
+
+    def _tick(self, count: int, remote: int = 0) -> int:
+        """First of count consecutive values above both _last and remote
+
+        A logical counter running past 65535 carries into the milliseconds.
+        """
+        if not 1 <= count <= LOGICAL_MASK + 1:
+            raise ValueError(f"count must be between 1 and {LOGICAL_MASK + 1}")
+        wall = self._wall()
+        with self._lock:
+            floor = self._last if self._last > remote else remote
+            first = wall if wall > floor else floor + 1
+            self._last = first + count - 1
+            return first
+
+    def now(self) -> int:
+        """Return a timestamp greater than every one issued before"""
+        return self._tick(1)
+
+    def reserve(self, count: int) -> int:
+        """Reserve count (at most 65536) consecutive timestamps and return the first"""
+        return self._tick(count)
+
+    def timestamps(self, count: int) -> List[int]:
+        """count increasing timestamps, reserved in blocks of at most 65536"""
+        stamps: List[int] = []
+        while count > 0:
+            block = min(count, LOGICAL_MASK + 1)
+            first = self._tick(block)
+            stamps.extend(range(first, first + block))
+            count -= block
+        return stamps
+
+    def update(self, remote: int) -> int:
+        """Merge a timestamp received from another node and tick
+
+        Raises ClockDriftError, leaving the clock unchanged, when remote is
+        more than max_drift_ms ahead of the local wall clock.
+        """
+        drift_ms = physical_ms(remote) - self._wall_clock_ns() // 1_000_000
+        if drift_ms > self.max_drift_ms:
+            raise ClockDriftError(
+                f"remote timestamp is {drift_ms} ms ahead of the wall clock "
+                f"(max_drift_ms={self.max_drift_ms})"
+            )
+        return self._tick(1, remote)
+
+    @property
+    def last(self) -> int:
+        return self._last
+
+
+_default_clock: Optional[HybridLogicalClock] = None
+_default_lock = threading.Lock()
+
+
+def default_clock() -> HybridLogicalClock:
+    """Process-wide clock shared by every component that stamps entries"""
+    global _default_clock
+    if _default_clock is None:
+        with _default_lock:
+            if _default_clock is None:
+                _default_clock = HybridLogicalClock()
+    return _default_clock
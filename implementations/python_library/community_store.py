@@ -0,0 +1,296 @@
+"""
+TML Persistent Community Registry
+Creator: Lev Goukassian (ORCID: 0009-0006-5966-1243)
+
+SQLite-backed store for community registrations, usable anywhere
+EarthProtection expects its registered_communities mapping. The database
+runs in WAL mode so several worker processes can share one registry file,
+and a restarted process sees every community without re-registration.
+
+Registrations are indexed by community_id and governance_protocol. Territory
+bounding boxes live in an R*Tree (or an indexed table where SQLite lacks the
+module), so a location lookup only loads and parses the geometry of
+candidate territories. Hot registrations and parsed geometries are kept in
+bounded read-through LRU caches, which are dropped whenever another
+connection commits a change.
+"""
+
+import json
+import sqlite3
+import threading
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, List, Optional
+
+from .lru import LRUCache
+from .spatial import Geometry, parse_territory
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS communities (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    community_id TEXT NOT NULL UNIQUE,
+    governance_protocol TEXT NOT NULL,
+    record TEXT NOT NULL,
+    territory TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS communities_governance ON communities (governance_protocol);
+CREATE TABLE IF NOT EXISTS applied_awards (
+    award_id TEXT PRIMARY KEY
+);
+"""
+
+_RTREE_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS community_bounds
+    USING rtree (seq, min_x, max_x, min_y, max_y);
+"""
+
+_TABLE_BOUNDS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS community_bounds (
+    seq INTEGER PRIMARY KEY, min_x REAL, max_x REAL, min_y REAL, max_y REAL
+);
+CREATE INDEX IF NOT EXISTS community_bounds_x ON community_bounds (min_x, max_x);
+"""
+
+
+class _StoredTerritoryIndex:
+    """Territory index interface of EarthProtection over the stored bounds"""
+
+    def __init__(self, store: "SQLiteCommunityStore"):
+        self._store = store
+
+    def insert(self, key: str, geometry: Geometry):
+        # Bounds were persisted with the registration; keep the parsed copy hot
+        self._store._geometries.put(key, geometry)
+
+    def remove(self, key: str):
+        self._store._geometries.pop(key)
+
+    def query(self, x: float, y: float) -> List[str]:
+        return self._store.communities_at(x, y)
+
+
+class SQLiteCommunityStore(MutableMapping):
+    """Mapping of community_id -> registration dict persisted in SQLite
+
+    Returned registrations are cached objects: after changing one in place,
+    assign it back so the change is persisted.
+    """
+
+    def __init__(self, path: str, cache_size: int = 1024, geometry_cache_size: int = 1024):
+        self.path = path
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._records = LRUCache(cache_size)
+        self._geometries = LRUCache(geometry_cache_size)
+        self.territory_index = _StoredTerritoryIndex(self)
+
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(_SCHEMA)
+        try:
+            connection.executescript(_RTREE_SCHEMA)
+        except sqlite3.OperationalError:
+            # SQLite built without the R*Tree module
+            connection.executescript(_TABLE_BOUNDS_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path, timeout=30, isolation_level=None, check_same_thread=False
+            )
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.data_version = connection.execute("PRAGMA data_version").fetchone()[0]
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    def _fresh_connection(self) -> sqlite3.Connection:
+        """Connection for a read, dropping caches if another connection wrote"""
+        connection = self._connection()
+        version = connection.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._local.data_version:
+            self._local.data_version = version
+            self._records.clear()
+            self._geometries.clear()
+        return connection
+
+    def __getitem__(self, community_id: str) -> Dict[str, Any]:
+        connection = self._fresh_connection()
+        record = self._records.get(community_id)
+        if record is not None:
+            return record
+        row = connection.execute(
+            "SELECT record, territory FROM communities WHERE community_id = ?", (community_id,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(community_id)
+        record = json.loads(row[0])
+        record["territory"] = json.loads(row[1])
+        self._records.put(community_id, record)
+        return record
+
+    def __contains__(self, community_id: object) -> bool:
+        connection = self._fresh_connection()
+        if self._records.get(community_id) is not None:
+            return True
+        return (
+            connection.execute(
+                "SELECT 1 FROM communities WHERE community_id = ?", (community_id,)
+            ).fetchone()
+            is not None
+        )
+
+    def __setitem__(self, community_id: str, registration: Dict[str, Any]):
+        territory = registration.get("territory") or {}
+        geometry = parse_territory(territory)
+        record = {key: value for key, value in registration.items() if key != "territory"}
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute(
+                "INSERT INTO communities (community_id, governance_protocol, record, territory) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT (community_id) DO UPDATE SET "
+                "governance_protocol = excluded.governance_protocol, "
+                "record = excluded.record, territory = excluded.territory",
+                (
+                    community_id,
+                    registration.get("governance_protocol", ""),
+                    json.dumps(record),
+                    json.dumps(territory),
+                ),
+            )
+            seq = connection.execute(
+                "SELECT seq FROM communities WHERE community_id = ?", (community_id,)
+            ).fetchone()[0]
+            connection.execute("DELETE FROM community_bounds WHERE seq = ?", (seq,))
+            if geometry is not None:
+                min_x, min_y, max_x, max_y = geometry.bbox
+                connection.execute(
+                    "INSERT INTO community_bounds VALUES (?, ?, ?, ?, ?)",
+                    (seq, min_x, max_x, min_y, max_y),
+                )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        self._records.put(community_id, registration)
+        self._geometries.pop(community_id)
+
+    def __delitem__(self, community_id: str):
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT seq FROM communities WHERE community_id = ?", (community_id,)
+            ).fetchone()
+            if row is None:
+                connection.execute("ROLLBACK")
+                raise KeyError(community_id)
+            connection.execute("DELETE FROM community_bounds WHERE seq = ?", row)
+            connection.execute("DELETE FROM communities WHERE seq = ?", row)
+            connection.execute("COMMIT")
+        except KeyError:
+            raise
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        self._records.pop(community_id)
+        self._geometries.pop(community_id)
+
+    def add_stewardship_tokens(
+        self, increments: Dict[str, int], award_id: Optional[str] = None
+    ) -> Dict[str, int]:
+        """Add token amounts to registrations in one transaction; returns the new balances
+
+        The read-modify-write runs under the database write lock, so
+        concurrent awards from other connections and processes are never lost.
+        An award_id is applied at most once; repeating it only reads the balances.
+        """
+        connection = self._connection()
+        balances = {}
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            if award_id is not None:
+                cursor = connection.execute(
+                    "INSERT OR IGNORE INTO applied_awards VALUES (?)", (award_id,)
+                )
+                if cursor.rowcount == 0:
+                    # Applied before: report the balances without adding again
+                    increments = dict.fromkeys(increments, 0)
+            for community_id, amount in increments.items():
+                row = connection.execute(
+                    "SELECT record FROM communities WHERE community_id = ?", (community_id,)
+                ).fetchone()
+                if row is None:
+                    raise KeyError(community_id)
+                record = json.loads(row[0])
+                record["stewardship_tokens"] = record.get("stewardship_tokens", 0) + amount
+                connection.execute(
+                    "UPDATE communities SET record = ? WHERE community_id = ?",
+                    (json.dumps(record), community_id),
+                )
+                balances[community_id] = record["stewardship_tokens"]
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        for community_id in balances:
+            self._records.pop(community_id)
+        return balances
+
+    def __iter__(self) -> Iterator[str]:
+        rows = self._connection().execute("SELECT community_id FROM communities ORDER BY seq")
+        return (row[0] for row in rows.fetchall())
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM communities").fetchone()[0]
+
+    def by_governance(self, governance_protocol: str) -> List[str]:
+        """Community ids following a governance protocol, in registration order"""
+        rows = self._connection().execute(
+            "SELECT community_id FROM communities WHERE governance_protocol = ? ORDER BY seq",
+            (governance_protocol,),
+        )
+        return [row[0] for row in rows.fetchall()]
+
+    def communities_at(self, x: float, y: float) -> List[str]:
+        """Communities whose territory contains (x, y), in registration order"""
+        connection = self._fresh_connection()
+        candidates = connection.execute(
+            "SELECT c.community_id FROM community_bounds b JOIN communities c ON c.seq = b.seq "
+            "WHERE b.min_x <= ? AND b.max_x >= ? AND b.min_y <= ? AND b.max_y >= ? "
+            "ORDER BY c.seq",
+            (x, x, y, y),
+        ).fetchall()
+        hits = []
+        for (community_id,) in candidates:
+            geometry = self._geometry(connection, community_id)
+            if geometry is not None and geometry.contains(x, y):
+                hits.append(community_id)
+        return hits
+
+    def _geometry(self, connection: sqlite3.Connection, community_id: str) -> Optional[Geometry]:
+        geometry = self._geometries.get(community_id)
+        if geometry is None:
+            row = connection.execute(
+                "SELECT territory FROM communities WHERE community_id = ?", (community_id,)
+            ).fetchone()
+            geometry = parse_territory(json.loads(row[0])) if row else None
+            if geometry is not None:
+                self._geometries.put(community_id, geometry)
+        return geometry
+
+    def close(self):
+        with self._connections_lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def __enter__(self) -> "SQLiteCommunityStore":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -3,28 +3,128 @@ TML Always Memory Core Implementation
 Creator: Lev Goukassian (ORCID: 0009-0006-5966-1243)
 """
 
-import hashlib
-import json
+import asyncio
+import functools
+import inspect
 import time
-from datetime import datetime
-from typing import Dict, Any, Optional, Callable
+from typing import Dict, Any, Optional, Callable, Iterable, List, Sequence
 from enum import IntEnum
 
+from .canonical import canonical_digest, object_state, object_state_or_type
+from .clock import HybridLogicalClock, default_clock, format_hlc
+
 class TMLState(IntEnum):
     """Ternary Moral Logic states"""
     REFUSE = -1
     SACRED_ZERO = 0
     PROCEED = 1
 
+class MemoryEnvelope:
+    """Envelope fields shared by every entry of one AlwaysMemory instance"""
+    
+    __slots__ = ("framework", "creator_orcid", "system_id")
+    
+    def __init__(self, system_id: str, creator_orcid: str,
+                 framework: str = "TML-AlwaysMemory-v5.0"):
+        self.framework = framework
+        self.creator_orcid = creator_orcid
+        self.system_id = system_id
+    
+    def promise(self) -> Dict[str, Any]:
+        """Build the goukassian_promise block"""
+        return {
+            "lantern": True,
+            "signature": self.creator_orcid,
+            "license": "MIT-Attribution-Required"
+        }
+
+class MemoryEntry:
+    """Compact Always Memory record
+    
+    Hashes are kept as raw 32-byte digests, the constant envelope is
+    shared and the timestamp is a hybrid logical clock integer, so resident
+    entries cost a fraction of the equivalent dict. to_dict() produces the
+    schema-compatible shape (ISO-8601 timestamp) on demand, with the raw
+    HLC value alongside so the logical counter survives persistence.
+    """
+    
+    __slots__ = ("envelope", "timestamp", "action", "classification",
+                 "input_digest", "output_digest", "sacred_zero_trigger",
+                 "environmental_impact")
+    
+    def __init__(self,
+                 envelope: MemoryEnvelope,
+                 timestamp: int,
+                 action: str,
+                 classification: int,
+                 input_digest: bytes,
+                 output_digest: Optional[bytes] = None,
+                 sacred_zero_trigger: Optional[str] = None,
+                 environmental_impact: Optional[Dict[str, Any]] = None):
+        self.envelope = envelope
+        self.timestamp = timestamp
+        self.action = action
+        self.classification = classification
+        self.input_digest = input_digest
+        self.output_digest = output_digest
+        self.sacred_zero_trigger = sacred_zero_trigger
+        self.environmental_impact = environmental_impact
+    
+    @property
+    def input_hash(self) -> str:
+        return "0x" + self.input_digest.hex()
+    
+    @property
+    def output_hash(self) -> Optional[str]:
+        if self.output_digest is None:
+            return None
+        return "0x" + self.output_digest.hex()
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Expand into the schema-compatible memory entry dict"""
+        envelope = self.envelope
+        memory_entry = {
+            "framework": envelope.framework,
+            "creator_orcid": envelope.creator_orcid,
+            "timestamp": format_hlc(self.timestamp),
+            "hlc": self.timestamp,
+            "system_id": envelope.system_id,
+            "action": self.action,
+            "classification": self.classification,
+            "input_hash": self.input_hash,
+            "output_hash": self.output_hash,
+            "goukassian_promise": envelope.promise()
+        }
+        
+        if self.sacred_zero_trigger:
+            memory_entry["sacred_zero_trigger"] = self.sacred_zero_trigger
+            
+        if self.environmental_impact:
+            memory_entry["environmental_impact"] = self.environmental_impact
+        
+        return memory_entry
+    
+    def digest(self) -> bytes:
+        """Canonical digest of the full entry (Merkle leaf input)"""
+        return canonical_digest(self.to_dict())
+    
+    def __repr__(self) -> str:
+        return (f"MemoryEntry(action={self.action!r}, "
+                f"classification={self.classification}, "
+                f"input_hash={self.input_hash[:10]}...)")
+
 class AlwaysMemory:
     """Core Always Memory implementation"""
     
     def __init__(self, 
                  system_id: str,
-                 council_endpoints: Optional[list] = None):
+                 council_endpoints: Optional[list] = None,
+                 clock: Optional[HybridLogicalClock] = None):
         self.system_id = system_id
         self.council_endpoints = council_endpoints or []
         self.creator_orcid = "0009-0006-5966-1243"
+        self.envelope = MemoryEnvelope(system_id, self.creator_orcid)
+        self.clock = clock or default_clock()
     
     def create_memory(self, 
                       action: str,
@@ -34,68 +134,190 @@ class AlwaysMemory:
                       sacred_zero_trigger: Optional[str] = None,
                       environmental_impact: Optional[Dict[str, Any]] = None) -> Dict:
         """Create an immutable memory entry"""
+        return self.create_entry(
+            action, classification, input_data, output_data,
+            sacred_zero_trigger, environmental_impact
+        ).to_dict()
+    
+    def entry_from_digests(self,
+                           action: str,
+                           classification: TMLState,
+                           input_digest: bytes,
+                           output_digest: Optional[bytes] = None,
+                           sacred_zero_trigger: Optional[str] = None,
+                           environmental_impact: Optional[Dict[str, Any]] = None) -> MemoryEntry:
+        """Create a compact memory entry from precomputed canonical digests"""
+        return MemoryEntry(
+            self.envelope,
+            self.clock.now(),
+            action,
+            int(classification),
+            input_digest,
+            output_digest,
+            sacred_zero_trigger or None,
+            environmental_impact or None
+        )
+    
+    def create_entry(self,
+                     action: str,
+                     classification: TMLState,
+                     input_data: Any,
+                     output_data: Optional[Any] = None,
+                     sacred_zero_trigger: Optional[str] = None,
+                     environmental_impact: Optional[Dict[str, Any]] = None) -> MemoryEntry:
+        """Create a compact memory entry (see MemoryEntry)"""
+        return self.entry_from_digests(
+            action,
+            classification,
+            canonical_digest(input_data),
+            canonical_digest(output_data) if output_data else None,
+            sacred_zero_trigger,
+            environmental_impact
+        )
+    
+    def create_memories(self, records: Iterable[Sequence[Any]]) -> List[Dict]:
+        """Create memory entries for a batch of decisions in one pass
         
-        memory_entry = {
-            "framework": "TML-AlwaysMemory-v5.0",
-            "creator_orcid": self.creator_orcid,
-            "timestamp": datetime.utcnow().isoformat() + "Z",
-            "system_id": self.system_id,
-            "action": action,
-            "classification": int(classification),
-            "input_hash": self._hash_data(input_data),
-            "output_hash": self._hash_data(output_data) if output_data else None,
-            "goukassian_promise": {
-                "lantern": True,
-                "signature": self.creator_orcid,
-                "license": "MIT-Attribution-Required"
-            }
-        }
+        Each record is (action, classification, input_data, output_data),
+        optionally followed by sacred_zero_trigger and environmental_impact.
+        Entries carry increasing clock values reserved in one call.
+        """
+        return [entry.to_dict() for entry in self.create_entries(records)]
+    
+    def create_entries(self, records: Iterable[Sequence[Any]]) -> List[MemoryEntry]:
+        """Batched create_entry: the envelope and clock reservation are built once"""
+        if not isinstance(records, (list, tuple)):
+            records = list(records)
+        if not records:
+            return []
+        envelope = self.envelope
+        timestamps = self.clock.timestamps(len(records))
+        digest = canonical_digest
         
-        if sacred_zero_trigger:
-            memory_entry["sacred_zero_trigger"] = sacred_zero_trigger
-            
-        if environmental_impact:
-            memory_entry["environmental_impact"] = environmental_impact
+        entries = []
+        append = entries.append
+        for record, timestamp in zip(records, timestamps):
+            action, classification, input_data, output_data, *extra = record
+            sacred_zero_trigger = extra[0] if extra else None
+            environmental_impact = extra[1] if len(extra) > 1 else None
+            append(MemoryEntry(
+                envelope,
+                timestamp,
+                action,
+                int(classification),
+                digest(input_data),
+                digest(output_data) if output_data else None,
+                sacred_zero_trigger or None,
+                environmental_impact or None
+            ))
         
-        return memory_entry
+        return entries
+    
+    def _hash_data(self, data: Any) -> str:
+        """Create SHA256 hash of data, streamed through the canonical encoder"""
+        return "0x" + canonical_digest(data).hex()
+
+def hash_call_arguments(args: Sequence[Any], kwargs: Dict[str, Any],
+                        cache: Optional[Any] = None, tag_opaque: bool = False) -> bytes:
+    """Canonical digest of a call's arguments
     
-    def _hash_data(self, data: Dict[str, Any]) -> str:
-        """Create SHA256 hash of data"""
-        json_str = json.dumps(data, sort_keys=True)
-        return "0x" + hashlib.sha256(json_str.encode()).hexdigest()
+    Each argument is hashed on its own and the call digest covers the
+    per-argument digests, so an InputHashCache can serve repeated arguments
+    without changing the result. Objects that are neither JSON-compatible
+    nor buffers are hashed by their type and contents (see
+    canonical.object_state); objects without readable contents raise
+    TypeError unless tag_opaque is set, which hashes them by type only.
+    A cache hashes with its own default hook.
+    """
+    if cache is not None:
+        digest = cache.digest
+    else:
+        default = object_state_or_type if tag_opaque else object_state
+        digest = functools.partial(canonical_digest, default=default)
+    return canonical_digest({
+        "args": [digest(arg).hex() for arg in args],
+        "kwargs": {key: digest(value).hex() for key, value in kwargs.items()}
+    })
 
 # Decorator pattern for easy integration
 def always_memory(system_id: str = "default", 
-                  check_sacred_zero: Optional[Callable] = None):
-    """Decorator for automatic Always Memory tracking"""
+                  check_sacred_zero: Optional[Callable] = None,
+                  store: Optional[Any] = None,
+                  writer: Optional[Any] = None,
+                  input_cache: Optional[Any] = None,
+                  on_receipt: Optional[Callable[[Any], Any]] = None,
+                  tag_opaque_arguments: bool = False):
+    """Decorator for automatic Always Memory tracking
+    
+    One AlwaysMemory instance is created per decorated function and exposed
+    as wrapper.memory. Coroutine functions are wrapped natively; their
+    check_sacred_zero may itself be a coroutine function. When a store
+    (e.g. SegmentStore) is given, the input memory is appended to it before
+    the function runs: no memory, no action. With a writer
+    (WriteBehindWriter) only hashing and sequence reservation happen inline;
+    each call's receipt is passed to on_receipt in the calling thread or
+    coroutine and storage continues in the background. Coroutine wrappers
+    run the store append or writer submission in a worker thread so the
+    event loop never blocks on a sync or a full queue. An InputHashCache
+    passed as input_cache lets repeated large arguments skip re-hashing.
+    Arguments are hashed by content; tag_opaque_arguments allows arguments
+    without readable contents (locks, sockets, ...) to be hashed by type.
+    """
+    if store is not None and writer is not None:
+        raise ValueError("pass either store or writer, not both")
+    
     def decorator(func):
-        def wrapper(*args, **kwargs):
-            memory = AlwaysMemory(system_id=system_id)
-            
+        memory = AlwaysMemory(system_id=system_id)
+        action = func.__name__
+        
+        def record(args, kwargs, trigger):
+            """Create and persist the input memory; returns the writer receipt"""
             # Check for Sacred Zero conditions
             classification = TMLState.PROCEED
             sacred_trigger = None
-            
-            if check_sacred_zero:
-                trigger = check_sacred_zero(*args, **kwargs)
-                if trigger:
-                    classification = TMLState.SACRED_ZERO
-                    sacred_trigger = trigger
+            if trigger:
+                classification = TMLState.SACRED_ZERO
+                sacred_trigger = trigger
             
             # Create memory before action
-            input_memory = memory.create_memory(
-                action=func.__name__,
-                classification=classification,
-                input_data={"args": str(args), "kwargs": str(kwargs)},
+            entry = memory.entry_from_digests(
+                action,
+                classification,
+                hash_call_arguments(args, kwargs, input_cache, tag_opaque_arguments),
                 sacred_zero_trigger=sacred_trigger
             )
-            
-            # Log would be sent to Stewardship Custodians here
-            # For now, just proceed with function
-            
-            result = func(*args, **kwargs)
-            
-            return result
+            if store is not None:
+                store.append_entry(entry)
+            elif writer is not None:
+                return writer.submit(entry)
+            return None
+        
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                trigger = None
+                if check_sacred_zero:
+                    trigger = check_sacred_zero(*args, **kwargs)
+                    if inspect.isawaitable(trigger):
+                        trigger = await trigger
+                if store is None and writer is None:
+                    record(args, kwargs, trigger)
+                else:
+                    receipt = await asyncio.to_thread(record, args, kwargs, trigger)
+                    if on_receipt is not None and receipt is not None:
+                        on_receipt(receipt)
+                
+                return await func(*args, **kwargs)
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                trigger = check_sacred_zero(*args, **kwargs) if check_sacred_zero else None
+                receipt = record(args, kwargs, trigger)
+                if on_receipt is not None and receipt is not None:
+                    on_receipt(receipt)
+                
+                return func(*args, **kwargs)
         
+        wrapper.memory = memory
         return wrapper
     return decorator
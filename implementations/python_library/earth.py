@@ -5,12 +5,29 @@ Creator: Lev Goukassian (ORCID: 0009-0006-5966-1243)
 Extends Sacred Zero to planetary protection with community sovereignty
 """
 
+import functools
 import hashlib
+import inspect
 import json
-from datetime import datetime
-from typing import Dict, Any, Optional, List
+import threading
+from collections.abc import MutableMapping
+from typing import Dict, Any, Iterable, Optional, List, Sequence, Tuple
 from enum import Enum
 
+from .canonical import canonical_digest
+from .clock import HybridLogicalClock, default_clock, format_hlc
+from .community_store import SQLiteCommunityStore
+# ECO_HARM_RULES_VERSION and HARM_INDICATORS stay importable from this module
+from .eco_rules import ECO_HARM_RULES_VERSION, HARM_INDICATORS, EcoHarmRuleEngine  # noqa: F401
+from .harm_batch import HarmBatchResult, harm_batch_columns, score_harm_batch
+from .harm_matcher import HarmMatcher
+from .lru import LRUCache
+from .stewardship_ledger import StewardshipLedger
+from .spatial import TileCoverIndex, parse_territory, point_from_location
+
+# Compiled protection matchers kept in memory
+PROTECTION_INDEX_MAX = 4096
+
 class GovernanceProtocol(Enum):
     """Community governance models"""
     CONSENSUS_COUNCIL = "consensus_council"
@@ -22,11 +39,40 @@ class GovernanceProtocol(Enum):
 class EarthProtection:
     """Core Earth protection implementation"""
     
-    def __init__(self):
+    def __init__(self,
+                 clock: Optional[HybridLogicalClock] = None,
+                 registry: Optional[MutableMapping] = None,
+                 rules: Optional[EcoHarmRuleEngine] = None):
         self.creator_orcid = "0009-0006-5966-1243"
-        self.eco_harm_rules_version = "2025-09-21"
-        self.registered_communities = {}
+        self.clock = clock or default_clock()
+        # Built-in screening rules unless a (hot-reloading) rule engine is given
+        self.rules = rules or EcoHarmRuleEngine()
+        # Any community_id -> registration mapping, e.g. a SQLiteCommunityStore;
+        # persistent registries bring their own territory index
+        if registry is None:
+            self.registered_communities = {}
+            self.territory_index = TileCoverIndex()
+        else:
+            self.registered_communities = registry
+            self.territory_index = getattr(registry, "territory_index", None) or TileCoverIndex()
+        self._lock = threading.RLock()
+        # Matchers keyed on (community_id, protections digest); the digest is
+        # stored with the registration, so records reloaded from a persistent
+        # registry reuse the matcher until their protections change
+        self._protection_index = LRUCache(PROTECTION_INDEX_MAX)
         self.stewardship_fund = 0
+        # One ledger per context; balances are committed to the registrations
+        self.stewardship_ledger = StewardshipLedger(clock=self.clock,
+                                                    opening_balance=self._stewardship_tokens,
+                                                    add_balances=self._add_stewardship_tokens)
+
+    @property
+    def eco_harm_rules_version(self) -> str:
+        return self.rules.current().version
+
+    @property
+    def harm_matcher(self) -> HarmMatcher:
+        return self.rules.current().matcher
         
     def check_environmental_harm(self, 
                                 action: str,
@@ -34,41 +80,49 @@ class EarthProtection:
                                 resource_impact: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Check if action triggers environmental Sacred Zero"""
         
-        harm_indicators = {
-            "deforestation": ["logging", "clearing", "burning"],
-            "water_depletion": ["extraction", "diversion", "drainage"],
-            "pollution": ["discharge", "emission", "contamination"],
-            "habitat_destruction": ["mining", "construction", "development"],
-            "carbon_intensive": ["fossil", "combustion", "industrial"]
-        }
-        
-        triggered_harms = []
-        for harm_type, keywords in harm_indicators.items():
-            if any(keyword in action.lower() for keyword in keywords):
-                triggered_harms.append(harm_type)
+        rules = self.rules.current()
+        triggered_harms = rules.matcher.match(action)
         
         if not triggered_harms and not resource_impact:
             return {"triggered": False}
             
-        # Calculate irreversibility score
-        irreversibility = 0.0
-        if resource_impact:
-            if resource_impact.get("recovery_years", 0) > 50:
-                irreversibility = 0.8
-            elif resource_impact.get("recovery_years", 0) > 10:
-                irreversibility = 0.5
-            
-            if resource_impact.get("species_affected", 0) > 0:
-                irreversibility += 0.2
+        # Calculate irreversibility score from the rule set's decision table
+        irreversibility = rules.irreversibility(resource_impact) if resource_impact else 0.0
                 
         return {
-            "triggered": len(triggered_harms) > 0 or irreversibility > 0.3,
+            "triggered": len(triggered_harms) > 0 or irreversibility > rules.trigger_above,
             "harm_types": triggered_harms,
-            "irreversibility_score": min(irreversibility, 1.0),
+            "irreversibility_score": min(irreversibility, rules.max_score),
             "sacred_zero_trigger": "planetary_harm" if triggered_harms else None,
-            "eco_harm_rules_version": self.eco_harm_rules_version
+            "eco_harm_rules_version": rules.version
         }
     
+    def check_environmental_harm_batch(self,
+                                      actions: Optional[Sequence[str]] = None,
+                                      recovery_years: Optional[Sequence[float]] = None,
+                                      species_affected: Optional[Sequence[float]] = None,
+                                      records: Optional[Iterable[Dict[str, Any]]] = None,
+                                      impact_columns: Optional[Dict[str, Sequence[float]]] = None
+                                      ) -> HarmBatchResult:
+        """Score many actions at once from aligned columns
+
+        Columns may be NumPy arrays or sequences; impact_columns carries
+        columns for any other resource_impact field the rules score.
+        Alternatively pass records shaped like check_environmental_harm
+        arguments ({"action", "resource_impact"}), which are converted to
+        columns once. The whole batch is scored under one rule version.
+        """
+        rules = self.rules.current()
+        if records is not None:
+            actions, columns = harm_batch_columns(records, rules.fields)
+        else:
+            columns = dict(impact_columns or {})
+            if recovery_years is not None:
+                columns["recovery_years"] = recovery_years
+            if species_affected is not None:
+                columns["species_affected"] = species_affected
+        return score_harm_batch(rules, actions, columns)
+
     def check_community_directive(self,
                                 action: str,
                                 location: Dict[str, float],
@@ -76,19 +130,31 @@ class EarthProtection:
         """Check if action violates registered community directives"""
         
         if not community_id and location:
-            # Find communities at this location
-            community_id = self._find_community_by_location(location)
+            # Every community whose territory covers the location governs it;
+            # the first one with a violated protection determines the result
+            governing = self.find_communities_by_location(location)
+            if not governing:
+                return {"has_directive": False}
+            results = [self._check_community(action, cid) for cid in governing]
+            result = next((r for r in results if r["has_directive"]), results[0])
+            result["governing_communities"] = governing
+            return result
             
         if not community_id or community_id not in self.registered_communities:
             return {"has_directive": False}
             
+        return self._check_community(action, community_id)
+
+    def _check_community(self, action: str, community_id: str) -> Dict[str, Any]:
         community = self.registered_communities[community_id]
+        protections = community.get("protections", [])
+        digest = community.get("protections_digest") or _protections_digest(protections)
+        index = self._protection_index.get((community_id, digest))
+        if index is None:
+            index = self._index_protections(community_id, protections, digest)
         
-        # Check against community's protected areas and practices
-        violations = []
-        for protection in community.get("protections", []):
-            if self._violates_protection(action, protection):
-                violations.append(protection)
+        # Check against community's protected areas and practices in one pass
+        violations = [protections[position] for position in index.match(action)]
                 
         return {
             "has_directive": len(violations) > 0,
@@ -107,7 +173,9 @@ class EarthProtection:
                          connectivity: str = "online") -> Dict[str, Any]:
         """Register a community for Earth protection"""
         
-        community_id = self._generate_community_id(community_name)
+        geometry = parse_territory(territory)
+        registered = self.clock.now()
+        community_id = self._generate_community_id(community_name, registered)
         
         registration = {
             "id": community_id,
@@ -115,13 +183,18 @@ class EarthProtection:
             "territory": territory,
             "governance_protocol": governance_protocol.value,
             "protections": protections,
+            "protections_digest": _protections_digest(protections),
             "connectivity": connectivity,
-            "registered_at": datetime.utcnow().isoformat() + "Z",
+            "registered_at": format_hlc(registered),
             "stewardship_tokens": 100,  # Initial allocation
             "verification_status": "pending"
         }
         
-        self.registered_communities[community_id] = registration
+        with self._lock:
+            self.registered_communities[community_id] = registration
+            if geometry is not None:
+                self.territory_index.insert(community_id, geometry)
+            self._index_protections(community_id, protections, registration["protections_digest"])
         
         return {
             "success": True,
@@ -129,55 +202,154 @@ class EarthProtection:
             "message": f"Community {community_name} registered for Earth protection"
         }
     
+    def update_protections(self, community_id: str, protections: List[Dict[str, str]]) -> bool:
+        """Replace a community's protections and re-index only that community"""
+        with self._lock:
+            community = self.registered_communities.get(community_id)
+            if community is None:
+                return False
+            community["protections"] = protections
+            community["protections_digest"] = _protections_digest(protections)
+            self.registered_communities[community_id] = community
+            self._index_protections(community_id, protections, community["protections_digest"])
+        return True
+
+    def _index_protections(self, community_id: str, protections: List[Dict[str, str]],
+                           digest: str) -> HarmMatcher:
+        index = HarmMatcher({position: _protection_keywords(protection)
+                             for position, protection in enumerate(protections)})
+        self._protection_index.put((community_id, digest), index)
+        return index
+
+    def _stewardship_tokens(self, community_id: str) -> int:
+        return self.registered_communities[community_id].get("stewardship_tokens", 0)
+
+    def _add_stewardship_tokens(self, increments: Dict[str, int],
+                                award_id: Optional[str] = None) -> Dict[str, int]:
+        """Add token amounts to registrations, in one transaction where the registry supports it
+
+        A persistent registry applies each award_id once. In-memory
+        registrations do not outlive the ledger, which never repeats one.
+        """
+        communities = self.registered_communities
+        add = getattr(communities, "add_stewardship_tokens", None)
+        if add is not None:
+            return add(increments, award_id)
+        balances = {}
+        with self._lock:
+            for community_id, amount in increments.items():
+                community = communities[community_id]
+                community["stewardship_tokens"] = community.get("stewardship_tokens", 0) + amount
+                communities[community_id] = community
+                balances[community_id] = community["stewardship_tokens"]
+        return balances
+
+    def find_communities_by_location(self, location: Dict[str, float]) -> List[str]:
+        """All communities whose territory contains location, in registration order"""
+        point = point_from_location(location)
+        if point is None:
+            return []
+        return self.territory_index.query(*point)
+
     def _find_community_by_location(self, location: Dict[str, float]) -> Optional[str]:
-        """Find community that governs this location"""
-        # Simplified - would use proper GIS in production
-        for community_id, community in self.registered_communities.items():
-            # Check if location is within community territory
-            if self._point_in_territory(location, community["territory"]):
-                return community_id
-        return None
+        """Find the first registered community that governs this location"""
+        governing = self.find_communities_by_location(location)
+        return governing[0] if governing else None
     
     def _point_in_territory(self, point: Dict[str, float], territory: Dict[str, Any]) -> bool:
-        """Check if point is within territory (simplified)"""
-        # Would use proper GIS libraries in production
-        return True  # Placeholder
+        """Check if point is within territory (exact point-in-polygon)"""
+        coordinates = point_from_location(point)
+        geometry = parse_territory(territory)
+        return coordinates is not None and geometry is not None and geometry.contains(*coordinates)
     
     def _violates_protection(self, action: str, protection: Dict[str, str]) -> bool:
         """Check if action violates a specific protection"""
-        protected_keywords = protection.get("keywords", "").split(",")
-        return any(keyword.strip() in action.lower() for keyword in protected_keywords)
+        return any(keyword in action.lower() for keyword in _protection_keywords(protection))
     
-    def _generate_community_id(self, name: str) -> str:
-        """Generate unique community ID"""
-        timestamp = str(datetime.utcnow().timestamp())
+    def _generate_community_id(self, name: str, timestamp: int) -> str:
+        """Generate unique community ID from name and registration clock value"""
         return hashlib.sha256(f"{name}{timestamp}".encode()).hexdigest()[:16]
 
+def _protection_keywords(protection: Dict[str, str]) -> List[str]:
+    """Normalized keywords of a protection's comma-separated keyword list"""
+    return [keyword.strip().lower() for keyword in protection.get("keywords", "").split(",")]
+
+def _protections_digest(protections: List[Dict[str, str]]) -> str:
+    """Content digest of a protections list, stored with its registration"""
+    return canonical_digest(protections).hex()
+
+
+_default_earth: Optional[EarthProtection] = None
+_default_earth_lock = threading.Lock()
+
+
+def default_earth_protection() -> EarthProtection:
+    """Process-wide protection context shared by the decorator and helpers"""
+    global _default_earth
+    if _default_earth is None:
+        with _default_earth_lock:
+            if _default_earth is None:
+                _default_earth = EarthProtection()
+    return _default_earth
+
+
+def configure_earth_protection(earth: EarthProtection) -> EarthProtection:
+    """Install earth as the process-wide context and return the previous one"""
+    global _default_earth
+    with _default_earth_lock:
+        previous, _default_earth = _default_earth, earth
+    return previous
+
+
+def _directive_is_legitimate(earth: EarthProtection,
+                             directive: Dict[str, Any],
+                             community_id: str) -> bool:
+    """Validate that directive comes from legitimate community governance"""
+    
+    if community_id not in earth.registered_communities:
+        return False
+        
+    community = earth.registered_communities[community_id]
+    
+    # Check governance protocol was followed
+    if community["governance_protocol"] == GovernanceProtocol.CONSENSUS_COUNCIL.value:
+        # Would verify consensus signatures in production
+        return True
+    elif community["governance_protocol"] == GovernanceProtocol.FPIC_PROCESS.value:
+        # Would verify FPIC process documentation
+        return True
+        
+    return False
+
+
 class CommunityRegistry:
     """Manages community registrations and directives"""
     
-    def __init__(self):
-        self.earth_protection = EarthProtection()
+    def __init__(self,
+                 earth_protection: Optional[EarthProtection] = None,
+                 ledger: Optional[StewardshipLedger] = None):
+        self.earth_protection = earth_protection or default_earth_protection()
+        # Every registry of a context shares its ledger, whose balances are
+        # committed to the registrations themselves
+        if ledger is None:
+            ledger = self.earth_protection.stewardship_ledger
+        else:
+            if ledger.opening_balance is None:
+                ledger.opening_balance = self.earth_protection._stewardship_tokens
+            if ledger.add_balances is None:
+                ledger.add_balances = self.earth_protection._add_stewardship_tokens
+        self.ledger = ledger
+
+    @classmethod
+    def open(cls, path: str, **store_options) -> "CommunityRegistry":
+        """Registry persisted in the SQLite database at path"""
+        return cls(EarthProtection(registry=SQLiteCommunityStore(path, **store_options)))
         
     def validate_community_directive(self,
                                    directive: Dict[str, Any],
                                    community_id: str) -> bool:
         """Validate that directive comes from legitimate community governance"""
-        
-        if community_id not in self.earth_protection.registered_communities:
-            return False
-            
-        community = self.earth_protection.registered_communities[community_id]
-        
-        # Check governance protocol was followed
-        if community["governance_protocol"] == GovernanceProtocol.CONSENSUS_COUNCIL.value:
-            # Would verify consensus signatures in production
-            return True
-        elif community["governance_protocol"] == GovernanceProtocol.FPIC_PROCESS.value:
-            # Would verify FPIC process documentation
-            return True
-            
-        return False
+        return _directive_is_legitimate(self.earth_protection, directive, community_id)
     
     def award_stewardship_tokens(self, community_id: str, amount: int, reason: str):
         """Award stewardship tokens for verified ecological data"""
@@ -185,40 +357,76 @@ class CommunityRegistry:
         if community_id not in self.earth_protection.registered_communities:
             return False
             
-        community = self.earth_protection.registered_communities[community_id]
-        community["stewardship_tokens"] += amount
+        award = self.ledger.award(community_id, amount, reason)
         
         # Log the award
         return {
             "awarded": amount,
             "reason": reason,
-            "new_balance": community["stewardship_tokens"]
+            "new_balance": award.balance
         }
 
+    def award_stewardship_tokens_batch(self, awards: Iterable[Tuple[str, int, str]]) -> List[Any]:
+        """Apply many (community_id, amount, reason) awards as one ledger batch
+
+        Returns one result per award in award_stewardship_tokens format,
+        False for communities that are not registered.
+        """
+        awards = list(awards)
+        communities = self.earth_protection.registered_communities
+        registered = [award[0] in communities for award in awards]
+        applied = iter(self.ledger.award_batch(
+            [award for award, known in zip(awards, registered) if known]))
+        results = []
+        for known in registered:
+            if not known:
+                results.append(False)
+                continue
+            record = next(applied)
+            results.append({"awarded": record.amount, "reason": record.reason,
+                            "new_balance": record.balance})
+        return results
+
 # Decorator for Earth protection
-def with_earth_protection(check_location=True, check_community=True):
-    """Decorator to add Earth protection checks to any function"""
+def with_earth_protection(check_location=True, check_community=True,
+                          earth: Optional[EarthProtection] = None):
+    """Decorator to add Earth protection checks to any function
+
+    Checks run against earth, or the process-wide context when omitted, so
+    communities registered there are visible and compiled rules and indexes
+    are reused across calls. Coroutine functions get an async wrapper.
+    """
+    
+    def run_checks(args, kwargs):
+        context = earth or default_earth_protection()
+        
+        # Extract action description from args/kwargs
+        action = kwargs["action"] if "action" in kwargs else (str(args[0]) if args else "unknown")
+        location = kwargs.get("location", None)
+        
+        # Check environmental harm
+        env_check = context.check_environmental_harm(action, location)
+        if env_check["triggered"]:
+            # Log Sacred Zero for planetary harm
+            print(f"Sacred Zero triggered: {env_check['sacred_zero_trigger']}")
+            
+        # Check community directives if location provided
+        if check_community and location:
+            community_check = context.check_community_directive(action, location)
+            if community_check["has_directive"]:
+                print(f"Community directive triggered: {community_check['sacred_zero_trigger']}")
     
     def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                run_checks(args, kwargs)
+                return await func(*args, **kwargs)
+            return async_wrapper
+        
+        @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            earth = EarthProtection()
-            
-            # Extract action description from args/kwargs
-            action = kwargs.get("action", str(args[0]) if args else "unknown")
-            location = kwargs.get("location", None)
-            
-            # Check environmental harm
-            env_check = earth.check_environmental_harm(action, location)
-            if env_check["triggered"]:
-                # Log Sacred Zero for planetary harm
-                print(f"Sacred Zero triggered: {env_check['sacred_zero_trigger']}")
-                
-            # Check community directives if location provided
-            if check_community and location:
-                community_check = earth.check_community_directive(action, location)
-                if community_check["has_directive"]:
-                    print(f"Community directive triggered: {community_check['sacred_zero_trigger']}")
-                    
+            run_checks(args, kwargs)
             # Proceed with original function
             return func(*args, **kwargs)
             
@@ -228,11 +436,9 @@ def with_earth_protection(check_location=True, check_community=True):
 # Utility functions
 def check_environmental_harm(action: str, resource_impact: Optional[Dict] = None) -> Dict:
     """Quick check for environmental harm"""
-    earth = EarthProtection()
+    earth = default_earth_protection()
     return earth.check_environmental_harm(action, resource_impact=resource_impact)
 
 def validate_community_directive(directive: Dict, community_id: str) -> bool:
     """Validate community directive"""
-    registry = CommunityRegistry()
-    return registry.validate_community_directive(directive, community_id)
-
+    return _directive_is_legitimate(default_earth_protection(), directive, community_id)
@@ -0,0 +1,207 @@
+"""
+TML Ecological Event Ingestion
+Creator: Lev Goukassian (ORCID: 0009-0006-5966-1243)
+
+Streams NDJSON ecological events (schemas/earth/ecological_event.schema.json)
+from a file or socket through the compiled schema validator and routes the
+valid ones to EarthProtection in batches: one columnar harm check per batch
+under a single rule version, plus a community directive check for every
+event that carries coordinates.
+
+Each event becomes a harm-check record: its event type, location
+description, detection method and trigger reason form the action text, the
+severity timeline gives recovery_years and the listed species give
+species_affected. Invalid or oversized lines are reported to on_reject and
+skipped; they never stop the stream.
+"""
+
+import json
+import logging
+import re
+import socket
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .earth import EarthProtection, default_earth_protection
+from .harm_batch import HarmBatchResult
+from .schema_validator import SchemaValidator, earth_validators
+
+logger = logging.getLogger(__name__)
+
+_TIMELINE = re.compile(r"^([0-9]+)_(hours|days|months|years|decades|centuries)$")
+_YEARS_PER_UNIT = {
+    "hours": 1 / 8766,
+    "days": 1 / 365.25,
+    "months": 1 / 12,
+    "years": 1,
+    "decades": 10,
+    "centuries": 100,
+}
+
+# (line number, reason, raw line)
+RejectHandler = Callable[[int, str, bytes], None]
+
+
+def _log_reject(line_number: int, reason: str, line: bytes):
+    logger.warning("rejected ecological event on line %d: %s", line_number, reason)
+
+
+def event_harm_record(event: Dict[str, Any]) -> Dict[str, Any]:
+    """check_environmental_harm arguments ({"action", "resource_impact"}) for an event"""
+    location = event.get("location") or {}
+    detection = event.get("detection") or {}
+    response = event.get("response") or {}
+    action = " ".join(
+        part
+        for part in (
+            event.get("event_type", "").replace("_", " "),
+            location.get("description", ""),
+            detection.get("method", ""),
+            response.get("trigger_reason", ""),
+        )
+        if part
+    )
+
+    severity = event.get("severity") or {}
+    primary = (event.get("impact") or {}).get("primary_impact") or {}
+    impact: Dict[str, Any] = {
+        key: value
+        for key, value in primary.items()
+        if isinstance(value, (int, float)) and not isinstance(value, bool)
+    }
+    timeline = _TIMELINE.match(severity.get("timeline", ""))
+    if timeline:
+        impact["recovery_years"] = int(timeline.group(1)) * _YEARS_PER_UNIT[timeline.group(2)]
+    impact["species_affected"] = len(primary.get("species_affected") or ())
+    if "reversibility" in severity:
+        impact["reversibility"] = severity["reversibility"]
+    return {"action": action, "resource_impact": impact}
+
+
+class EventBatch:
+    """Valid events of one batch with their harm and directive results"""
+
+    __slots__ = ("events", "line_numbers", "harm", "directives")
+
+    def __init__(
+        self,
+        events: List[Dict[str, Any]],
+        line_numbers: List[int],
+        harm: HarmBatchResult,
+        directives: List[Dict[str, Any]],
+    ):
+        self.events = events
+        self.line_numbers = line_numbers
+        self.harm = harm
+        self.directives = directives
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def triggered(self) -> List[int]:
+        """Positions of events with a planetary harm or community directive trigger"""
+        return [
+            index
+            for index in range(len(self.events))
+            if self.harm.triggered[index] or self.directives[index]["has_directive"]
+        ]
+
+
+class EcologicalEventIngestor:
+    """Validates NDJSON ecological events and checks them in batches
+
+    The event validator is compiled once per process (see earth_validators)
+    and shared by every ingestor. Lines longer than max_line_bytes are
+    rejected without being buffered whole, so a broken sender cannot
+    exhaust memory.
+    """
+
+    def __init__(
+        self,
+        earth: Optional[EarthProtection] = None,
+        batch_size: int = 1024,
+        validator: Optional[SchemaValidator] = None,
+        on_reject: Optional[RejectHandler] = None,
+        max_line_bytes: int = 1 << 20,
+    ):
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive")
+        self.earth = earth or default_earth_protection()
+        self.batch_size = batch_size
+        self.validator = validator or earth_validators()["ecological_event"]
+        self.on_reject = on_reject or _log_reject
+        self.max_line_bytes = max_line_bytes
+        self.accepted = 0
+        self.rejected = 0
+
+    def ingest(self, lines: Iterable[Tuple[int, Optional[bytes]]]) -> Iterator[EventBatch]:
+        """Check numbered lines (None for an oversized line), batch by batch"""
+        events: List[Dict[str, Any]] = []
+        line_numbers: List[int] = []
+        for line_number, line in lines:
+            if line is None:
+                self._reject(line_number, f"line exceeds {self.max_line_bytes} bytes", b"")
+                continue
+            if not line.strip():
+                continue
+            try:
+                event = json.loads(line)
+            except ValueError as error:
+                self._reject(line_number, f"invalid JSON: {error}", line)
+                continue
+            error = self.validator.error(event)
+            if error is not None:
+                self._reject(line_number, error, line)
+                continue
+            events.append(event)
+            line_numbers.append(line_number)
+            if len(events) >= self.batch_size:
+                yield self._check(events, line_numbers)
+                events, line_numbers = [], []
+        if events:
+            yield self._check(events, line_numbers)
+
+    def ingest_stream(self, stream: BinaryIO) -> Iterator[EventBatch]:
+        return self.ingest(self._lines(stream))
+
+    def ingest_file(self, path: str) -> Iterator[EventBatch]:
+        with open(path, "rb") as stream:
+            yield from self.ingest_stream(stream)
+
+    def ingest_socket(self, connection: socket.socket) -> Iterator[EventBatch]:
+        """Ingest until the peer closes the connection"""
+        with connection.makefile("rb") as stream:
+            yield from self.ingest_stream(stream)
+
+    def _lines(self, stream: BinaryIO) -> Iterator[Tuple[int, Optional[bytes]]]:
+        limit = self.max_line_bytes
+        line_number = 0
+        while True:
+            line = stream.readline(limit + 1)
+            if not line:
+                return
+            line_number += 1
+            if len(line) > limit and not line.endswith(b"\n"):
+                # Drain the rest of the oversized line in bounded reads
+                while line and not line.endswith(b"\n"):
+                    line = stream.readline(limit + 1)
+                yield line_number, None
+                continue
+            yield line_number, line
+
+    def _reject(self, line_number: int, reason: str, line: bytes):
+        self.rejected += 1
+        self.on_reject(line_number, reason, line)
+
+    def _check(self, events: List[Dict[str, Any]], line_numbers: List[int]) -> EventBatch:
+        records = [event_harm_record(event) for event in events]
+        harm = self.earth.check_environmental_harm_batch(records=records)
+        directives = [
+            (
+                self.earth.check_community_directive(record["action"], event["location"])
+                if "coordinates" in event["location"]
+                else {"has_directive": False}
+            )
+            for event, record in zip(events, records)
+        ]
+        self.accepted += len(events)
+        return EventBatch(events, line_numbers, harm, directives)
@@ -0,0 +1,239 @@
+"""
+TML Eco-Harm Rule Engine
+Creator: Lev Goukassian (ORCID: 0009-0006-5966-1243)
+
+Loads the screening rules behind EarthProtection.check_environmental_harm
+(harm categories, keywords and irreversibility thresholds) from a versioned
+JSON or YAML file (policies/earth/ECO_HARM_SCREENING.yaml) and compiles them
+into a keyword matcher plus a threshold decision table.
+
+Compiled rule sets are cached per version. The engine watches its file
+(one stat per check_interval) and swaps the active rule set in a single
+attribute assignment, so running workers pick up a new version without a
+restart and never see a half-loaded one. A file that fails to load or
+validate leaves the active rule set in place.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .canonical import canonical_digest
+from .harm_matcher import HarmMatcher, compile_harm_matcher
+
+try:
+    import yaml  # a package dependency; needed for the shipped YAML policies
+except ImportError:  # pragma: no cover - JSON rule files still work
+    yaml = None
+
+logger = logging.getLogger(__name__)
+
+ECO_HARM_RULES_VERSION = "2025-09-21"
+
+# Harm category -> action keywords, matched as substrings of the lowercased action
+HARM_INDICATORS = {
+    "deforestation": ["logging", "clearing", "burning"],
+    "water_depletion": ["extraction", "diversion", "drainage"],
+    "pollution": ["discharge", "emission", "contamination"],
+    "habitat_destruction": ["mining", "construction", "development"],
+    "carbon_intensive": ["fossil", "combustion", "industrial"],
+}
+
+# Built-in rules, identical to the shipped screening file
+DEFAULT_ECO_HARM_RULES = {
+    "version": ECO_HARM_RULES_VERSION,
+    "harm_categories": HARM_INDICATORS,
+    "irreversibility": {
+        "trigger_above": 0.3,
+        "max_score": 1.0,
+        "factors": {
+            "recovery_years": [{"above": 50, "score": 0.8}, {"above": 10, "score": 0.5}],
+            "species_affected": [{"above": 0, "score": 0.2}],
+        },
+    },
+}
+
+# (resource_impact field, ((threshold, score), ...) in evaluation order)
+Factor = Tuple[str, Tuple[Tuple[float, float], ...]]
+
+
+class RuleSetError(ValueError):
+    """Raised for a rule file that does not describe a valid rule set"""
+
+
+class EcoHarmRuleSet:
+    """Compiled, immutable rule set of one version"""
+
+    __slots__ = ("version", "matcher", "factors", "trigger_above", "max_score")
+
+    def __init__(
+        self,
+        version: str,
+        matcher: HarmMatcher,
+        factors: Tuple[Factor, ...],
+        trigger_above: float,
+        max_score: float,
+    ):
+        self.version = version
+        self.matcher = matcher
+        self.factors = factors
+        self.trigger_above = trigger_above
+        self.max_score = max_score
+
+    @property
+    def fields(self) -> List[str]:
+        return [field for field, _ in self.factors]
+
+    def irreversibility(self, resource_impact: Dict[str, Any]) -> float:
+        """Uncapped irreversibility score of a resource impact"""
+        score = 0.0
+        for field, bands in self.factors:
+            value = resource_impact.get(field, 0)
+            for threshold, band_score in bands:
+                if value > threshold:
+                    score += band_score
+                    break
+        return score
+
+    def __repr__(self) -> str:
+        return (
+            f"EcoHarmRuleSet(version={self.version!r}, categories={len(self.matcher.categories)})"
+        )
+
+
+def _compile(data: Dict[str, Any]) -> EcoHarmRuleSet:
+    try:
+        version = str(data["version"])
+        categories = data["harm_categories"]
+        irreversibility = data.get("irreversibility", {})
+        if not isinstance(categories, dict) or not all(
+            isinstance(keywords, list) and all(isinstance(k, str) for k in keywords)
+            for keywords in categories.values()
+        ):
+            raise RuleSetError("harm_categories must map categories to keyword lists")
+        factors = tuple(
+            (field, tuple((float(band["above"]), float(band["score"])) for band in bands))
+            for field, bands in irreversibility.get("factors", {}).items()
+        )
+        trigger_above = float(irreversibility.get("trigger_above", 0.3))
+        max_score = float(irreversibility.get("max_score", 1.0))
+    except (KeyError, TypeError, AttributeError, ValueError) as error:
+        if isinstance(error, RuleSetError):
+            raise
+        raise RuleSetError(f"invalid eco-harm rules: {error!r}") from error
+    matcher = compile_harm_matcher(version, categories)
+    return EcoHarmRuleSet(version, matcher, factors, trigger_above, max_score)
+
+
+_compiled: Dict[str, Tuple[bytes, EcoHarmRuleSet]] = {}
+_compiled_lock = threading.Lock()
+
+
+def compile_rule_set(data: Dict[str, Any]) -> EcoHarmRuleSet:
+    """Rule set for data, compiled once per version and content"""
+    digest = canonical_digest(data)
+    version = str(data.get("version"))
+    cached = _compiled.get(version)
+    if cached is not None and cached[0] == digest:
+        return cached[1]
+    rule_set = _compile(data)
+    with _compiled_lock:
+        cached = _compiled.get(version)
+        if cached is not None and cached[0] == digest:
+            return cached[1]
+        _compiled[version] = (digest, rule_set)
+    return rule_set
+
+
+def compiled_rule_set(version: str) -> Optional[EcoHarmRuleSet]:
+    """Previously compiled rule set of a version, if still cached"""
+    cached = _compiled.get(version)
+    return cached[1] if cached is not None else None
+
+
+def load_rule_file(path: str) -> Dict[str, Any]:
+    """Rule data from a JSON or YAML file"""
+    with open(path, encoding="utf-8") as handle:
+        if path.endswith((".yaml", ".yml")):
+            if yaml is None:
+                raise RuleSetError(
+                    "PyYAML is required to load YAML rule files (pip install pyyaml)"
+                )
+            documents = [doc for doc in yaml.safe_load_all(handle) if doc is not None]
+            data = documents[0] if documents else None
+        else:
+            data = json.load(handle)
+    if not isinstance(data, dict):
+        raise RuleSetError(f"{path} does not contain a rule mapping")
+    return data
+
+
+class EcoHarmRuleEngine:
+    """Holds the active rule set and hot-reloads it from a rule file
+
+    Without a path the engine serves the built-in rules. check_interval is
+    the minimum number of seconds between file checks made by current();
+    None disables automatic checks (call reload() explicitly).
+    """
+
+    def __init__(self, path: Optional[str] = None, check_interval: Optional[float] = 1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._next_check = 0.0
+        self._rules = compile_rule_set(DEFAULT_ECO_HARM_RULES)
+        if path is not None:
+            self.reload()
+
+    def current(self) -> EcoHarmRuleSet:
+        """Active rule set, after a file check if one is due"""
+        if self.path is not None and self.check_interval is not None:
+            now = time.monotonic()
+            if now >= self._next_check:
+                self._next_check = now + self.check_interval
+                self._check_file()
+        return self._rules
+
+    @property
+    def version(self) -> str:
+        return self._rules.version
+
+    def _file_stamp(self) -> Tuple[int, int]:
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _check_file(self):
+        try:
+            changed = self._file_stamp() != self._stamp
+        except OSError as error:
+            logger.warning("eco-harm rule file %s unavailable: %s", self.path, error)
+            return
+        if changed:
+            try:
+                self.reload()
+            except (OSError, ValueError) as error:
+                logger.warning("keeping eco-harm rules %s: %s", self._rules.version, error)
+
+    def reload(self) -> EcoHarmRuleSet:
+        """Load the rule file now and activate it; raises if it is invalid"""
+        with self._lock:
+            stamp = self._file_stamp()
+            rule_set = compile_rule_set(load_rule_file(self.path))
+            self._stamp = stamp
+            if rule_set is not self._rules:
+                logger.info("activating eco-harm rules %s", rule_set.version)
+            self._rules = rule_set
+        return rule_set
+
+    def activate(self, version: str) -> EcoHarmRuleSet:
+        """Switch to a previously compiled version, e.g. to roll back"""
+        rule_set = compiled_rule_set(version)
+        if rule_set is None:
+            raise KeyError(f"eco-harm rules {version} were never compiled")
+        with self._lock:
+            self._rules = rule_set
+        return rule_set
@@ -0,0 +1,152 @@
+"""
+TML Batch Environmental Harm Scoring
+Creator: Lev Goukassian (ORCID: 0009-0006-5966-1243)
+
+Columnar version of EarthProtection.check_environmental_harm for scoring
+large numbers of candidate actions. Resource impacts arrive as aligned
+columns, one per resource_impact field the rule set scores (NumPy arrays or
+sequences), and the rule set's irreversibility bands are applied to whole
+columns with array operations. Harm categories come back as one bitmask per action; repeated
+action texts are matched once per batch.
+
+NumPy is used when installed; otherwise the same rules run as list
+comprehensions and the result holds plain lists.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .eco_rules import EcoHarmRuleSet
+from .harm_matcher import HarmMatcher
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised when numpy is absent
+    np = None
+
+
+def harm_batch_columns(
+    records: Iterable[Dict[str, Any]],
+    fields: Sequence[str] = ("recovery_years", "species_affected"),
+) -> Tuple[List[str], Dict[str, List[float]]]:
+    """Convert {"action", "resource_impact"} records into columns, once
+
+    Returns the action column and one column per resource_impact field.
+    Missing impacts count as zero, exactly as in check_environmental_harm.
+    """
+    actions: List[str] = []
+    columns: Dict[str, List[float]] = {field: [] for field in fields}
+    for record in records:
+        impact = record.get("resource_impact") or {}
+        actions.append(record.get("action", ""))
+        for field, column in columns.items():
+            column.append(impact.get(field, 0) or 0)
+    return actions, columns
+
+
+class HarmBatchResult:
+    """Column-per-field result of a batch harm check"""
+
+    __slots__ = (
+        "triggered",
+        "irreversibility_score",
+        "harm_mask",
+        "categories",
+        "eco_harm_rules_version",
+    )
+
+    def __init__(
+        self,
+        triggered,
+        irreversibility_score,
+        harm_mask,
+        categories: List[str],
+        eco_harm_rules_version: str,
+    ):
+        self.triggered = triggered
+        self.irreversibility_score = irreversibility_score
+        self.harm_mask = harm_mask
+        self.categories = categories
+        self.eco_harm_rules_version = eco_harm_rules_version
+
+    def __len__(self) -> int:
+        return len(self.harm_mask)
+
+    def harm_types(self, index: int) -> List[str]:
+        mask = int(self.harm_mask[index])
+        return [category for bit, category in enumerate(self.categories) if mask >> bit & 1]
+
+    def record(self, index: int) -> Dict[str, Any]:
+        """Result for one action in the check_environmental_harm format
+
+        Untriggered actions without harm keywords or irreversibility are
+        reported as {"triggered": False}.
+        """
+        harm_types = self.harm_types(index)
+        score = float(self.irreversibility_score[index])
+        if not harm_types and not score:
+            return {"triggered": False}
+        return {
+            "triggered": bool(self.triggered[index]),
+            "harm_types": harm_types,
+            "irreversibility_score": score,
+            "sacred_zero_trigger": "planetary_harm" if harm_types else None,
+            "eco_harm_rules_version": self.eco_harm_rules_version,
+        }
+
+
+def _harm_masks(matcher: HarmMatcher, actions: Sequence[str]) -> List[int]:
+    seen: Dict[str, int] = {}
+    masks = []
+    for action in actions:
+        mask = seen.get(action)
+        if mask is None:
+            mask = seen[action] = matcher.mask(action)
+        masks.append(mask)
+    return masks
+
+
+def score_harm_batch(
+    rules: EcoHarmRuleSet,
+    actions: Optional[Sequence[str]],
+    columns: Optional[Dict[str, Sequence[float]]] = None,
+) -> HarmBatchResult:
+    """Score aligned columns under one rule set
+
+    columns maps resource_impact fields to value columns; fields the rules
+    score but columns lacks (or actions, if None) are treated as zeros.
+    """
+    columns = columns or {}
+    lengths = {len(column) for column in columns.values()}
+    if actions is not None:
+        lengths.add(len(actions))
+    if len(lengths) > 1:
+        raise ValueError("batch columns must have the same length")
+    size = lengths.pop() if lengths else 0
+    matcher = rules.matcher
+    masks = _harm_masks(matcher, actions) if actions is not None else [0] * size
+    factors = [(columns[field], bands) for field, bands in rules.factors if field in columns]
+
+    if np is not None:
+        total = np.zeros(size)
+        for column, bands in factors:
+            values = np.asarray(column, dtype=float)
+            # np.select takes the first band exceeded, like the scalar rules
+            total += np.select(
+                [values > threshold for threshold, _ in bands], [score for _, score in bands], 0.0
+            )
+        # More than 63 categories do not fit a machine word
+        mask_array = np.array(masks, dtype=np.int64 if len(matcher.categories) < 64 else object)
+        triggered = (mask_array != 0) | (total > rules.trigger_above)
+        score = np.minimum(total, rules.max_score)
+        return HarmBatchResult(triggered, score, mask_array, matcher.categories, rules.version)
+
+    total = [0.0] * size
+    for column, bands in factors:
+        for index, value in enumerate(column):
+            for threshold, band_score in bands:
+                if value > threshold:
+                    total[index] += band_score
+                    break
+    triggered = [mask != 0 or value > rules.trigger_above for mask, value in zip(masks, total)]
+    score = [min(value, rules.max_score) for value in total]
+    return HarmBatchResult(triggered, score, masks, matcher.categories, rules.version)
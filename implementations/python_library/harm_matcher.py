@@ -0,0 +1,127 @@
+"""
+TML Harm Vocabulary Matcher
+Creator: Lev Goukassian (ORCID: 0009-0006-5966-1243)
+
+Compiles a harm vocabulary (category -> keywords) once into a single
+matcher that reports every matched category in one pass over the text,
+with the same substring semantics as `keyword in text.lower()`.
+
+The keywords are folded into a trie and emitted as one regular expression
+evaluated as a lookahead at every position, so the scan runs inside the
+regex engine in O(len(text) x trie depth) regardless of vocabulary size.
+At each position the trie path yields the longest keyword starting there;
+shorter keywords hidden inside it are accounted for by giving every keyword
+the categories of all keywords it contains. Small vocabularies are cheaper
+to scan keyword by keyword with the C substring search, so below
+DIRECT_SCAN_MAX_KEYWORDS the compiled matcher does that instead.
+"""
+
+import re
+import threading
+from typing import Dict, Hashable, Iterable, List, Tuple
+
+_END = ""
+
+# Up to this many distinct keywords, one str.find per keyword beats the trie scan
+DIRECT_SCAN_MAX_KEYWORDS = 32
+
+
+def _trie_pattern(node: Dict[str, dict]) -> str:
+    """Regex for a trie node; terminal nodes make their continuation optional"""
+    branches = [
+        re.escape(char) + _trie_pattern(child)
+        for char, child in sorted(node.items())
+        if char != _END
+    ]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if _END in node:
+        # Greedy optional: the longest keyword on this path wins
+        return "(?:" + body + ")?"
+    return body
+
+
+class HarmMatcher:
+    """Compiled single-pass matcher from keywords to harm categories"""
+
+    def __init__(self, vocabulary: Dict[Hashable, Iterable[str]]):
+        self.categories: List[Hashable] = list(vocabulary)
+        self.full_mask = (1 << len(self.categories)) - 1
+        own: Dict[str, int] = {}
+        always = 0
+        for bit, category in enumerate(self.categories):
+            for keyword in vocabulary[category]:
+                if keyword:
+                    own[keyword] = own.get(keyword, 0) | (1 << bit)
+                else:
+                    # "" is a substring of every text
+                    always |= 1 << bit
+        self.always_mask = always
+        self._pattern = None
+        self._keywords: List[Tuple[str, int]] = []
+        self._masks: Dict[str, int] = {}
+        if len(own) <= DIRECT_SCAN_MAX_KEYWORDS:
+            self._keywords = list(own.items())
+            return
+
+        trie: Dict[str, dict] = {}
+        for keyword in own:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[_END] = {}
+        self._pattern = re.compile("(?=(" + _trie_pattern(trie) + "))", re.DOTALL)
+
+        # Close masks under containment, shortest keywords first
+        for keyword in sorted(own, key=len):
+            mask = own[keyword]
+            for end in range(1, len(keyword)):
+                mask |= self._masks.get(keyword[:end], 0)
+            for match in self._pattern.finditer(keyword, 1):
+                mask |= self._masks[match.group(1)]
+            self._masks[keyword] = mask
+
+    def mask(self, text: str) -> int:
+        """Bitmask of matched categories, bit i for self.categories[i]"""
+        mask = self.always_mask
+        if mask == self.full_mask:
+            return mask
+        text = text.lower()
+        if self._pattern is None:
+            for keyword, bits in self._keywords:
+                if bits & ~mask and keyword in text:
+                    mask |= bits
+            return mask
+        masks = self._masks
+        for match in self._pattern.finditer(text):
+            mask |= masks[match.group(1)]
+            if mask == self.full_mask:
+                break
+        return mask
+
+    def categories_for(self, mask: int) -> List[Hashable]:
+        return [category for bit, category in enumerate(self.categories) if mask >> bit & 1]
+
+    def match(self, text: str) -> List[Hashable]:
+        """Matched categories in vocabulary order"""
+        return self.categories_for(self.mask(text))
+
+
+_compiled: Dict[str, Tuple[Dict[str, Tuple[str, ...]], HarmMatcher]] = {}
+_compiled_lock = threading.Lock()
+
+
+def compile_harm_matcher(version: str, vocabulary: Dict[str, Iterable[str]]) -> HarmMatcher:
+    """Matcher for a rules version, compiled on first use and shared afterwards"""
+    frozen = {category: tuple(keywords) for category, keywords in vocabulary.items()}
+    cached = _compiled.get(version)
+    if cached is not None and cached[0] == frozen:
+        return cached[1]
+    matcher = HarmMatcher(frozen)
+    with _compiled_lock:
+        cached = _compiled.get(version)
+        if cached is not None and cached[0] == frozen:
+            return cached[1]
+        _compiled[version] = (frozen, matcher)
+    return matcher
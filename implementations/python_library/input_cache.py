@@ -0,0 +1,161 @@
+"""
+TML Input Fingerprint Cache
+Creator: Lev Goukassian (ORCID: 0009-0006-5966-1243)
+
+Bounded LRU cache from argument objects to their canonical digests, so a
+shared system prompt or policy document passed to a decorated function is
+hashed once instead of on every call.
+
+An entry is keyed by the identity of the argument and validated by a cheap
+structural fingerprint: the identities of every object reachable from it.
+Strings, bytes and numbers are immutable, so replacing or mutating anything
+inside a cached dict, list or tuple changes the fingerprint and forces a
+re-hash. The cache keeps the fingerprinted objects alive, which rules out
+stale hits through id() reuse. Mutable buffers and arbitrary objects are
+never cached.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from .canonical import canonical_digest, object_state
+
+_IMMUTABLE_LEAVES = (str, bytes, int, float, bool, type(None))
+
+
+class _CacheEntry:
+    __slots__ = ("root", "nodes", "digest", "weight")
+
+    def __init__(self, root: Any, nodes: List[Any], digest: bytes, weight: int):
+        self.root = root
+        self.nodes = nodes
+        self.digest = digest
+        self.weight = weight
+
+
+class InputHashCache:
+    """Size-aware LRU cache of canonical input digests
+
+    max_entries bounds the number of cached arguments and max_weight the
+    total number of characters/bytes they hold. Arguments smaller than
+    min_size, or with more than max_nodes nested objects, are hashed
+    directly because fingerprinting them would not pay off.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_weight: int = 256 * 1024 * 1024,
+        min_size: int = 1024,
+        max_nodes: int = 4096,
+        default: Optional[Callable[[Any], Any]] = object_state,
+    ):
+        self.max_entries = max_entries
+        self.max_weight = max_weight
+        self.min_size = min_size
+        self.max_nodes = max_nodes
+        self.default = default
+        self._entries: "OrderedDict[int, _CacheEntry]" = OrderedDict()
+        self._weight = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _fingerprint(self, root: Any):
+        """Return (nodes, weight) for a cacheable object, else None"""
+        nodes = []
+        weight = 0
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            nodes.append(node)
+            if len(nodes) > self.max_nodes:
+                return None
+            if isinstance(node, (str, bytes)):
+                weight += len(node)
+            elif isinstance(node, _IMMUTABLE_LEAVES):
+                continue
+            elif isinstance(node, dict):
+                for key, value in node.items():
+                    stack.append(key)
+                    stack.append(value)
+            elif isinstance(node, (list, tuple)):
+                stack.extend(node)
+            else:
+                return None
+        return nodes, weight
+
+    def digest(self, data: Any) -> bytes:
+        """Canonical digest of data, served from the cache when unchanged"""
+        key = id(data)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry.root is data:
+            fingerprint = self._fingerprint(data)
+            if fingerprint is not None and _same_nodes(fingerprint[0], entry.nodes):
+                with self._lock:
+                    if key in self._entries:
+                        self._entries.move_to_end(key)
+                    self.hits += 1
+                return entry.digest
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+                    self._weight -= entry.weight
+                self.invalidations += 1
+        else:
+            fingerprint = self._fingerprint(data)
+
+        digest = canonical_digest(data, self.default)
+        with self._lock:
+            self.misses += 1
+            if fingerprint is not None:
+                nodes, weight = fingerprint
+                if self.min_size <= weight <= self.max_weight:
+                    self._store(key, _CacheEntry(data, nodes, digest, weight))
+        return digest
+
+    def _store(self, key: int, entry: _CacheEntry):
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._weight -= previous.weight
+        self._entries[key] = entry
+        self._weight += entry.weight
+        while len(self._entries) > self.max_entries or self._weight > self.max_weight:
+            _, evicted = self._entries.popitem(last=False)
+            self._weight -= evicted.weight
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._weight = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss statistics for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "weight": self._weight,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def _same_nodes(current: List[Any], cached: List[Any]) -> bool:
+    if len(current) != len(cached):
+        return False
+    for now, before in zip(current, cached):
+        if now is not before:
+            return False
+    return True
@@ -0,0 +1,47 @@
+"""
+TML Bounded LRU Map
+Creator: Lev Goukassian (ORCID: 0009-0006-5966-1243)
+
+Small thread-safe least-recently-used map shared by the read-through
+caches of the community registry and the territory tile index.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any
+
+
+class LRUCache:
+    """Thread-safe LRU map; None values are not cacheable"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._items: "OrderedDict[Any, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Any:
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key: Any, value: Any):
+        if self.capacity < 1:
+            return
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+
+    def pop(self, key: Any):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
@@ -0,0 +1,251 @@
+"""
+TML Merkle Batch Sealer
+Creator: Lev Goukassian (ORCID: 0009-0006-5966-1243)
+
+Collects Always Memory entries into batches by count or time window and
+seals each batch under a Merkle root, so only one root per batch has to be
+persisted and anchored. Tree levels are kept for recent batches to serve
+O(log n) inclusion proofs.
+
+Hashing follows RFC 6962: leaves are sha256(0x00 || entry digest), inner
+nodes sha256(0x01 || left || right). An unpaired last node is promoted to
+the next level unchanged.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from .canonical import canonical_digest
+from .clock import HybridLogicalClock, default_clock, format_hlc
+from .core import MemoryEntry
+
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+# One proof step: (sibling hash, True when the sibling is on the left)
+ProofStep = Tuple[bytes, bool]
+
+
+def leaf_hash(entry_digest: bytes) -> bytes:
+    return hashlib.sha256(LEAF_PREFIX + entry_digest).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+def entry_digest(entry: Union[MemoryEntry, Dict[str, Any], bytes]) -> bytes:
+    """Digest committed to by a leaf: a MemoryEntry, an entry dict or a raw digest"""
+    if isinstance(entry, MemoryEntry):
+        return entry.digest()
+    if isinstance(entry, (bytes, bytearray)):
+        if len(entry) != 32:
+            raise ValueError("raw leaf digests must be 32 bytes")
+        return bytes(entry)
+    return canonical_digest(entry)
+
+
+class MerkleTree:
+    """All levels of a Merkle tree over a list of entry digests"""
+
+    __slots__ = ("levels",)
+
+    def __init__(self, digests: List[bytes]):
+        if not digests:
+            raise ValueError("cannot build a Merkle tree without leaves")
+        level = [leaf_hash(digest) for digest in digests]
+        levels = [level]
+        while len(level) > 1:
+            parents = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+            if len(level) % 2:
+                parents.append(level[-1])
+            levels.append(parents)
+            level = parents
+        self.levels = levels
+
+    @property
+    def root(self) -> bytes:
+        return self.levels[-1][0]
+
+    @property
+    def leaf_count(self) -> int:
+        return len(self.levels[0])
+
+    def proof(self, index: int) -> List[ProofStep]:
+        """Inclusion proof for the leaf at index"""
+        if not 0 <= index < self.leaf_count:
+            raise IndexError(index)
+        steps = []
+        for level in self.levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(level):
+                steps.append((level[sibling], sibling < index))
+            index //= 2
+        return steps
+
+    @staticmethod
+    def verify(entry_digest: bytes, proof: List[ProofStep], root: bytes) -> bool:
+        """Check that entry_digest is included under root"""
+        current = leaf_hash(entry_digest)
+        for sibling, sibling_is_left in proof:
+            current = (
+                node_hash(sibling, current) if sibling_is_left else node_hash(current, sibling)
+            )
+        return current == root
+
+
+class SealedBatch:
+    """Record of a sealed batch: the only thing that needs anchoring"""
+
+    __slots__ = ("batch_id", "root", "leaf_count", "first_timestamp", "last_timestamp", "sealed_at")
+
+    def __init__(
+        self,
+        batch_id: int,
+        root: bytes,
+        leaf_count: int,
+        first_timestamp: int,
+        last_timestamp: int,
+        sealed_at: int,
+    ):
+        self.batch_id = batch_id
+        self.root = root
+        self.leaf_count = leaf_count
+        self.first_timestamp = first_timestamp
+        self.last_timestamp = last_timestamp
+        self.sealed_at = sealed_at
+
+    @property
+    def merkle_root(self) -> str:
+        return "0x" + self.root.hex()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "batch_id": self.batch_id,
+            "merkle_root": self.merkle_root,
+            "leaf_count": self.leaf_count,
+            "time_range": {
+                "start": format_hlc(self.first_timestamp),
+                "end": format_hlc(self.last_timestamp),
+            },
+            "sealed_at": format_hlc(self.sealed_at),
+        }
+
+    def __repr__(self) -> str:
+        return (
+            f"SealedBatch(batch_id={self.batch_id}, "
+            f"merkle_root={self.merkle_root[:10]}..., leaf_count={self.leaf_count})"
+        )
+
+
+class MerkleSealer:
+    """Collects entries and seals them into Merkle batches
+
+    A batch is sealed once it holds max_leaves entries, or when add() or
+    poll() observes that its oldest entry is older than max_age seconds.
+    on_seal, if given, receives every SealedBatch (e.g. to anchor it).
+    Trees of the last retain_batches batches are kept for proofs.
+    """
+
+    def __init__(
+        self,
+        max_leaves: int = 100,
+        max_age: float = 0.25,
+        on_seal: Optional[Callable[[SealedBatch], None]] = None,
+        retain_batches: int = 1024,
+        clock: Optional[HybridLogicalClock] = None,
+    ):
+        if max_leaves < 1:
+            raise ValueError("max_leaves must be positive")
+        self.max_leaves = max_leaves
+        self.max_age = max_age
+        self.on_seal = on_seal
+        self.retain_batches = retain_batches
+        self.clock = clock or default_clock()
+        self._lock = threading.Lock()
+        self._pending: List[bytes] = []
+        self._first_timestamp = 0
+        self._last_timestamp = 0
+        self._opened_at = 0.0
+        self._next_batch_id = 0
+        self._trees: "OrderedDict[int, MerkleTree]" = OrderedDict()
+        self._batches: "OrderedDict[int, SealedBatch]" = OrderedDict()
+
+    def add(self, entry: Union[MemoryEntry, Dict[str, Any], bytes]) -> Tuple[int, int]:
+        """Add an entry; returns (batch_id, leaf index) for later proofs"""
+        digest = entry_digest(entry)
+        stamp = entry.timestamp if isinstance(entry, MemoryEntry) else self.clock.now()
+        sealed = []
+        with self._lock:
+            if self._pending and time.monotonic() - self._opened_at >= self.max_age:
+                sealed.append(self._seal_locked())
+            if not self._pending:
+                self._opened_at = time.monotonic()
+                self._first_timestamp = self._last_timestamp = stamp
+            elif stamp < self._first_timestamp:
+                self._first_timestamp = stamp
+            elif stamp > self._last_timestamp:
+                self._last_timestamp = stamp
+            location = (self._next_batch_id, len(self._pending))
+            self._pending.append(digest)
+            if len(self._pending) >= self.max_leaves:
+                sealed.append(self._seal_locked())
+        self._emit(sealed)
+        return location
+
+    def poll(self) -> Optional[SealedBatch]:
+        """Seal the open batch if its time window has elapsed"""
+        with self._lock:
+            if not self._pending or time.monotonic() - self._opened_at < self.max_age:
+                return None
+            batch = self._seal_locked()
+        self._emit([batch])
+        return batch
+
+    def flush(self) -> Optional[SealedBatch]:
+        """Seal the open batch regardless of its size or age"""
+        with self._lock:
+            if not self._pending:
+                return None
+            batch = self._seal_locked()
+        self._emit([batch])
+        return batch
+
+    def _seal_locked(self) -> SealedBatch:
+        tree = MerkleTree(self._pending)
+        batch = SealedBatch(
+            self._next_batch_id,
+            tree.root,
+            tree.leaf_count,
+            self._first_timestamp,
+            self._last_timestamp,
+            self.clock.now(),
+        )
+        self._trees[batch.batch_id] = tree
+        self._batches[batch.batch_id] = batch
+        while len(self._trees) > self.retain_batches:
+            evicted, _ = self._trees.popitem(last=False)
+            self._batches.pop(evicted, None)
+        self._next_batch_id += 1
+        self._pending = []
+        return batch
+
+    def _emit(self, batches: List[SealedBatch]):
+        if self.on_seal is not None:
+            for batch in batches:
+                self.on_seal(batch)
+
+    def batch(self, batch_id: int) -> SealedBatch:
+        with self._lock:
+            return self._batches[batch_id]
+
+    def proof(self, batch_id: int, index: int) -> List[ProofStep]:
+        """Inclusion proof for leaf index of a retained sealed batch"""
+        with self._lock:
+            tree = self._trees.get(batch_id)
+        if tree is None:
+            raise KeyError(f"batch {batch_id} is not sealed or no longer retained")
+        return tree.proof(index)
@@ -0,0 +1,719 @@
+"""
+TML Chain RPC Providers
+Creator: Lev Goukassian (ORCID: 0009-0006-5966-1243)
+
+JSON-RPC clients for the anchoring chains. JSONRPCClient keeps a pool of
+keep-alive HTTP(S) connections per endpoint, so an anchor costs one request
+on an open connection instead of a TCP + TLS handshake per call, and batch()
+sends many calls as one JSON-RPC batch request.
+
+LocalChain is an in-process stand-in with the same send()/request()/batch()
+interface: a block every block_time seconds of chain time, EIP-1559 style
+base fees and deterministic transaction and block hashes, so the whole
+anchoring path can run and be load-tested without an RPC endpoint.
+web3_provider() adapts either one for web3.py, which is imported only then.
+"""
+
+import abc
+import base64
+import hashlib
+import http.client
+import itertools
+import json
+import ssl
+import threading
+import time
+import urllib.parse
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+# (method, params) of one JSON-RPC call
+RPCCall = Tuple[str, Sequence[Any]]
+
+# The Sacred Zero contract's anchor(bytes32 root, uint256 leafCount) call and
+# its Anchored(address indexed company, bytes32 root, uint256 leafCount)
+# event. Both are Keccak-256 values (not in hashlib), precomputed from the
+# signatures.
+ANCHOR_FUNCTION_SELECTOR = "0x8f5bae2e"  # anchor(bytes32,uint256)
+ANCHOR_EVENT_TOPIC = (  # Anchored(address,bytes32,uint256)
+    "0x1d1327335aacd87689a1ef329445a912ce77b21a52483865e0b20678e2c0a624"
+)
+
+# Calls that must not be resent after a dropped connection: the node may
+# already have accepted the transaction
+NON_IDEMPOTENT_METHODS = frozenset(
+    {"eth_sendTransaction", "eth_sendRawTransaction", "personal_sendTransaction"}
+)
+
+_ids = itertools.count(1)
+
+
+class RPCError(Exception):
+    """JSON-RPC error response (code None for transport-level failures)"""
+
+    def __init__(self, message: str, code: Optional[int] = None, data: Any = None):
+        super().__init__(message if code is None else f"{message} (code {code})")
+        self.message = message
+        self.code = code
+        self.data = data
+
+
+def _call(method: str, params: Sequence[Any]) -> Dict[str, Any]:
+    return {"jsonrpc": "2.0", "id": next(_ids), "method": method, "params": list(params)}
+
+
+def _result(response: Dict[str, Any]) -> Any:
+    error = response.get("error")
+    if error is not None:
+        raise RPCError(error.get("message", ""), error.get("code"), error.get("data"))
+    return response.get("result")
+
+
+class _JSONRPC(abc.ABC):
+    """request() and batch() on top of a send() of raw JSON-RPC payloads"""
+
+    max_batch = 100
+
+    @abc.abstractmethod
+    def send(self, payload: Union[Dict[str, Any], List[Dict[str, Any]]]) -> Any:
+        """Response(s) to one JSON-RPC request or batch"""
+
+    def request(self, method: str, params: Sequence[Any] = ()) -> Any:
+        return _result(self.send(_call(method, params)))
+
+    def batch(self, calls: Iterable[RPCCall]) -> List[Any]:
+        """Results of calls in order; raises RPCError for the first failed call"""
+        calls = list(calls)
+        results = []
+        for start in range(0, len(calls), self.max_batch):
+            payload = [
+                _call(method, params) for method, params in calls[start : start + self.max_batch]
+            ]
+            responses = self.send(payload)
+            if not isinstance(responses, list):
+                # The whole batch was rejected
+                _result(responses)
+                raise RPCError("malformed JSON-RPC batch response")
+            by_id = {response.get("id"): response for response in responses}
+            for call in payload:
+                if call["id"] not in by_id:
+                    raise RPCError(f"no response to batched {call['method']}")
+                results.append(_result(by_id[call["id"]]))
+        return results
+
+    def close(self):
+        pass
+
+
+class RPCConnectionPool:
+    """Keep-alive HTTP(S) connections to one endpoint
+
+    At most size requests are in flight. Idle connections are reused most
+    recently used first. When a reused connection (closed by the server
+    while idle) fails before the request was sent, the request is retried
+    once on a new connection; a failure after sending is retried only for
+    idempotent requests, since the server may already have processed it.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        size: int = 8,
+        timeout: float = 10.0,
+        headers: Optional[Dict[str, str]] = None,
+    ):
+        parts = urllib.parse.urlsplit(endpoint)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"not an HTTP(S) RPC endpoint: {endpoint!r}")
+        if size < 1:
+            raise ValueError("size must be positive")
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self._host, self._port = parts.hostname, parts.port
+        self._context = ssl.create_default_context() if parts.scheme == "https" else None
+        self._path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        self._headers = {"Content-Type": "application/json", "Accept": "application/json"}
+        if parts.username:
+            credentials = (
+                f"{urllib.parse.unquote(parts.username)}:"
+                f"{urllib.parse.unquote(parts.password or '')}"
+            )
+            self._headers["Authorization"] = (
+                "Basic " + base64.b64encode(credentials.encode()).decode()
+            )
+        self._headers.update(headers or {})
+        self._idle: List[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+        self._closed = False
+        self.connections_opened = 0
+        self.requests = 0
+
+    def _connect(self) -> http.client.HTTPConnection:
+        with self._lock:
+            self.connections_opened += 1
+        if self._context is not None:
+            return http.client.HTTPSConnection(
+                self._host, self._port, timeout=self.timeout, context=self._context
+            )
+        return http.client.HTTPConnection(self._host, self._port, timeout=self.timeout)
+
+    def _exchange(
+        self, connection: http.client.HTTPConnection, body: bytes, reused: bool, idempotent: bool
+    ):
+        """Send body and read the response, reconnecting once where that is safe"""
+        try:
+            connection.request("POST", self._path, body, self._headers)
+        except ConnectionError:
+            # Not sent in full, so the server cannot have acted on it
+            if not reused:
+                raise
+            connection.close()
+            connection = self._connect()
+            connection.request("POST", self._path, body, self._headers)
+            reused = False
+        try:
+            response = connection.getresponse()
+            return connection, response, response.read()
+        except ConnectionError:
+            if not (reused and idempotent):
+                raise
+            connection.close()
+            connection = self._connect()
+            connection.request("POST", self._path, body, self._headers)
+            response = connection.getresponse()
+            return connection, response, response.read()
+
+    def post(self, body: bytes, idempotent: bool = False) -> bytes:
+        """POST body and return the response body
+
+        idempotent=True allows resending body when a reused connection
+        drops before the response arrives.
+        """
+        if not self._slots.acquire(timeout=self.timeout):
+            raise RPCError(f"no free connection to {self.endpoint} within {self.timeout}s")
+        try:
+            with self._lock:
+                self.requests += 1
+                connection = self._idle.pop() if self._idle else None
+            reused = connection is not None
+            if connection is None:
+                connection = self._connect()
+            try:
+                connection, response, payload = self._exchange(connection, body, reused, idempotent)
+            except Exception:
+                connection.close()
+                raise
+            with self._lock:
+                if response.will_close or self._closed:
+                    connection.close()
+                else:
+                    self._idle.append(connection)
+        finally:
+            self._slots.release()
+        if response.status != 200:
+            raise RPCError(f"HTTP {response.status} {response.reason} from {self.endpoint}")
+        return payload
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+
+class JSONRPCClient(_JSONRPC):
+    """JSON-RPC over a pool of keep-alive connections to one endpoint
+
+    batch() sends up to max_batch calls per HTTP request.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        pool_size: int = 8,
+        timeout: float = 10.0,
+        max_batch: int = 100,
+        headers: Optional[Dict[str, str]] = None,
+    ):
+        self.endpoint = endpoint
+        self.max_batch = max_batch
+        self.pool = RPCConnectionPool(endpoint, pool_size, timeout, headers)
+
+    def send(self, payload: Union[Dict[str, Any], List[Dict[str, Any]]]) -> Any:
+        body = json.dumps(payload, separators=(",", ":")).encode()
+        calls = payload if isinstance(payload, list) else [payload]
+        idempotent = not any(call.get("method") in NON_IDEMPOTENT_METHODS for call in calls)
+        return json.loads(self.pool.post(body, idempotent))
+
+    def close(self):
+        self.pool.close()
+
+    def __repr__(self) -> str:
+        return f"JSONRPCClient({self.endpoint!r})"
+
+
+def _hex(value: int) -> str:
+    return hex(value)
+
+
+def _word(address: str) -> str:
+    """An address left-padded to a 32-byte log topic"""
+    return "0x" + address[2:].rjust(64, "0")
+
+
+def encode_anchor_call(root: str, leaf_count: int = 1) -> str:
+    """Calldata of anchor(root, leaf_count): a Merkle root over leaf_count log hashes"""
+    root = root[2:] if root.startswith("0x") else root
+    if len(root) != 64:
+        raise ValueError("anchor roots must be 32-byte hashes")
+    return ANCHOR_FUNCTION_SELECTOR + root + format(leaf_count, "064x")
+
+
+def decode_anchor_event(data: str) -> Tuple[str, int]:
+    """(root, leaf_count) from Anchored event data; a bare 32-byte hash counts once"""
+    data = data[2:] if data.startswith("0x") else data
+    leaf_count = int(data[64:128], 16) if len(data) >= 128 else 1
+    return "0x" + data[:64], leaf_count
+
+
+def _event_data(calldata: bytes) -> bytes:
+    """Event data LocalChain logs for calldata: the ABI arguments, without a selector"""
+    return calldata[4:] if len(calldata) % 32 == 4 else calldata
+
+
+def _calldata_gas(data: bytes) -> int:
+    zeros = data.count(0)
+    return 4 * zeros + 16 * (len(data) - zeros)
+
+
+class _Block:
+    __slots__ = (
+        "number",
+        "hash",
+        "parent_hash",
+        "timestamp",
+        "base_fee",
+        "gas_used",
+        "transactions",
+        "logs",
+    )
+
+    def __init__(self, number: int, parent_hash: str, timestamp: int, base_fee: int):
+        self.number = number
+        self.parent_hash = parent_hash
+        self.timestamp = timestamp
+        self.base_fee = base_fee
+        self.gas_used = 0
+        self.transactions: List[str] = []
+        self.logs: List[Dict[str, Any]] = []
+        self.hash = ""
+
+
+class LocalChain(_JSONRPC):
+    """Deterministic in-process chain answering the JSON-RPC calls TML uses
+
+    Block n is produced once chain time reaches n * block_time and has
+    timestamp genesis_timestamp + n * block_time. Chain time follows clock
+    (seconds, default time.monotonic) from creation plus whatever advance()
+    added; with clock=None it only moves through advance(). Pending
+    transactions go into the next block up to gas_limit; the base fee moves
+    by up to 1/8 per block towards half-full blocks, as in EIP-1559.
+
+    Every transaction with calldata and a recipient emits one log from the
+    recipient with topics [ANCHOR_EVENT_TOPIC, sender] and the call's
+    arguments (the calldata without its function selector) as data, as the
+    Sacred Zero contract does for anchor(). reorg() forks the newest blocks off for reorg handling tests.
+    rpc_latency (seconds) is slept once per send(), so a batch costs
+    one round trip like it does over HTTP.
+    """
+
+    max_batch = 1 << 30
+
+    def __init__(
+        self,
+        chain_id: int = 1337,
+        block_time: float = 2.0,
+        base_fee: int = 1_000_000_000,
+        priority_fee: int = 1_000_000_000,
+        gas_limit: int = 30_000_000,
+        genesis_timestamp: int = 1_700_000_000,
+        clock: Optional[Callable[[], float]] = time.monotonic,
+        rpc_latency: float = 0.0,
+        max_log_blocks: Optional[int] = None,
+        accounts: int = 1,
+    ):
+        if block_time <= 0:
+            raise ValueError("block_time must be positive")
+        self.chain_id = chain_id
+        self.block_time = block_time
+        self.priority_fee = priority_fee
+        self.gas_limit = gas_limit
+        self.genesis_timestamp = genesis_timestamp
+        self.rpc_latency = rpc_latency
+        self.max_log_blocks = max_log_blocks
+        self.accounts = [
+            "0x" + hashlib.sha256(f"tml-local-{chain_id}-{index}".encode()).hexdigest()[:40]
+            for index in range(accounts)
+        ]
+        self.requests = 0
+        self._clock = clock
+        self._started = clock() if clock is not None else 0.0
+        self._offset = 0.0
+        self._fork = 0
+        self._lock = threading.Lock()
+        self._blocks: List[_Block] = []
+        self._pending: List[str] = []
+        self._transactions: Dict[str, Dict[str, Any]] = {}
+        self._receipts: Dict[str, Dict[str, Any]] = {}
+        self._nonces: Dict[str, int] = {}
+        genesis = _Block(0, "0x" + "00" * 32, genesis_timestamp, base_fee)
+        self._seal(genesis)
+        self._blocks.append(genesis)
+
+    # -- chain time and block production ------------------------------
+
+    def _now(self) -> float:
+        elapsed = self._clock() - self._started if self._clock is not None else 0.0
+        return elapsed + self._offset
+
+    def _seal(self, block: _Block):
+        block.hash = (
+            "0x"
+            + hashlib.sha256(
+                f"{self.chain_id}:{self._fork}:{block.number}:{block.parent_hash}:"
+                f"{block.timestamp}:{','.join(block.transactions)}".encode()
+            ).hexdigest()
+        )
+        for log in block.logs:
+            log["blockHash"] = block.hash
+        for tx_hash in block.transactions:
+            self._transactions[tx_hash]["blockHash"] = block.hash
+            self._receipts[tx_hash]["blockHash"] = block.hash
+
+    def _next_base_fee(self, parent: _Block) -> int:
+        target = self.gas_limit // 2
+        return max(
+            parent.base_fee + parent.base_fee * (parent.gas_used - target) // (target * 8), 7
+        )
+
+    def _mine(self):
+        parent = self._blocks[-1]
+        number = parent.number + 1
+        block = _Block(
+            number,
+            parent.hash,
+            self.genesis_timestamp + int(number * self.block_time),
+            self._next_base_fee(parent),
+        )
+        included = 0
+        for tx_hash in self._pending:
+            tx = self._transactions[tx_hash]
+            if block.gas_used + tx["_gas"] > self.gas_limit:
+                break
+            self._include(block, tx)
+            included += 1
+        del self._pending[:included]
+        self._seal(block)
+        self._blocks.append(block)
+
+    def _include(self, block: _Block, tx: Dict[str, Any]):
+        index = len(block.transactions)
+        block.gas_used += tx["_gas"]
+        tx.update(
+            blockNumber=_hex(block.number),
+            transactionIndex=_hex(index),
+            gasPrice=_hex(block.base_fee + self.priority_fee),
+        )
+        logs = []
+        if tx["to"] is not None and tx["input"] != "0x":
+            log = {
+                "address": tx["to"],
+                "topics": [ANCHOR_EVENT_TOPIC, _word(tx["from"])],
+                "data": "0x" + _event_data(bytes.fromhex(tx["input"][2:])).hex(),
+                "blockNumber": _hex(block.number),
+                "blockHash": None,
+                "transactionHash": tx["hash"],
+                "transactionIndex": _hex(index),
+                "logIndex": _hex(len(block.logs)),
+                "removed": False,
+            }
+            block.logs.append(log)
+            logs.append(log)
+        self._receipts[tx["hash"]] = {
+            "transactionHash": tx["hash"],
+            "transactionIndex": _hex(index),
+            "blockNumber": _hex(block.number),
+            "blockHash": None,
+            "from": tx["from"],
+            "to": tx["to"],
+            "contractAddress": None,
+            "gasUsed": _hex(tx["_gas"]),
+            "cumulativeGasUsed": _hex(block.gas_used),
+            "effectiveGasPrice": _hex(block.base_fee + self.priority_fee),
+            "status": "0x1",
+            "logs": logs,
+            "type": "0x2",
+        }
+        block.transactions.append(tx["hash"])
+
+    def _sync(self):
+        height = int(self._now() // self.block_time)
+        while self._blocks[-1].number < height:
+            self._mine()
+
+    def advance(self, seconds: float):
+        """Move chain time forward, producing every block that falls due"""
+        with self._lock:
+            self._offset += seconds
+            self._sync()
+
+    def reorg(self, depth: int, drop_transactions: bool = False):
+        """Replace the newest depth blocks with a fork of the same height
+
+        Their transactions are mined again into the fork (with new block
+        hashes) or, with drop_transactions=True, dropped.
+        """
+        with self._lock:
+            self._sync()
+            depth = min(depth, len(self._blocks) - 1)
+            orphaned = self._blocks[len(self._blocks) - depth :]
+            del self._blocks[len(self._blocks) - depth :]
+            replayed = [tx_hash for block in orphaned for tx_hash in block.transactions]
+            for tx_hash in replayed:
+                self._receipts.pop(tx_hash, None)
+                if drop_transactions:
+                    del self._transactions[tx_hash]
+                else:
+                    self._transactions[tx_hash].update(
+                        blockNumber=None, blockHash=None, transactionIndex=None
+                    )
+            if not drop_transactions:
+                self._pending[:0] = replayed
+            self._fork += 1
+            self._sync()
+
+    @property
+    def block_number(self) -> int:
+        with self._lock:
+            self._sync()
+            return self._blocks[-1].number
+
+    # -- JSON-RPC -----------------------------------------------------
+
+    def send(self, payload: Union[Dict[str, Any], List[Dict[str, Any]]]) -> Any:
+        if self.rpc_latency:
+            time.sleep(self.rpc_latency)
+        with self._lock:
+            self.requests += 1
+            self._sync()
+            if isinstance(payload, list):
+                return [self._dispatch(call) for call in payload]
+            return self._dispatch(payload)
+
+    def _dispatch(self, call: Dict[str, Any]) -> Dict[str, Any]:
+        response: Dict[str, Any] = {"jsonrpc": "2.0", "id": call.get("id")}
+        handler = getattr(self, "_rpc_" + str(call.get("method")), None)
+        if handler is None:
+            response["error"] = {
+                "code": -32601,
+                "message": f"method not found: {call.get('method')}",
+            }
+            return response
+        try:
+            response["result"] = handler(*call.get("params", ()))
+        except RPCError as error:
+            response["error"] = {"code": error.code, "message": error.message}
+        except (TypeError, ValueError, KeyError) as error:
+            response["error"] = {"code": -32602, "message": f"invalid params: {error}"}
+        return response
+
+    def _block(self, tag: Union[str, int]) -> Optional[_Block]:
+        if tag in ("latest", "pending", "safe", "finalized"):
+            return self._blocks[-1]
+        if tag == "earliest":
+            return self._blocks[0]
+        number = int(tag, 16) if isinstance(tag, str) else int(tag)
+        return self._blocks[number] if 0 <= number < len(self._blocks) else None
+
+    def _rpc_web3_clientVersion(self) -> str:
+        return "TML-LocalChain/1.0"
+
+    def _rpc_net_version(self) -> str:
+        return str(self.chain_id)
+
+    def _rpc_eth_chainId(self) -> str:
+        return _hex(self.chain_id)
+
+    def _rpc_eth_accounts(self) -> List[str]:
+        return list(self.accounts)
+
+    def _rpc_eth_blockNumber(self) -> str:
+        return _hex(self._blocks[-1].number)
+
+    def _rpc_eth_gasPrice(self) -> str:
+        return _hex(self._next_base_fee(self._blocks[-1]) + self.priority_fee)
+
+    def _rpc_eth_maxPriorityFeePerGas(self) -> str:
+        return _hex(self.priority_fee)
+
+    def _rpc_eth_getTransactionCount(self, address: str, tag: str = "latest") -> str:
+        return _hex(self._nonces.get(address.lower(), 0))
+
+    def _gas(self, to: Optional[str], data: bytes) -> int:
+        gas = 21_000 + _calldata_gas(data)
+        if to is not None and data:
+            # LOG2 with the call arguments as log data
+            gas += 375 + 2 * 375 + 8 * len(_event_data(data))
+        return gas
+
+    def _rpc_eth_estimateGas(self, tx: Dict[str, Any], tag: str = "latest") -> str:
+        data = bytes.fromhex((tx.get("data") or tx.get("input") or "0x")[2:])
+        return _hex(self._gas(tx.get("to"), data))
+
+    def _rpc_eth_sendTransaction(self, tx: Dict[str, Any]) -> str:
+        sender = (tx.get("from") or self.accounts[0]).lower()
+        to = tx["to"].lower() if tx.get("to") else None
+        data = tx.get("data") or tx.get("input") or "0x"
+        raw = bytes.fromhex(data[2:] if data.startswith("0x") else data)
+        data = "0x" + raw.hex()
+        nonce = self._nonces.get(sender, 0)
+        gas = self._gas(to, raw)
+        if gas > self.gas_limit:
+            raise RPCError("exceeds block gas limit", -32000)
+        tx_hash = (
+            "0x"
+            + hashlib.sha256(
+                f"{self.chain_id}:{sender}:{nonce}:{to}:{data}:{tx.get('value', '0x0')}".encode()
+            ).hexdigest()
+        )
+        self._nonces[sender] = nonce + 1
+        self._transactions[tx_hash] = {
+            "hash": tx_hash,
+            "from": sender,
+            "to": to,
+            "input": data,
+            "nonce": _hex(nonce),
+            "value": tx.get("value", "0x0"),
+            "gas": _hex(gas),
+            "chainId": _hex(self.chain_id),
+            "blockNumber": None,
+            "blockHash": None,
+            "transactionIndex": None,
+            "_gas": gas,
+        }
+        self._pending.append(tx_hash)
+        return tx_hash
+
+    def _rpc_eth_getTransactionByHash(self, tx_hash: str) -> Optional[Dict[str, Any]]:
+        tx = self._transactions.get(tx_hash.lower())
+        return None if tx is None else {key: value for key, value in tx.items() if key != "_gas"}
+
+    def _rpc_eth_getTransactionReceipt(self, tx_hash: str) -> Optional[Dict[str, Any]]:
+        receipt = self._receipts.get(tx_hash.lower())
+        if receipt is None:
+            return None
+        return dict(receipt, logs=[dict(log) for log in receipt["logs"]])
+
+    def _rpc_eth_getBlockByNumber(
+        self, tag: Union[str, int], full: bool = False
+    ) -> Optional[Dict[str, Any]]:
+        block = self._block(tag)
+        if block is None:
+            return None
+        transactions = (
+            [self._rpc_eth_getTransactionByHash(tx_hash) for tx_hash in block.transactions]
+            if full
+            else list(block.transactions)
+        )
+        return {
+            "number": _hex(block.number),
+            "hash": block.hash,
+            "parentHash": block.parent_hash,
+            "timestamp": _hex(block.timestamp),
+            "baseFeePerGas": _hex(block.base_fee),
+            "gasUsed": _hex(block.gas_used),
+            "gasLimit": _hex(self.gas_limit),
+            "transactions": transactions,
+        }
+
+    def _rpc_eth_getLogs(self, query: Dict[str, Any]) -> List[Dict[str, Any]]:
+        first = self._block(query.get("fromBlock", "latest"))
+        last = self._block(query.get("toBlock", "latest"))
+        if first is None or last is None or first.number > last.number:
+            return []
+        if self.max_log_blocks is not None and last.number - first.number + 1 > self.max_log_blocks:
+            raise RPCError(f"block range exceeds {self.max_log_blocks} blocks", -32005)
+        addresses = query.get("address")
+        if isinstance(addresses, str):
+            addresses = [addresses]
+        addresses = {address.lower() for address in addresses} if addresses else None
+        topics = [
+            ([topic] if isinstance(topic, str) else topic) for topic in query.get("topics") or ()
+        ]
+        logs = []
+        for block in self._blocks[first.number : last.number + 1]:
+            for log in block.logs:
+                if addresses is not None and log["address"] not in addresses:
+                    continue
+                if len(topics) > len(log["topics"]) or any(
+                    wanted and log["topics"][position] not in wanted
+                    for position, wanted in enumerate(topics)
+                ):
+                    continue
+                logs.append(dict(log))
+        return logs
+
+    def __repr__(self) -> str:
+        return f"LocalChain(chain_id={self.chain_id}, block_time={self.block_time})"
+
+
+_local_chains: Dict[str, LocalChain] = {}
+_local_chains_lock = threading.Lock()
+
+
+def local_chain(name: str, **options) -> LocalChain:
+    """The process-wide LocalChain called name, created with options on first use"""
+    with _local_chains_lock:
+        chain = _local_chains.get(name)
+        if chain is None:
+            chain = _local_chains[name] = LocalChain(**options)
+        return chain
+
+
+def rpc_client(
+    endpoint: Union[str, _JSONRPC], pool_size: int = 8, timeout: float = 10.0, max_batch: int = 100
+) -> _JSONRPC:
+    """Pooled client for an RPC URL
+
+    A client or LocalChain is returned as is, and local://<name> selects
+    the process-wide LocalChain of that name.
+    """
+    if isinstance(endpoint, _JSONRPC):
+        return endpoint
+    if endpoint.startswith("local://"):
+        return local_chain(endpoint[len("local://") :])
+    return JSONRPCClient(endpoint, pool_size=pool_size, timeout=timeout, max_batch=max_batch)
+
+
+def web3_provider(client: _JSONRPC):
+    """web3.py provider sending through a JSONRPCClient or LocalChain"""
+    from web3.providers import BaseProvider
+
+    class PooledProvider(BaseProvider):
+        def make_request(self, method, params):
+            return client.send(_call(method, params))
+
+        def is_connected(self, show_traceback: bool = False) -> bool:
+            try:
+                client.request("web3_clientVersion")
+            except Exception:
+                if show_traceback:
+                    raise
+                return False
+            return True
+
+        # web3.py v5 name
+        isConnected = is_connected
+
+    return PooledProvider()
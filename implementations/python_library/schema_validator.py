@@ -0,0 +1,488 @@
+"""
+TML Compiled Schema Validation
+Creator: Lev Goukassian (ORCID: 0009-0006-5966-1243)
+
+Generates a Python validation function from each JSON Schema under
+schemas/earth and compiles it once, so validating a record runs inlined
+isinstance / comparison / set-membership tests instead of walking the
+schema document. Patterns are compiled up front, enums become frozenset
+lookups and error messages are only built for invalid records.
+
+Covers the draft-07 subset the TML schemas use: type, enum, const,
+properties, required, additionalProperties, items, min/maxItems, numeric
+and string bounds, pattern, format (date, date-time), allOf, anyOf, oneOf
+and not. Any other validation keyword raises SchemaError at compile time
+rather than being silently ignored.
+"""
+
+import datetime
+import json
+import os
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+# A compiled check: None if the value is valid, else "<path>: <reason>"
+Check = Callable[[Any], Optional[str]]
+
+EARTH_SCHEMA_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "schemas", "earth"
+)
+
+_ANNOTATIONS = {
+    "$schema",
+    "$id",
+    "$comment",
+    "title",
+    "description",
+    "default",
+    "examples",
+    "readOnly",
+    "writeOnly",
+}
+
+_KEYWORDS = {
+    "type",
+    "enum",
+    "const",
+    "minimum",
+    "maximum",
+    "exclusiveMinimum",
+    "exclusiveMaximum",
+    "minLength",
+    "maxLength",
+    "minItems",
+    "maxItems",
+    "pattern",
+    "format",
+    "required",
+    "properties",
+    "additionalProperties",
+    "items",
+    "allOf",
+    "anyOf",
+    "oneOf",
+    "not",
+}
+
+# Type tests as source templates; {v} is the checked variable
+_TYPE_TESTS = {
+    "object": "isinstance({v}, dict)",
+    "array": "isinstance({v}, list)",
+    "string": "isinstance({v}, str)",
+    "number": "(isinstance({v}, (int, float)) and not isinstance({v}, bool))",
+    "integer": "(isinstance({v}, int) and not isinstance({v}, bool)"
+    " or isinstance({v}, float) and {v}.is_integer())",
+    "boolean": "isinstance({v}, bool)",
+    "null": "{v} is None",
+}
+
+_NUMERIC_TYPES = ("number", "integer")
+
+_BOUNDS = (
+    ("minimum", "<", "is less than minimum"),
+    ("maximum", ">", "is greater than maximum"),
+    ("exclusiveMinimum", "<=", "is not greater than"),
+    ("exclusiveMaximum", ">=", "is not less than"),
+)
+
+_LENGTHS = (
+    ("minLength", "string", "<", "at least", "characters"),
+    ("maxLength", "string", ">", "at most", "characters"),
+    ("minItems", "array", "<", "at least", "items"),
+    ("maxItems", "array", ">", "at most", "items"),
+)
+
+# Nested blocks per generated function before a subschema gets its own
+# function; CPython rejects more than 20 statically nested blocks
+_MAX_BLOCK_DEPTH = 12
+
+# Matched with fullmatch (a "$" would accept a trailing newline); ASCII
+# digits only
+_DATE = re.compile(r"(\d{4})-(\d{2})-(\d{2})", re.ASCII)
+_DATE_TIME = re.compile(
+    r"(\d{4})-(\d{2})-(\d{2})[Tt](\d{2}):(\d{2}):(\d{2})(?:\.\d+)?(?:[Zz]|[+-]\d{2}:\d{2})",
+    re.ASCII,
+)
+
+
+class SchemaError(ValueError):
+    """Raised for a schema this compiler cannot enforce"""
+
+
+def _is_date(match) -> bool:
+    try:
+        datetime.date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+    except ValueError:
+        return False
+    return True
+
+
+def _date(value: str) -> bool:
+    match = _DATE.fullmatch(value)
+    return match is not None and _is_date(match)
+
+
+def _date_time(value: str) -> bool:
+    match = _DATE_TIME.fullmatch(value)
+    return (
+        match is not None
+        and _is_date(match)
+        and int(match.group(4)) < 24
+        and int(match.group(5)) < 60
+        and int(match.group(6)) < 61
+    )
+
+
+# Unknown formats are annotations in draft-07 and are not asserted
+_FORMATS = {"date": _date, "date-time": _date_time}
+
+
+def _json_key(value: Any) -> Any:
+    """Hashable identity under JSON equality (true is not 1)"""
+    return (isinstance(value, bool), value)
+
+
+def _in_members(value: Any, members: frozenset) -> bool:
+    try:
+        return _json_key(value) in members
+    except TypeError:
+        return False
+
+
+def _in_member_list(value: Any, members: list) -> bool:
+    return any(
+        value == member and isinstance(value, bool) == isinstance(member, bool)
+        for member in members
+    )
+
+
+def _indent(lines: List[str]) -> List[str]:
+    return ["    " + line for line in lines]
+
+
+class _Generator:
+    """Emits one module of validation functions for a schema"""
+
+    def __init__(self):
+        self.namespace: Dict[str, Any] = {
+            "_MISSING": object(),
+            "_in_members": _in_members,
+            "_in_member_list": _in_member_list,
+        }
+        self.functions: List[str] = []
+        self._counter = 0
+
+    def _name(self, prefix: str) -> str:
+        self._counter += 1
+        return f"{prefix}{self._counter}"
+
+    def constant(self, value: Any) -> str:
+        name = self._name("_c")
+        self.namespace[name] = value
+        return name
+
+    def function(self, schema: Any) -> str:
+        """Generate a function validating schema; returns its name"""
+        name = self._name("_validate")
+        body = self.node(schema, "value", [], 1)
+        self.functions.append("\n".join([f"def {name}(value):"] + _indent(body + ["return None"])))
+        return name
+
+    @staticmethod
+    def error(path: List[str], *message: str) -> str:
+        """return statement building "<path>: <message>" from source expressions"""
+        return "return " + " + ".join(path + [repr(":")] + list(message))
+
+    def node(self, schema: Any, v: str, path: List[str], depth: int) -> List[str]:
+        """Statements returning an error for an invalid v (path: source expressions)"""
+        if schema is True or schema == {}:
+            return []
+        if schema is False:
+            return [self.error(path, repr(" no value is allowed here"))]
+        if not isinstance(schema, dict):
+            raise SchemaError(f"schema must be an object or boolean, not {schema!r}")
+        unsupported = set(schema) - _ANNOTATIONS - _KEYWORDS
+        if unsupported:
+            raise SchemaError(f"unsupported schema keywords: {sorted(unsupported)}")
+        if depth > _MAX_BLOCK_DEPTH:
+            # Too deep to inline: validate in a fresh function and prefix its errors
+            function, error = self.function(schema), self._name("error")
+            return [
+                f"{error} = {function}({v})",
+                f"if {error} is not None:",
+                "    return " + " + ".join(path + [error]),
+            ]
+
+        lines: List[str] = []
+        known = None
+        if "type" in schema:
+            names = schema["type"] if isinstance(schema["type"], list) else [schema["type"]]
+            unknown = [name for name in names if name not in _TYPE_TESTS]
+            if unknown:
+                raise SchemaError(f"unknown type {unknown[0]!r}")
+            test = " or ".join(_TYPE_TESTS[name].format(v=v) for name in names)
+            lines += [
+                f"if not ({test}):",
+                "    " + self.error(path, repr(" expected " + " or ".join(names))),
+            ]
+            if len(names) == 1:
+                known = names[0]
+
+        def guard(type_name: str) -> str:
+            return (
+                ""
+                if known == type_name or (type_name == "number" and known in _NUMERIC_TYPES)
+                else _TYPE_TESTS[type_name].format(v=v) + " and "
+            )
+
+        if "enum" in schema:
+            lines += self.members(
+                v, path, list(schema["enum"]), known, "is not one of the allowed values"
+            )
+        if "const" in schema:
+            lines += self.members(v, path, [schema["const"]], known, f"is not {schema['const']!r}")
+
+        for keyword, operator, reason in _BOUNDS:
+            if keyword in schema:
+                limit = schema[keyword]
+                lines += [
+                    f"if {guard('number')}{v} {operator} {limit!r}:",
+                    "    "
+                    + self.error(path, repr(" "), f"repr({v})", repr(f" {reason} {limit!r}")),
+                ]
+        for keyword, type_name, operator, bound, unit in _LENGTHS:
+            if keyword in schema:
+                limit = schema[keyword]
+                lines += [
+                    f"if {guard(type_name)}len({v}) {operator} {limit!r}:",
+                    "    " + self.error(path, repr(f" must have {bound} {limit} {unit}")),
+                ]
+        if "pattern" in schema:
+            search = self.constant(re.compile(schema["pattern"]).search)
+            lines += [
+                f"if {guard('string')}not {search}({v}):",
+                "    "
+                + self.error(
+                    path, repr(" "), f"repr({v})", repr(f" does not match {schema['pattern']}")
+                ),
+            ]
+        if schema.get("format") in _FORMATS:
+            is_valid = self.constant(_FORMATS[schema["format"]])
+            lines += [
+                f"if {guard('string')}not {is_valid}({v}):",
+                "    "
+                + self.error(
+                    path, repr(" "), f"repr({v})", repr(f" is not a valid {schema['format']}")
+                ),
+            ]
+
+        # Object and array keywords only apply to values of that type
+        for type_name, body in (
+            ("object", self.object_node(schema, v, path, depth + 1)),
+            ("array", self.array_node(schema, v, path, depth + 1)),
+        ):
+            if body:
+                lines += (
+                    body
+                    if known == type_name
+                    else [f"if {_TYPE_TESTS[type_name].format(v=v)}:"] + _indent(body)
+                )
+
+        lines += self.combinators(schema, v, path)
+        return lines
+
+    def members(
+        self, v: str, path: List[str], values: List[Any], known: Optional[str], reason: str
+    ) -> List[str]:
+        message = [repr(" "), f"repr({v})", repr(" " + reason)]
+        if known == "string" and all(isinstance(value, str) for value in values):
+            members = self.constant(frozenset(values))
+            test = f"{v} not in {members}"
+        else:
+            try:
+                members = self.constant(frozenset(_json_key(value) for value in values))
+                test = f"not _in_members({v}, {members})"
+            except TypeError:
+                # Object or array members: compare one by one
+                members = self.constant(values)
+                test = f"not _in_member_list({v}, {members})"
+        return [f"if {test}:", "    " + self.error(path, *message)]
+
+    def object_node(self, schema: Dict[str, Any], v: str, path: List[str], depth: int) -> List[str]:
+        lines = []
+        for name in schema.get("required", ()):
+            lines += [
+                f"if {name!r} not in {v}:",
+                "    " + self.error(path, repr(f" missing required property {name!r}")),
+            ]
+        properties = schema.get("properties", {})
+        for name, subschema in properties.items():
+            child = self._name("v")
+            body = self.node(subschema, child, path + [repr("/" + name)], depth + 1)
+            if body:
+                lines += [
+                    f"{child} = {v}.get({name!r}, _MISSING)",
+                    f"if {child} is not _MISSING:",
+                ] + _indent(body)
+        additional = schema.get("additionalProperties", True)
+        if additional is False:
+            known = self.constant(frozenset(properties))
+            lines += [
+                f"if not {known}.issuperset({v}):",
+                "    "
+                + self.error(
+                    path, repr(" unexpected properties "), f"repr(sorted(set({v}) - {known}))"
+                ),
+            ]
+        elif additional is not True and additional != {}:
+            known = self.constant(frozenset(properties))
+            key, child = self._name("k"), self._name("v")
+            body = self.node(additional, child, path + [repr("/"), key], depth + 2)
+            lines += [
+                f"for {key}, {child} in {v}.items():",
+                f"    if {key} not in {known}:",
+            ] + _indent(_indent(body))
+        return lines
+
+    def array_node(self, schema: Dict[str, Any], v: str, path: List[str], depth: int) -> List[str]:
+        if "items" not in schema:
+            return []
+        items = schema["items"]
+        lines = []
+        if isinstance(items, list):
+            for position, subschema in enumerate(items):
+                child = self._name("v")
+                body = self.node(subschema, child, path + [repr(f"/{position}")], depth + 1)
+                if body:
+                    lines += [
+                        f"if len({v}) > {position}:",
+                        f"    {child} = {v}[{position}]",
+                    ] + _indent(body)
+            return lines
+        index, child = self._name("i"), self._name("v")
+        body = self.node(items, child, path + [repr("/"), f"str({index})"], depth + 1)
+        if body:
+            lines += [f"for {index}, {child} in enumerate({v}):"] + _indent(body)
+        return lines
+
+    def combinators(self, schema: Dict[str, Any], v: str, path: List[str]) -> List[str]:
+        lines = []
+        for subschema in schema.get("allOf", ()):
+            function, error = self.function(subschema), self._name("error")
+            lines += [
+                f"{error} = {function}({v})",
+                f"if {error} is not None:",
+                "    return " + " + ".join(path + [error]),
+            ]
+        if "anyOf" in schema:
+            calls = [f"{self.function(s)}({v}) is not None" for s in schema["anyOf"]]
+            lines += [
+                f"if {' and '.join(calls) or 'True'}:",
+                "    " + self.error(path, repr(" does not match any anyOf schema")),
+            ]
+        if "oneOf" in schema:
+            count = self._name("matched")
+            calls = [f"({self.function(s)}({v}) is None)" for s in schema["oneOf"]]
+            lines += [
+                f"{count} = {' + '.join(calls) or '0'}",
+                f"if {count} != 1:",
+                "    "
+                + self.error(
+                    path,
+                    repr(" matches "),
+                    f"str({count})",
+                    repr(" oneOf schemas, expected exactly one"),
+                ),
+            ]
+        if "not" in schema:
+            function = self.function(schema["not"])
+            lines += [
+                f"if {function}({v}) is None:",
+                "    " + self.error(path, repr(" must not match the 'not' schema")),
+            ]
+        return lines
+
+
+def generate_validator(schema: Any, name: str = "schema") -> Check:
+    """Generate and compile the validation function of a schema
+
+    The function returns None for a valid instance, else its first error as
+    "<json pointer>: <reason>" (an empty pointer for the instance itself).
+    Its source is kept as the function's `source` attribute.
+    """
+    generator = _Generator()
+    root = generator.function(schema)
+    source = "\n\n".join(generator.functions) + "\n"
+    exec(compile(source, f"<schema {name}>", "exec"), generator.namespace)
+    check = generator.namespace[root]
+    check.source = source
+    return check
+
+
+def compile_schema(schema: Any) -> Check:
+    """Compile a schema into a check returning None or the first error"""
+    return generate_validator(schema)
+
+
+class SchemaValidator:
+    """Compiled validator of one named schema"""
+
+    __slots__ = ("name", "_check")
+
+    def __init__(self, name: str, schema: Dict[str, Any]):
+        self.name = name
+        self._check = generate_validator(schema, name)
+
+    @property
+    def source(self) -> str:
+        """Generated Python source of the validator"""
+        return self._check.source
+
+    def error(self, instance: Any) -> Optional[str]:
+        """First validation error as "<json pointer>: <reason>", or None
+
+        Errors on the instance itself carry no pointer.
+        """
+        error = self._check(instance)
+        if error is None:
+            return None
+        return error[2:] if error.startswith(": ") else error
+
+    def is_valid(self, instance: Any) -> bool:
+        return self._check(instance) is None
+
+    def validate(self, instance: Any):
+        error = self.error(instance)
+        if error is not None:
+            raise ValueError(f"invalid {self.name}: {error}")
+
+    def __repr__(self) -> str:
+        return f"SchemaValidator({self.name!r})"
+
+
+_validators: Dict[str, Dict[str, SchemaValidator]] = {}
+_validators_lock = threading.Lock()
+
+
+def earth_validators(directory: Optional[str] = None) -> Dict[str, SchemaValidator]:
+    """Validators for every *.schema.json in directory, compiled once per process
+
+    Keyed by schema name, e.g. "ecological_event", "earth_extension",
+    "community_registration".
+    """
+    directory = os.path.abspath(directory or EARTH_SCHEMA_DIR)
+    validators = _validators.get(directory)
+    if validators is not None:
+        return validators
+    with _validators_lock:
+        validators = _validators.get(directory)
+        if validators is None:
+            validators = {}
+            for filename in sorted(os.listdir(directory)):
+                if filename.endswith(".schema.json"):
+                    name = filename[: -len(".schema.json")]
+                    with open(os.path.join(directory, filename), encoding="utf-8") as handle:
+                        validators[name] = SchemaValidator(name, json.load(handle))
+            _validators[directory] = validators
+    return validators
@@ -0,0 +1,458 @@
+"""
+TML Always Memory Segment Store
+Creator: Lev Goukassian (ORCID: 0009-0006-5966-1243)
+
+Durable append-only log of Always Memory entries. Entries are written into
+fixed-size, memory-mapped segment files and made durable by group commit:
+one msync covers every entry appended since the previous one. Sealed
+segments carry an index footer so reopening never rescans their records.
+
+Segment layout:
+    header   magic "TMLSEG01", base sequence (u64), segment size (u64)
+    records  length (u32), crc32 (u32), payload; a zero length ends the data
+    footer   one u32 record offset per entry (sealed segments only)
+    trailer  footer offset (u64), entry count (u64), footer crc32 (u32),
+             4 reserved bytes, magic "TMLIDX02"
+
+Sealing makes the footer durable before the trailer is written, and a
+trailer whose checksum does not match its footer is ignored: the segment
+is then indexed by scanning its records. New segments are prepared under a
+temporary name and renamed into place once their header is durable.
+"""
+
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+from array import array
+from enum import Enum
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .core import MemoryEntry
+
+SEGMENT_MAGIC = b"TMLSEG01"
+INDEX_MAGIC = b"TMLIDX02"
+
+_HEADER = struct.Struct("<8sQQ")
+_RECORD = struct.Struct("<II")
+_TRAILER = struct.Struct("<QQI4x8s")
+
+# Suffix of a segment file that is still being created
+_PARTIAL_SUFFIX = ".partial"
+
+DEFAULT_SEGMENT_SIZE = 64 * 1024 * 1024
+# Record offsets are stored as u32
+MAX_SEGMENT_SIZE = 1 << 32
+
+
+class DurabilityMode(Enum):
+    """When appended entries are forced to stable storage"""
+
+    PER_ENTRY = "per_entry"  # every append returns only once durable
+    PER_BATCH = "per_batch"  # append_batch and commit() force a sync
+    TIME_WINDOW = "time_window"  # a background flusher syncs every interval
+
+
+class SegmentCorruptionError(Exception):
+    """Raised when a segment file cannot be parsed"""
+
+
+def encode_entry(entry: MemoryEntry) -> bytes:
+    """Serialize a memory entry for storage"""
+    return json.dumps(entry.to_dict(), sort_keys=True, separators=(",", ":")).encode()
+
+
+def decode_entry(payload: bytes) -> Dict[str, Any]:
+    """Inverse of encode_entry; returns the schema-compatible dict"""
+    return json.loads(payload)
+
+
+class _Segment:
+    """One segment file and its in-memory record index"""
+
+    def __init__(self, path: str, base_seq: int, size: int):
+        self.path = path
+        self.base_seq = base_seq
+        self.size = size
+        self.offsets = array("I")
+        self.write_pos = _HEADER.size
+        self.flushed_pos = _HEADER.size
+        self.sealed = False
+        self.mmap: Optional[mmap.mmap] = None
+
+    @property
+    def count(self) -> int:
+        return len(self.offsets)
+
+    @property
+    def last_seq(self) -> int:
+        return self.base_seq + len(self.offsets) - 1
+
+    def fits(self, payload_size: int) -> bool:
+        footer = (len(self.offsets) + 1) * 4 + _TRAILER.size
+        return self.write_pos + _RECORD.size + payload_size + footer <= self.size
+
+    @classmethod
+    def create(cls, path: str, base_seq: int, size: int) -> "_Segment":
+        """Create a segment file; it appears under path only with a durable header"""
+        if os.path.exists(path):
+            raise FileExistsError(path)
+        segment = cls(path, base_seq, size)
+        partial = path + _PARTIAL_SUFFIX
+        fd = os.open(partial, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.ftruncate(fd, size)
+            segment.mmap = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        _HEADER.pack_into(segment.mmap, 0, SEGMENT_MAGIC, base_seq, size)
+        segment.mmap.flush()
+        os.replace(partial, path)
+        return segment
+
+    @classmethod
+    def open(cls, path: str, writable: bool) -> "_Segment":
+        with open(path, "rb") as handle:
+            magic, base_seq, size = _HEADER.unpack(handle.read(_HEADER.size))
+            if magic != SEGMENT_MAGIC:
+                raise SegmentCorruptionError(f"{path}: bad segment magic")
+            segment = cls(path, base_seq, size)
+            handle.seek(size - _TRAILER.size)
+            footer_offset, count, crc, index_magic = _TRAILER.unpack(handle.read(_TRAILER.size))
+            if (
+                index_magic == INDEX_MAGIC
+                and _HEADER.size <= footer_offset
+                and footer_offset + count * 4 <= size - _TRAILER.size
+            ):
+                handle.seek(footer_offset)
+                footer = handle.read(count * 4)
+                if zlib.crc32(footer) == crc:
+                    # Sealed: the footer gives every record offset directly
+                    segment.offsets.frombytes(footer)
+                    segment.write_pos = footer_offset
+                    segment.flushed_pos = footer_offset
+                    segment.sealed = True
+                    return segment
+        segment._recover(writable)
+        return segment
+
+    def _recover(self, writable: bool):
+        """Rebuild the index of an unsealed segment, dropping a torn tail"""
+        fd = os.open(self.path, os.O_RDWR if writable else os.O_RDONLY)
+        try:
+            view = mmap.mmap(
+                fd, self.size, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+            )
+        finally:
+            os.close(fd)
+        pos = _HEADER.size
+        limit = self.size - _TRAILER.size
+        while pos + _RECORD.size <= limit:
+            length, crc = _RECORD.unpack_from(view, pos)
+            end = pos + _RECORD.size + length
+            if length == 0 or end > limit or zlib.crc32(view[pos + _RECORD.size : end]) != crc:
+                break
+            self.offsets.append(pos)
+            pos = end
+        self.write_pos = pos
+        self.flushed_pos = pos
+        if writable:
+            # Clear a torn record left by a crash so a later scan cannot misread it
+            if pos + _RECORD.size <= limit:
+                length, _ = _RECORD.unpack_from(view, pos)
+                torn_end = min(limit, pos + _RECORD.size + length)
+                view[pos:torn_end] = bytes(torn_end - pos)
+            # and an unverifiable trailer left by a crash while sealing
+            view[limit:] = bytes(_TRAILER.size)
+            view.flush()
+            self.mmap = view
+        else:
+            view.close()
+
+    def append(self, payload: bytes) -> int:
+        pos = self.write_pos
+        end = pos + _RECORD.size + len(payload)
+        buf = self.mmap
+        buf[pos + _RECORD.size : end] = payload
+        _RECORD.pack_into(buf, pos, len(payload), zlib.crc32(payload))
+        self.offsets.append(pos)
+        self.write_pos = end
+        return self.base_seq + len(self.offsets) - 1
+
+    def _msync(self, start: int, end: int):
+        aligned = start - start % mmap.ALLOCATIONGRANULARITY
+        self.mmap.flush(aligned, end - aligned)
+
+    def flush(self, end: int):
+        """msync everything written since the last flush, up to end"""
+        start = self.flushed_pos
+        if self.mmap is None or end <= start:
+            return
+        self._msync(start, end)
+        self.flushed_pos = end
+
+    def seal(self):
+        """Write the index footer, then the trailer, and release the mapping
+
+        The footer (and any unflushed records) is durable before the
+        trailer that points at it is written.
+        """
+        buf = self.mmap
+        footer = self.offsets.tobytes()
+        footer_end = self.write_pos + len(footer)
+        buf[self.write_pos : footer_end] = footer
+        self._msync(self.flushed_pos, footer_end)
+        trailer_offset = self.size - _TRAILER.size
+        _TRAILER.pack_into(
+            buf,
+            trailer_offset,
+            self.write_pos,
+            len(self.offsets),
+            zlib.crc32(footer),
+            INDEX_MAGIC,
+        )
+        self._msync(trailer_offset, self.size)
+        buf.close()
+        self.mmap = None
+        self.sealed = True
+
+    def close(self):
+        if self.mmap is not None:
+            self.mmap.flush()
+            self.mmap.close()
+            self.mmap = None
+
+    def read(self, index: int) -> bytes:
+        pos = self.offsets[index]
+        if self.mmap is not None:
+            length, _ = _RECORD.unpack_from(self.mmap, pos)
+            return bytes(self.mmap[pos + _RECORD.size : pos + _RECORD.size + length])
+        with open(self.path, "rb") as handle:
+            handle.seek(pos)
+            length, _ = _RECORD.unpack(handle.read(_RECORD.size))
+            return handle.read(length)
+
+
+class SegmentStore:
+    """Append-only, crash-safe store for Always Memory entries
+
+    Sequence numbers start at 0 and increase by one per entry across
+    segments. With PER_ENTRY durability, concurrent appenders share msync
+    calls: an appender whose entry was covered by another thread's flush
+    returns without syncing again.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_size: int = DEFAULT_SEGMENT_SIZE,
+        durability: DurabilityMode = DurabilityMode.PER_BATCH,
+        sync_interval: float = 0.05,
+    ):
+        if segment_size % mmap.PAGESIZE or segment_size < 2 * mmap.PAGESIZE:
+            raise ValueError("segment_size must be a multiple of the page size (min 2 pages)")
+        if segment_size > MAX_SEGMENT_SIZE:
+            raise ValueError("segment_size must not exceed 4 GiB (record offsets are u32)")
+        self.directory = directory
+        self.segment_size = segment_size
+        self.durability = durability
+        self.sync_interval = sync_interval
+
+        self._lock = threading.Lock()  # guards appends and rotation
+        self._flush_lock = threading.Lock()  # serializes msync calls
+        self._segments: List[_Segment] = []
+        self._durable_seq = -1
+        self._closed = False
+
+        os.makedirs(directory, exist_ok=True)
+        self._open_segments()
+
+        self._flusher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        if durability is DurabilityMode.TIME_WINDOW:
+            self._flusher = threading.Thread(
+                target=self._flush_loop, name="tml-segment-flusher", daemon=True
+            )
+            self._flusher.start()
+
+    # ------------------------------------------------------------------
+    # Opening
+    # ------------------------------------------------------------------
+
+    def _segment_path(self, base_seq: int) -> str:
+        return os.path.join(self.directory, f"segment-{base_seq:020d}.tml")
+
+    def _open_segments(self):
+        for name in os.listdir(self.directory):
+            if name.startswith("segment-") and name.endswith(_PARTIAL_SUFFIX):
+                # A crash interrupted creating this segment before its header was durable
+                os.remove(os.path.join(self.directory, name))
+        names = sorted(
+            name
+            for name in os.listdir(self.directory)
+            if name.startswith("segment-") and name.endswith(".tml")
+        )
+        for position, name in enumerate(names):
+            writable = position == len(names) - 1
+            self._segments.append(_Segment.open(os.path.join(self.directory, name), writable))
+        if not self._segments or self._segments[-1].sealed:
+            next_seq = self._segments[-1].last_seq + 1 if self._segments else 0
+            self._segments.append(self._create_segment(next_seq))
+        self._durable_seq = self.next_seq - 1
+
+    def _create_segment(self, base_seq: int) -> _Segment:
+        segment = _Segment.create(self._segment_path(base_seq), base_seq, self.segment_size)
+        self._sync_directory()
+        return segment
+
+    def _sync_directory(self):
+        if hasattr(os, "O_DIRECTORY"):
+            fd = os.open(self.directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    @property
+    def next_seq(self) -> int:
+        active = self._segments[-1]
+        return active.base_seq + active.count
+
+    @property
+    def durable_seq(self) -> int:
+        """Highest sequence number known to be on stable storage (-1 if none)"""
+        return self._durable_seq
+
+    def _append_locked(self, payload: bytes) -> int:
+        if not payload:
+            raise ValueError("cannot append an empty entry")
+        active = self._segments[-1]
+        if not active.fits(len(payload)):
+            if active.count == 0:
+                raise ValueError(f"entry of {len(payload)} bytes exceeds segment capacity")
+            with self._flush_lock:
+                active.seal()
+                self._durable_seq = active.last_seq
+            active = self._create_segment(active.last_seq + 1)
+            self._segments.append(active)
+            if not active.fits(len(payload)):
+                raise ValueError(f"entry of {len(payload)} bytes exceeds segment capacity")
+        return active.append(payload)
+
+    def append(self, payload: bytes) -> int:
+        """Append one encoded entry and return its sequence number"""
+        with self._lock:
+            self._check_open()
+            seq = self._append_locked(payload)
+        if self.durability is DurabilityMode.PER_ENTRY:
+            self.sync(seq)
+        return seq
+
+    def append_batch(self, payloads: Sequence[bytes]) -> List[int]:
+        """Append several encoded entries; one sync covers the whole batch"""
+        with self._lock:
+            self._check_open()
+            seqs = [self._append_locked(payload) for payload in payloads]
+        if seqs and self.durability is not DurabilityMode.TIME_WINDOW:
+            self.sync(seqs[-1])
+        return seqs
+
+    def append_entry(self, entry: MemoryEntry) -> int:
+        """Encode and append a MemoryEntry"""
+        return self.append(encode_entry(entry))
+
+    def append_entries(self, entries: Sequence[MemoryEntry]) -> List[int]:
+        """Encode and append MemoryEntries as one batch"""
+        return self.append_batch([encode_entry(entry) for entry in entries])
+
+    def sync(self, upto: Optional[int] = None):
+        """Make entries up to sequence number upto durable (default: all)
+
+        Callers whose entries were already flushed by someone else return
+        immediately; otherwise one msync covers every pending entry.
+        """
+        if upto is not None and upto <= self._durable_seq:
+            return
+        with self._lock:
+            active = self._segments[-1]
+            target = active.base_seq + active.count - 1
+            end = active.write_pos
+        # Lock order is always _lock -> _flush_lock; never the reverse
+        with self._flush_lock:
+            if target <= self._durable_seq:
+                return
+            if not active.sealed:
+                active.flush(end)
+            self._durable_seq = target
+
+    def commit(self):
+        """Force every appended entry to stable storage"""
+        self.sync()
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.sync_interval):
+            if self.next_seq - 1 > self._durable_seq:
+                self.sync()
+
+    def _check_open(self):
+        if self._closed:
+            raise ValueError("SegmentStore is closed")
+
+    def close(self):
+        """Sync pending entries and release all mappings"""
+        if self._closed:
+            return
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.sync()
+        with self._lock, self._flush_lock:
+            self._closed = True
+            for segment in self._segments:
+                segment.close()
+
+    def __enter__(self) -> "SegmentStore":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return self.next_seq - self._segments[0].base_seq
+
+    def _locate(self, seq: int) -> Tuple[_Segment, int]:
+        low, high = 0, len(self._segments) - 1
+        while low < high:
+            mid = (low + high + 1) // 2
+            if self._segments[mid].base_seq <= seq:
+                low = mid
+            else:
+                high = mid - 1
+        segment = self._segments[low]
+        index = seq - segment.base_seq
+        if index < 0 or index >= segment.count:
+            raise KeyError(seq)
+        return segment, index
+
+    def read(self, seq: int) -> bytes:
+        """Return the raw payload stored under a sequence number"""
+        with self._lock:
+            segment, index = self._locate(seq)
+            return segment.read(index)
+
+    def scan(self, start_seq: int = 0) -> Iterator[Tuple[int, bytes]]:
+        """Yield (sequence number, payload) pairs from start_seq onwards"""
+        seq = start_seq
+        while seq < self.next_seq:
+            yield seq, self.read(seq)
+            seq += 1
@@ -0,0 +1,493 @@
+"""
+TML Territory Spatial Index
+Creator: Lev Goukassian (ORCID: 0009-0006-5966-1243)
+
+Point-in-polygon lookup of community territories. Territories are GeoJSON
+Polygon or MultiPolygon geometries (bare, as a Feature or FeatureCollection,
+or wrapped in the community registration `boundaries` object) and are
+bucketed by bounding box into a uniform grid of cell_size degrees. A lookup
+probes one cell and runs exact even-odd ring tests only on the territories
+whose bounding box holds the point, so its cost depends on how many
+territories overlap that cell rather than on how many are registered.
+
+TileCoverIndex adds a geohash-aligned tile cover on top: each territory is
+precomputed into tiles that are fully inside it or cross its boundary, so
+a lookup is one dict probe plus exact tests for boundary tiles only.
+
+Coordinates follow GeoJSON order, (longitude, latitude). Territories that
+cross the antimeridian must be split into a MultiPolygon.
+"""
+
+import math
+import threading
+from collections import deque
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Set, Tuple
+
+from .lru import LRUCache
+
+Point = Tuple[float, float]
+Ring = List[Point]
+BBox = Tuple[float, float, float, float]
+
+_LAT_KEYS = ("lat", "latitude")
+_LON_KEYS = ("lon", "lng", "longitude")
+
+
+def _ring_contains(ring: Ring, x: float, y: float) -> bool:
+    """Even-odd crossing test of one closed ring"""
+    inside = False
+    x1, y1 = ring[-1]
+    for x2, y2 in ring:
+        if (y1 > y) != (y2 > y):
+            if x < (x2 - x1) * (y - y1) / (y2 - y1) + x1:
+                inside = not inside
+        x1, y1 = x2, y2
+    return inside
+
+
+class Polygon:
+    """Exterior ring plus holes, with a precomputed bounding box"""
+
+    __slots__ = ("rings", "bbox")
+
+    def __init__(self, rings: Sequence[Sequence[Sequence[float]]]):
+        self.rings: List[Ring] = [
+            [(float(c[0]), float(c[1])) for c in ring] for ring in rings if len(ring) >= 3
+        ]
+        if not self.rings:
+            raise ValueError("polygon needs an exterior ring of at least three positions")
+        exterior = self.rings[0]
+        xs = [x for x, _ in exterior]
+        ys = [y for _, y in exterior]
+        self.bbox: BBox = (min(xs), min(ys), max(xs), max(ys))
+
+    def contains(self, x: float, y: float) -> bool:
+        min_x, min_y, max_x, max_y = self.bbox
+        if not (min_x <= x <= max_x and min_y <= y <= max_y):
+            return False
+        if not _ring_contains(self.rings[0], x, y):
+            return False
+        return not any(_ring_contains(hole, x, y) for hole in self.rings[1:])
+
+
+class Geometry:
+    """Union of polygons making up one territory"""
+
+    __slots__ = ("polygons", "bbox")
+
+    def __init__(self, polygons: List[Polygon]):
+        if not polygons:
+            raise ValueError("geometry needs at least one polygon")
+        self.polygons = polygons
+        self.bbox: BBox = (
+            min(p.bbox[0] for p in polygons),
+            min(p.bbox[1] for p in polygons),
+            max(p.bbox[2] for p in polygons),
+            max(p.bbox[3] for p in polygons),
+        )
+
+    def contains(self, x: float, y: float) -> bool:
+        return any(polygon.contains(x, y) for polygon in self.polygons)
+
+
+def _polygons(data: Dict[str, Any]) -> List[Polygon]:
+    kind = data.get("type")
+    if kind == "Polygon":
+        return [Polygon(data["coordinates"])]
+    if kind == "MultiPolygon":
+        return [Polygon(rings) for rings in data["coordinates"]]
+    if kind == "Feature":
+        return _polygons(data.get("geometry") or {})
+    if kind == "FeatureCollection":
+        return [p for feature in data.get("features", []) for p in _polygons(feature)]
+    if kind == "GeometryCollection":
+        return [p for geometry in data.get("geometries", []) for p in _polygons(geometry)]
+    if kind == "geojson":
+        return _polygons(data.get("data") or {})
+    if kind == "coordinates":
+        point_list = [point_from_location(p) for p in data.get("points", [])]
+        return [Polygon([[p for p in point_list if p is not None]])]
+    if "boundaries" in data:
+        return _polygons(data["boundaries"] or {})
+    return []
+
+
+def parse_territory(territory: Optional[Dict[str, Any]]) -> Optional[Geometry]:
+    """Geometry of a territory, or None if it has no polygon boundary
+
+    Raises ValueError for a polygon boundary that cannot be parsed.
+    """
+    if not territory:
+        return None
+    try:
+        polygons = _polygons(territory)
+    except (KeyError, TypeError, IndexError) as error:
+        raise ValueError(f"malformed territory geometry: {error!r}") from error
+    return Geometry(polygons) if polygons else None
+
+
+def point_from_location(location: Optional[Dict[str, Any]]) -> Optional[Point]:
+    """(longitude, latitude) of a location dict, or None if it has no coordinates"""
+    if not location:
+        return None
+    if isinstance(location.get("coordinates"), dict):
+        location = location["coordinates"]
+    lat = next((location[k] for k in _LAT_KEYS if location.get(k) is not None), None)
+    lon = next((location[k] for k in _LON_KEYS if location.get(k) is not None), None)
+    if lat is None or lon is None:
+        return None
+    return float(lon), float(lat)
+
+
+class SpatialIndex:
+    """Uniform grid of territory geometries keyed by bounding box
+
+    Geometries spanning more than max_cells grid cells are kept in a
+    separate list filtered by bounding box, so a continent-sized territory
+    does not flood the grid. Cell buckets are immutable tuples replaced on
+    write, so queries need no lock.
+    """
+
+    def __init__(self, cell_size: float = 0.5, max_cells: int = 4096):
+        if cell_size <= 0:
+            raise ValueError("cell_size must be positive")
+        self.cell_size = cell_size
+        self.max_cells = max_cells
+        self._cells: Dict[Tuple[int, int], Tuple[Hashable, ...]] = {}
+        self._oversized: Tuple[Hashable, ...] = ()
+        self._geometries: Dict[Hashable, Geometry] = {}
+        self._order: Dict[Hashable, int] = {}
+        self._next_order = 0
+        self._lock = threading.Lock()
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def _cell_range(self, bbox: BBox):
+        low_x, low_y = self._cell(bbox[0], bbox[1])
+        high_x, high_y = self._cell(bbox[2], bbox[3])
+        return range(low_x, high_x + 1), range(low_y, high_y + 1)
+
+    def insert(self, key: Hashable, geometry: Geometry):
+        """Index geometry under key, replacing any previous geometry for it"""
+        with self._lock:
+            if key in self._geometries:
+                self._unlink(key)
+            else:
+                self._order[key] = self._next_order
+                self._next_order += 1
+            self._geometries[key] = geometry
+            columns, rows = self._cell_range(geometry.bbox)
+            if len(columns) * len(rows) > self.max_cells:
+                self._oversized += (key,)
+                return
+            for cx in columns:
+                for cy in rows:
+                    self._cells[cx, cy] = self._cells.get((cx, cy), ()) + (key,)
+
+    def remove(self, key: Hashable):
+        with self._lock:
+            if key in self._geometries:
+                self._unlink(key)
+                del self._geometries[key]
+                del self._order[key]
+
+    def _unlink(self, key: Hashable):
+        if key in self._oversized:
+            self._oversized = tuple(k for k in self._oversized if k != key)
+            return
+        columns, rows = self._cell_range(self._geometries[key].bbox)
+        for cx in columns:
+            for cy in rows:
+                remaining = tuple(k for k in self._cells.get((cx, cy), ()) if k != key)
+                if remaining:
+                    self._cells[cx, cy] = remaining
+                else:
+                    self._cells.pop((cx, cy), None)
+
+    def query(self, x: float, y: float) -> List[Hashable]:
+        """Keys of every geometry containing (x, y), in insertion order"""
+        geometries = self._geometries
+        hits = []
+        for key in self._cells.get(self._cell(x, y), ()) + self._oversized:
+            geometry = geometries.get(key)
+            if geometry is not None and geometry.contains(x, y):
+                hits.append(key)
+        if len(hits) > 1:
+            order = self._order
+            hits.sort(key=lambda k: order.get(k, 0))
+        return hits
+
+    def intersecting(self, bbox: BBox) -> List[Hashable]:
+        """Keys whose bounding box intersects bbox"""
+        columns, rows = self._cell_range(bbox)
+        if len(columns) * len(rows) > self.max_cells:
+            candidates = set(self._geometries)
+        else:
+            candidates = set(self._oversized)
+            for cx in columns:
+                for cy in rows:
+                    candidates.update(self._cells.get((cx, cy), ()))
+        geometries = self._geometries
+        return [
+            key
+            for key in candidates
+            if key in geometries and _boxes_intersect(geometries[key].bbox, bbox)
+        ]
+
+    def geometry(self, key: Hashable) -> Optional[Geometry]:
+        return self._geometries.get(key)
+
+    def order(self, key: Hashable) -> int:
+        return self._order.get(key, 0)
+
+    def __len__(self) -> int:
+        return len(self._geometries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._geometries
+
+
+def _boxes_intersect(a: BBox, b: BBox) -> bool:
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+_GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+OUTSIDE, INSIDE, BOUNDARY = 0, 1, 2
+
+
+def geohash(lat: float, lon: float, precision: int) -> str:
+    """Standard geohash of a point"""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        interval, coordinate = (lon_range, lon) if even else (lat_range, lat)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_GEOHASH_BASE32[value])
+            bits = value = 0
+    return "".join(chars)
+
+
+def _segment_hits_box(x1: float, y1: float, x2: float, y2: float, box: BBox) -> bool:
+    """Liang-Barsky test of a segment against a closed box"""
+    t0, t1 = 0.0, 1.0
+    dx, dy = x2 - x1, y2 - y1
+    for p, q in ((-dx, x1 - box[0]), (dx, box[2] - x1), (-dy, y1 - box[1]), (dy, box[3] - y1)):
+        if p == 0:
+            if q < 0:
+                return False
+            continue
+        t = q / p
+        if p < 0:
+            if t > t1:
+                return False
+            t0 = max(t0, t)
+        else:
+            if t < t0:
+                return False
+            t1 = min(t1, t)
+    return True
+
+
+def tile_relation(geometry: Geometry, box: BBox) -> int:
+    """INSIDE, OUTSIDE or BOUNDARY relation of a box to a geometry"""
+    if not _boxes_intersect(geometry.bbox, box):
+        return OUTSIDE
+    for polygon in geometry.polygons:
+        if not _boxes_intersect(polygon.bbox, box):
+            continue
+        for ring in polygon.rings:
+            x1, y1 = ring[-1]
+            for x2, y2 in ring:
+                if _segment_hits_box(x1, y1, x2, y2, box):
+                    return BOUNDARY
+                x1, y1 = x2, y2
+    # No edge touches the box, so the whole box is on one side
+    center_x, center_y = (box[0] + box[2]) / 2, (box[1] + box[3]) / 2
+    return INSIDE if geometry.contains(center_x, center_y) else OUTSIDE
+
+
+class TileCoverIndex:
+    """Geohash tile cover over an exact SpatialIndex
+
+    Tiles are the cells of a geohash of the given precision. Territories
+    covering at most max_tiles tiles are precomputed at insert time into
+    inside and boundary tiles; larger ones stay in the exact index and are
+    classified per tile on first use. The merged per-tile lookup plan of
+    the hot_tiles most recently probed tiles is kept in an LRU.
+    """
+
+    def __init__(
+        self,
+        precision: int = 5,
+        max_tiles: int = 4096,
+        hot_tiles: int = 4096,
+        cell_size: float = 0.5,
+    ):
+        if precision < 1:
+            raise ValueError("precision must be positive")
+        self.precision = precision
+        self.max_tiles = max_tiles
+        self.tile_width = 360.0 / (1 << ((5 * precision + 1) // 2))
+        self.tile_height = 180.0 / (1 << (5 * precision // 2))
+        self.exact = SpatialIndex(cell_size)
+        self._tiles: Dict[Tuple[int, int], Tuple[Tuple[Hashable, ...], Tuple[Hashable, ...]]] = {}
+        self._covers: Dict[Hashable, Dict[Tuple[int, int], int]] = {}
+        self._large: Set[Hashable] = set()
+        self._plans = LRUCache(hot_tiles)
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def tile(self, x: float, y: float) -> Tuple[int, int]:
+        return math.floor((x + 180.0) / self.tile_width), math.floor((y + 90.0) / self.tile_height)
+
+    def tile_bbox(self, tile: Tuple[int, int]) -> BBox:
+        x0 = tile[0] * self.tile_width - 180.0
+        y0 = tile[1] * self.tile_height - 90.0
+        return x0, y0, x0 + self.tile_width, y0 + self.tile_height
+
+    def insert(self, key: Hashable, geometry: Geometry):
+        cover = self._cover(geometry)
+        with self._lock:
+            self._unlink(key)
+            self.exact.insert(key, geometry)
+            if cover is None:
+                self._large.add(key)
+            else:
+                self._covers[key] = cover
+                for tile, relation in cover.items():
+                    inside, boundary = self._tiles.get(tile, ((), ()))
+                    if relation == INSIDE:
+                        inside += (key,)
+                    else:
+                        boundary += (key,)
+                    self._tiles[tile] = (inside, boundary)
+            self._generation += 1
+
+    def remove(self, key: Hashable):
+        with self._lock:
+            self._unlink(key)
+            self.exact.remove(key)
+            self._generation += 1
+
+    def _unlink(self, key: Hashable):
+        self._large.discard(key)
+        for tile in self._covers.pop(key, {}):
+            inside, boundary = self._tiles[tile]
+            inside = tuple(k for k in inside if k != key)
+            boundary = tuple(k for k in boundary if k != key)
+            if inside or boundary:
+                self._tiles[tile] = (inside, boundary)
+            else:
+                del self._tiles[tile]
+
+    def _cover(self, geometry: Geometry) -> Optional[Dict[Tuple[int, int], int]]:
+        """Inside and boundary tiles of geometry, or None if it spans too many tiles"""
+        low_x, low_y = self.tile(geometry.bbox[0], geometry.bbox[1])
+        high_x, high_y = self.tile(geometry.bbox[2], geometry.bbox[3])
+        if (high_x - low_x + 1) * (high_y - low_y + 1) > self.max_tiles:
+            return None
+        width, height = self.tile_width, self.tile_height
+        # Widen edge rasterization a hair so rounding can only add boundary tiles
+        slack_x, slack_y = width * 1e-6, height * 1e-6
+        relations: Dict[Tuple[int, int], int] = {}
+        for polygon in geometry.polygons:
+            for ring in polygon.rings:
+                x1, y1 = ring[-1]
+                for x2, y2 in ring:
+                    left, right = min(x1, x2), max(x1, x2)
+                    for column in range(
+                        math.floor((left - slack_x + 180.0) / width),
+                        math.floor((right + slack_x + 180.0) / width) + 1,
+                    ):
+                        clip_low = max(left, column * width - 180.0)
+                        clip_high = min(right, (column + 1) * width - 180.0)
+                        if x1 == x2:
+                            y_a, y_b = y1, y2
+                        else:
+                            slope = (y2 - y1) / (x2 - x1)
+                            y_a = y1 + (clip_low - x1) * slope
+                            y_b = y1 + (clip_high - x1) * slope
+                        for row in range(
+                            math.floor((min(y_a, y_b) - slack_y + 90.0) / height),
+                            math.floor((max(y_a, y_b) + slack_y + 90.0) / height) + 1,
+                        ):
+                            if low_x <= column <= high_x and low_y <= row <= high_y:
+                                relations[column, row] = BOUNDARY
+                    x1, y1 = x2, y2
+
+        # Tiles not crossed by an edge form regions entirely inside or outside;
+        # one center test classifies each connected region
+        seen = set(relations)
+        for start_x in range(low_x, high_x + 1):
+            for start_y in range(low_y, high_y + 1):
+                if (start_x, start_y) in seen:
+                    continue
+                box = self.tile_bbox((start_x, start_y))
+                inside = geometry.contains((box[0] + box[2]) / 2, (box[1] + box[3]) / 2)
+                region = deque([(start_x, start_y)])
+                seen.add((start_x, start_y))
+                while region:
+                    tile = region.popleft()
+                    if inside:
+                        relations[tile] = INSIDE
+                    tx, ty = tile
+                    for neighbour in ((tx + 1, ty), (tx - 1, ty), (tx, ty + 1), (tx, ty - 1)):
+                        if (
+                            neighbour not in seen
+                            and low_x <= neighbour[0] <= high_x
+                            and low_y <= neighbour[1] <= high_y
+                        ):
+                            seen.add(neighbour)
+                            region.append(neighbour)
+        return relations
+
+    def _plan(self, tile: Tuple[int, int]) -> Tuple[Tuple[Hashable, bool], ...]:
+        """(key, certainly inside) pairs for a tile, in insertion order"""
+        inside, boundary = self._tiles.get(tile, ((), ()))
+        plan = [(key, True) for key in inside] + [(key, False) for key in boundary]
+        if self._large:
+            box = self.tile_bbox(tile)
+            for key in self.exact.intersecting(box):
+                if key in self._large:
+                    relation = tile_relation(self.exact.geometry(key), box)
+                    if relation != OUTSIDE:
+                        plan.append((key, relation == INSIDE))
+        plan.sort(key=lambda item: self.exact.order(item[0]))
+        return tuple(plan)
+
+    def query(self, x: float, y: float) -> List[Hashable]:
+        """Keys of every geometry containing (x, y), in insertion order"""
+        tile = self.tile(x, y)
+        key = (self._generation, tile)
+        plan = self._plans.get(key)
+        if plan is None:
+            plan = self._plan(tile)
+            self._plans.put(key, plan)
+        hits = []
+        for k, certain in plan:
+            if not certain:
+                geometry = self.exact.geometry(k)
+                if geometry is None or not geometry.contains(x, y):
+                    continue
+            hits.append(k)
+        return hits
+
+    def __len__(self) -> int:
+        return len(self.exact)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.exact
@@ -0,0 +1,279 @@
+"""
+TML Stewardship Token Ledger
+Creator: Lev Goukassian (ORCID: 0009-0006-5966-1243)
+
+Atomic per-community stewardship token balances with an append-only award
+history. Balances are guarded by striped locks, so awards to different
+communities proceed in parallel while awards to one community serialize.
+A batch of awards takes each stripe it needs once (in a fixed order, so
+batches cannot deadlock), appends the whole batch to the history in one
+write and, with a SegmentStore behind it, one group commit.
+
+Every history record carries the balance it produced, so replaying the
+history restores the latest balances without knowing opening balances.
+
+Balances that other ledgers (e.g. other processes sharing a registry
+database) also change need an authoritative store: add_balances applies a
+batch's per-community increments atomically there. The history is written
+(and synced) before the balances are applied, and every batch carries an
+award ID that add_balances applies at most once. A batch whose balances
+failed to apply is marked void in the history; one left unapplied by a
+crash is applied when a ledger is next opened on the SegmentStore.
+
+Without a SegmentStore the history is kept in memory, bounded to the most
+recent max_history records.
+"""
+
+import json
+import threading
+import uuid
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .clock import HybridLogicalClock, default_clock, format_hlc
+from .segment_store import SegmentStore
+
+# (community_id, amount, reason)
+Award = Tuple[str, int, str]
+
+
+# History markers: the balances of a batch were applied, or failed to apply
+_APPLIED = "applied"
+_VOID = "void"
+
+
+class StewardshipAward:
+    """One history record: an award and the balance it produced"""
+
+    __slots__ = ("community_id", "amount", "reason", "timestamp", "balance", "award_id")
+
+    def __init__(
+        self,
+        community_id: str,
+        amount: int,
+        reason: str,
+        timestamp: int,
+        balance: int,
+        award_id: Optional[str] = None,
+    ):
+        self.community_id = community_id
+        self.amount = amount
+        self.reason = reason
+        self.timestamp = timestamp
+        self.balance = balance
+        self.award_id = award_id
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            "community_id": self.community_id,
+            "amount": self.amount,
+            "reason": self.reason,
+            "timestamp": self.timestamp,
+            "balance": self.balance,
+        }
+        if self.award_id is not None:
+            data["award_id"] = self.award_id
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "StewardshipAward":
+        return cls(
+            data["community_id"],
+            data["amount"],
+            data["reason"],
+            data["timestamp"],
+            data["balance"],
+            data.get("award_id"),
+        )
+
+    def encode(self) -> bytes:
+        return json.dumps(self.to_dict(), separators=(",", ":"), sort_keys=True).encode()
+
+    def __repr__(self) -> str:
+        return (
+            f"StewardshipAward({self.community_id}, amount={self.amount}, "
+            f"balance={self.balance}, at={format_hlc(self.timestamp)})"
+        )
+
+
+class StewardshipLedger:
+    """Striped-lock token balances with a replayable award history
+
+    opening_balance(community_id) supplies the balance of a community
+    without history (e.g. its registration allocation). on_balance, if
+    given, is called with (community_id, balance) while the community's
+    stripe is still held, once per community per batch, so mirrors of the
+    balance are written in award order.
+
+    add_balances({community_id: amount}, award_id), if given, is the
+    authoritative balance store: it adds the amounts in one atomic step,
+    at most once per award_id, and returns the resulting balances. The
+    ledger then keeps no balance cache and opening_balance reads the
+    current stored balance; record balances are those computed when the
+    history was written.
+    """
+
+    def __init__(
+        self,
+        store: Optional[SegmentStore] = None,
+        opening_balance: Optional[Callable[[str], int]] = None,
+        on_balance: Optional[Callable[[str, int], None]] = None,
+        stripes: int = 64,
+        clock: Optional[HybridLogicalClock] = None,
+        add_balances: Optional[Callable[[Dict[str, int], str], Dict[str, int]]] = None,
+        max_history: int = 100_000,
+    ):
+        if stripes < 1:
+            raise ValueError("stripes must be positive")
+        self.store = store
+        self.opening_balance = opening_balance
+        self.on_balance = on_balance
+        self.add_balances = add_balances
+        self.clock = clock or default_clock()
+        self._stripes = [threading.Lock() for _ in range(stripes)]
+        self._log_lock = threading.Lock()
+        self._balances: Dict[str, int] = {}
+        self._history: Deque[StewardshipAward] = deque(maxlen=max_history)
+        self._void: Set[str] = set()
+        if store is not None:
+            self._load()
+
+    def _load(self):
+        """Rebuild balances from the history and apply batches a crash left unapplied"""
+        pending: Dict[str, Dict[str, int]] = {}
+        records = []
+        for _, payload in self.store.scan():
+            data = json.loads(payload)
+            marker = data.get("marker")
+            if marker is not None:
+                pending.pop(data["award_id"], None)
+                if marker == _VOID:
+                    self._void.add(data["award_id"])
+                continue
+            record = StewardshipAward.from_dict(data)
+            records.append(record)
+            if record.award_id is not None:
+                increments = pending.setdefault(record.award_id, {})
+                increments[record.community_id] = (
+                    increments.get(record.community_id, 0) + record.amount
+                )
+        for record in records:
+            if record.award_id not in self._void:
+                self._balances[record.community_id] = record.balance
+        if self.add_balances is not None:
+            for award_id, increments in pending.items():
+                self.add_balances(increments, award_id)
+                self._mark(award_id, _APPLIED)
+
+    def _mark(self, award_id: str, marker: str):
+        """Append a batch marker to the durable history"""
+        payload = json.dumps({"award_id": award_id, "marker": marker}, separators=(",", ":"))
+        seq = self.store.append(payload.encode())
+        if marker == _VOID:
+            self.store.sync(seq)
+
+    def _stripe_index(self, community_id: str) -> int:
+        return hash(community_id) % len(self._stripes)
+
+    def _current(self, community_id: str) -> int:
+        balance = None if self.add_balances is not None else self._balances.get(community_id)
+        if balance is None:
+            balance = self.opening_balance(community_id) if self.opening_balance else 0
+        return balance
+
+    def balance(self, community_id: str) -> int:
+        with self._stripes[self._stripe_index(community_id)]:
+            return self._current(community_id)
+
+    def award(self, community_id: str, amount: int, reason: str) -> StewardshipAward:
+        return self.award_batch([(community_id, amount, reason)])[0]
+
+    def award_batch(self, awards: Iterable[Award]) -> List[StewardshipAward]:
+        """Apply awards in order as one atomic, durably committed batch
+
+        The history records are committed before the balances change.
+        """
+        awards = list(awards)
+        if not awards:
+            return []
+        award_id = uuid.uuid4().hex if self.add_balances is not None else None
+        stripes = sorted({self._stripe_index(community_id) for community_id, _, _ in awards})
+        for index in stripes:
+            self._stripes[index].acquire()
+        try:
+            running: Dict[str, int] = {}
+            increments: Dict[str, int] = {}
+            for community_id, amount, _ in awards:
+                if community_id not in running:
+                    running[community_id] = self._current(community_id)
+                increments[community_id] = increments.get(community_id, 0) + amount
+            with self._log_lock:
+                # Timestamps are reserved in log order so the history is time-ordered
+                timestamps = self.clock.timestamps(len(awards))
+                records = []
+                for (community_id, amount, reason), timestamp in zip(awards, timestamps):
+                    running[community_id] += amount
+                    records.append(
+                        StewardshipAward(
+                            community_id, amount, reason, timestamp, running[community_id], award_id
+                        )
+                    )
+                if self.store is not None:
+                    last_seq = self.store.append_batch([record.encode() for record in records])[-1]
+                else:
+                    self._history.extend(records)
+            if self.store is not None:
+                self.store.sync(last_seq)
+            if self.add_balances is not None:
+                try:
+                    running = self.add_balances(increments, award_id)
+                except BaseException:
+                    self._discard(award_id, records)
+                    raise
+                if self.store is not None:
+                    self._mark(award_id, _APPLIED)
+            else:
+                self._balances.update(running)
+            if self.on_balance is not None:
+                for community_id, balance in running.items():
+                    self.on_balance(community_id, balance)
+        finally:
+            for index in stripes:
+                self._stripes[index].release()
+        return records
+
+    def _discard(self, award_id: str, records: List[StewardshipAward]):
+        """Take a batch whose balances were not applied out of the history"""
+        with self._log_lock:
+            self._void.add(award_id)
+            if self.store is not None:
+                self._mark(award_id, _VOID)
+            else:
+                discarded = set(map(id, records))
+                kept = [record for record in self._history if id(record) not in discarded]
+                self._history.clear()
+                self._history.extend(kept)
+
+    def history(self, community_id: Optional[str] = None) -> Iterator[StewardshipAward]:
+        """Award records in commit order, optionally for one community
+
+        Without a SegmentStore only the most recent max_history records are kept.
+        """
+        if self.store is not None:
+            records = (json.loads(payload) for _, payload in self.store.scan())
+            records = (StewardshipAward.from_dict(data) for data in records if "marker" not in data)
+        else:
+            with self._log_lock:
+                records = iter(list(self._history))
+        for record in records:
+            if record.award_id in self._void:
+                continue
+            if community_id is None or record.community_id == community_id:
+                yield record
+
+    def replay(self) -> Dict[str, int]:
+        """Balances rebuilt from the history alone"""
+        balances: Dict[str, int] = {}
+        for record in self.history():
+            balances[record.community_id] = record.balance
+        return balances
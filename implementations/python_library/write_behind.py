@@ -0,0 +1,180 @@
+"""
+TML Always Memory Write-Behind Pipeline
+Creator: Lev Goukassian (ORCID: 0009-0006-5966-1243)
+
+Moves encoding and storage of memory entries off the decision path. The
+caller hashes its input and reserves a sequence number synchronously, which
+yields a pre-commit receipt; a background thread drains a bounded queue in
+batches into a SegmentStore. When the queue is full the caller blocks, so a
+decision can never outrun its memory.
+"""
+
+import queue
+import threading
+from typing import List, Optional, Tuple
+
+from .core import MemoryEntry
+from .segment_store import SegmentStore, encode_entry
+
+_STOP = object()
+
+
+class WriteBehindError(Exception):
+    """Raised when the background writer can no longer persist entries"""
+
+
+class MemoryReceipt:
+    """Pre-commit receipt: the entry's reserved sequence number and input digest"""
+
+    __slots__ = ("seq", "input_digest")
+
+    def __init__(self, seq: int, input_digest: bytes):
+        self.seq = seq
+        self.input_digest = input_digest
+
+    @property
+    def input_hash(self) -> str:
+        return "0x" + self.input_digest.hex()
+
+    def __repr__(self) -> str:
+        return f"MemoryReceipt(seq={self.seq}, input_hash={self.input_hash[:10]}...)"
+
+
+class WriteBehindWriter:
+    """Bounded queue plus background writer in front of a SegmentStore
+
+    The writer must be the only appender to its store: reserved sequence
+    numbers are the store's own sequence numbers.
+    """
+
+    def __init__(self, store: SegmentStore, max_pending: int = 10_000, batch_size: int = 512):
+        if max_pending < 1 or batch_size < 1:
+            raise ValueError("max_pending and batch_size must be positive")
+        self.store = store
+        self.batch_size = batch_size
+        # Capacity is a semaphore so producers wait for room without holding
+        # _reserve_lock; the queue itself never blocks a put
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._queue: "queue.Queue" = queue.Queue()
+        self._reserve_lock = threading.Lock()
+        self._next_seq = store.next_seq
+        self._durable = threading.Condition()
+        self._durable_seq = store.next_seq - 1
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="tml-write-behind", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self) -> int:
+        """Entries reserved but not yet handed to the store"""
+        return self._queue.qsize()
+
+    @property
+    def durable_seq(self) -> int:
+        return self._durable_seq
+
+    def submit(self, entry: MemoryEntry, timeout: Optional[float] = None) -> MemoryReceipt:
+        """Reserve a sequence number for entry and queue it for storage
+
+        Blocks while the queue is full (backpressure). Raises queue.Full if
+        timeout elapses first, and WriteBehindError once the writer failed.
+        """
+        self._check_healthy()
+        if not self._slots.acquire(timeout=timeout):
+            raise queue.Full
+        try:
+            self._check_healthy()
+            with self._reserve_lock:
+                if self._closed:
+                    raise WriteBehindError("writer is closed")
+                seq = self._next_seq
+                # Reservation and enqueue happen together so queue order is seq order
+                self._queue.put_nowait((seq, entry))
+                self._next_seq = seq + 1
+        except BaseException:
+            self._slots.release()
+            raise
+        return MemoryReceipt(seq, entry.input_digest)
+
+    def wait(self, seq: int, timeout: Optional[float] = None) -> bool:
+        """Block until entry seq is durable; False on timeout"""
+        with self._durable:
+            done = self._durable.wait_for(
+                lambda: self._durable_seq >= seq or self._error is not None, timeout
+            )
+        self._check_healthy()
+        return done
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything submitted so far is durable"""
+        with self._reserve_lock:
+            last = self._next_seq - 1
+        return self.wait(last, timeout)
+
+    def close(self):
+        """Drain the queue, stop the background thread and commit the store"""
+        with self._reserve_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join()
+        self._check_healthy()
+
+    def __enter__(self) -> "WriteBehindWriter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _check_healthy(self):
+        if self._error is not None:
+            raise WriteBehindError("background memory writer failed") from self._error
+
+    def _take(self, block: bool = True):
+        """Next queued item; frees its slot for a waiting submitter"""
+        item = self._queue.get(block)
+        if item is not _STOP:
+            self._slots.release()
+        return item
+
+    def _take_batch(self) -> Tuple[List[Tuple[int, MemoryEntry]], bool]:
+        item = self._take()
+        if item is _STOP:
+            return [], True
+        batch = [item]
+        while len(batch) < self.batch_size:
+            try:
+                item = self._take(block=False)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = self._take_batch()
+            if not batch:
+                continue
+            try:
+                seqs = self.store.append_batch([encode_entry(entry) for _, entry in batch])
+                if seqs[0] != batch[0][0] or seqs[-1] != batch[-1][0]:
+                    raise WriteBehindError(
+                        f"store sequence {seqs[0]} does not match reservation {batch[0][0]}"
+                    )
+                self.store.sync(seqs[-1])
+            except BaseException as error:
+                with self._durable:
+                    self._error = error
+                    self._durable.notify_all()
+                # Keep draining so blocked submitters wake up and see the error
+                while not stopping:
+                    stopping = self._take() is _STOP
+                return
+            with self._durable:
+                self._durable_seq = seqs[-1]
+                self._durable.notify_all()
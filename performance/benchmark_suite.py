@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""
+TML Performance Benchmark Suite
+Creator: Lev Goukassian (ORCID: 0009-0006-5966-1243)
+
+Measures the latency and throughput targets published in
+latency_metrics.md and throughput_benchmarks.md against the code in this
+repository. Runs fully offline: blockchain anchoring is replaced by local
+stand-ins so only TML's own overhead is measured.
+
+Usage:
+    python performance/benchmark_suite.py
+    python performance/benchmark_suite.py --output results.json
+    python performance/benchmark_suite.py --compare results.json --only always_memory
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(REPO_ROOT, "implementations"))
+sys.path.append(os.path.join(REPO_ROOT, "No_Spy-No_Weapon"))
+sys.path.append(REPO_ROOT)
+
+
+class SkipBenchmark(Exception):
+    """Raised by a benchmark setup when its component cannot run here"""
+
+
+class Benchmark:
+    """A named operation with the documented target it is checked against"""
+
+    def __init__(
+        self,
+        name: str,
+        setup: Callable[[], Any],
+        target_p95_ms: Optional[float] = None,
+        target_ops: Optional[float] = None,
+        is_async: bool = False,
+        reference: str = "",
+    ):
+        self.name = name
+        self.setup = setup
+        self.target_p95_ms = target_p95_ms
+        self.target_ops = target_ops
+        self.is_async = is_async
+        self.reference = reference
+
+
+BENCHMARKS: List[Benchmark] = []
+
+
+def benchmark(name: str, **kwargs):
+    """Register a setup function returning the operation to measure
+
+    The setup may also return (operation, cleanup).
+    """
+
+    def register(setup):
+        BENCHMARKS.append(Benchmark(name, setup, **kwargs))
+        return setup
+
+    return register
+
+
+# ----------------------------------------------------------------------
+# Benchmarks
+# ----------------------------------------------------------------------
+
+
+@benchmark(
+    "always_memory.create_memory",
+    target_p95_ms=100,
+    target_ops=8000,
+    reference="Always Memory Write / Log Creation",
+)
+def _create_memory():
+    from python_library.core import AlwaysMemory, TMLState
+
+    memory = AlwaysMemory(system_id="bench")
+    payload = {"prompt": "Summarise the applicant file.", "features": list(range(32))}
+    output = {"decision": "approved", "score": 0.73}
+    return lambda: memory.create_memory("loan_decision", TMLState.PROCEED, payload, output)
+
+
+@benchmark(
+    "always_memory.create_memory[1MB]",
+    target_p95_ms=100,
+    reference="Always Memory Write (large context)",
+)
+def _create_memory_large():
+    from python_library.core import AlwaysMemory, TMLState
+
+    memory = AlwaysMemory(system_id="bench")
+    payload = {"context": "x" * (1 << 20), "documents": ["y" * 4096] * 16}
+    return lambda: memory.create_memory("summarise", TMLState.PROCEED, payload)
+
+
+@benchmark(
+    "always_memory.create_memories[100]",
+    target_ops=8000 / 100,
+    reference="Log Creation (batched, ops = batches of 100)",
+)
+def _create_memories():
+    from python_library.core import AlwaysMemory, TMLState
+
+    memory = AlwaysMemory(system_id="bench")
+    records = [("classify", TMLState.PROCEED, {"doc": i}, {"label": i % 3}) for i in range(100)]
+    return lambda: memory.create_memories(records)
+
+
+@benchmark(
+    "segment_store.append_entry",
+    target_p95_ms=100,
+    reference="Always Memory Write (hash + local persistence)",
+)
+def _segment_store_append():
+    from python_library.core import AlwaysMemory, TMLState
+    from python_library.segment_store import DurabilityMode, SegmentStore
+
+    directory = tempfile.TemporaryDirectory(prefix="tml-bench-")
+    store = SegmentStore(directory.name, durability=DurabilityMode.PER_ENTRY)
+    memory = AlwaysMemory(system_id="bench")
+    payload = {"prompt": "route shipment", "features": list(range(32))}
+
+    def cleanup():
+        store.close()
+        directory.cleanup()
+
+    return (
+        lambda: store.append_entry(memory.create_entry("route", TMLState.PROCEED, payload)),
+        cleanup,
+    )
+
+
+@benchmark(
+    "merkle.seal_batch[100]",
+    target_p95_ms=250,
+    target_ops=1000,
+    reference="Log Sealing / Merkle Batching",
+)
+def _merkle_seal():
+    import hashlib
+    from python_library.merkle import MerkleSealer
+
+    sealer = MerkleSealer(max_leaves=100, max_age=3600)
+    digests = [hashlib.sha256(str(i).encode()).digest() for i in range(100)]
+
+    def seal():
+        for digest in digests:
+            sealer.add(digest)
+
+    return seal
+
+
+@benchmark(
+    "earth.check_environmental_harm",
+    target_p95_ms=10,
+    target_ops=10000,
+    reference="Sacred Zero Trigger / Decision Evaluation",
+)
+def _environmental_harm():
+    from python_library.earth import EarthProtection
+
+    earth = EarthProtection()
+    action = "Approve industrial expansion with forest clearing near the river delta"
+    impact = {"recovery_years": 60, "species_affected": 3}
+    return lambda: earth.check_environmental_harm(action, resource_impact=impact)
+
+
+@benchmark(
+    "immutable_trace_logger.commit_trace",
+    target_p95_ms=100,
+    target_ops=8000,
+    reference="Log Creation",
+)
+def _commit_trace():
+    from Immutable_Trace_Logger import ImmutableTraceLogger
+
+    logger = ImmutableTraceLogger()
+    intent = {"action_id": "REQ-1", "features": ["route_optimization"]}
+    return lambda: logger.commit_trace(intent, 1)
+
+
+@benchmark(
+    "immutable_trace_logger.verify_receipt",
+    target_p95_ms=10,
+    reference="Receipt verification (ledger of 10,000 traces)",
+)
+def _verify_receipt():
+    from Immutable_Trace_Logger import ImmutableTraceLogger
+
+    logger = ImmutableTraceLogger()
+    receipts = [logger.commit_trace({"action_id": i}, 1) for i in range(10_000)]
+    middle = receipts[len(receipts) // 2]
+    return lambda: logger.verify_receipt(middle)
+
+
+@benchmark(
+    "inference_gatekeeper.evaluate_and_route",
+    target_p95_ms=10,
+    target_ops=10000,
+    reference="Sacred Zero Trigger / Decision Evaluation",
+)
+def _evaluate_and_route():
+    from Semantic_Proximity_Trigger import InferenceGatekeeper
+
+    gatekeeper = InferenceGatekeeper(
+        os.path.join(REPO_ROOT, "No_Spy-No_Weapon", "NoS_NoW_Corpus.json")
+    )
+    payload = {"action_id": "REQ-995", "features": ["route_optimization", "fuel_efficiency"]}
+
+    def evaluate():
+        # Keep the ledger bounded so verify_receipt's scan does not dominate
+        if len(gatekeeper.logger.ledger) >= 1000:
+            gatekeeper.logger.ledger.clear()
+        return gatekeeper.evaluate_and_route(payload)
+
+    return evaluate
+
+
+@benchmark(
+    "app.create_always_memory_log",
+    target_p95_ms=100,
+    target_ops=8000,
+    is_async=True,
+    reference="Log Creation (app/main.py, local anchor stand-in)",
+)
+def _app_log_path():
+    try:
+        from app.main import TMLApplication
+    except ImportError as error:
+        raise SkipBenchmark(f"app.main not importable: {error}")
+    import logging
+
+    logging.getLogger("app.main").setLevel(logging.WARNING)
+    app = TMLApplication(anchor_queue_path=":memory:")
+
+    async def local_anchor(log_hash):
+        # Local stand-in: anchoring runs in the background lane anyway
+        return {"local": log_hash}
+
+    app._anchor_to_blockchain = local_anchor
+    decision = {"action": "loan_decision", "outcome": "approved"}
+    return (lambda: app.create_always_memory_log(decision)), app.close
+
+
+@benchmark(
+    "blockchain.anchor_immediate",
+    target_p95_ms=100,
+    reference="Critical decision anchoring (local chain stand-ins)",
+)
+def _anchor_immediate():
+    from python_library.blockchain import TMLBlockchain
+    from python_library.rpc_provider import LocalChain
+
+    tml = TMLBlockchain(
+        {
+            "ethereum_rpc": LocalChain(block_time=12.0),
+            "polygon_rpc": LocalChain(block_time=2.0),
+            "sacred_zero_contract": "0x" + "cc" * 20,
+            "penalty_contract": "0x" + "dd" * 20,
+            "whistleblower_contract": "0x" + "ee" * 20,
+            "anchor_quorum": {"required": ["polygon", "ethereum"]},
+            "anchor_schedule": {
+                "polygon": {"latency_slo": 5.0},
+                "ethereum": {"latency_slo": 120.0},
+            },
+            "sacred_zero_deploy_block": 0,
+            "anchor_queue_path": ":memory:",
+        }
+    )
+    decision = {"action": "loan_decision", "outcome": "approved"}
+    return (lambda: tml.create_always_memory_log(decision, immediate=True)), tml.close
+
+
+# ----------------------------------------------------------------------
+# Measurement
+# ----------------------------------------------------------------------
+
+
+def _percentile(sorted_samples: List[int], fraction: float) -> float:
+    """Nearest-rank percentile, in milliseconds"""
+    index = max(0, min(len(sorted_samples) - 1, int(round(fraction * len(sorted_samples))) - 1))
+    return sorted_samples[index] / 1e6
+
+
+def _measure_sync(op: Callable[[], Any], iterations: int, warmup: int):
+    for _ in range(warmup):
+        op()
+    samples = []
+    clock = time.perf_counter_ns
+    for _ in range(iterations):
+        start = clock()
+        op()
+        samples.append(clock() - start)
+    start = clock()
+    for _ in range(iterations):
+        op()
+    elapsed = clock() - start
+    return samples, elapsed
+
+
+def _measure_async(op: Callable[[], Any], iterations: int, warmup: int):
+    async def run():
+        for _ in range(warmup):
+            await op()
+        samples = []
+        clock = time.perf_counter_ns
+        for _ in range(iterations):
+            start = clock()
+            await op()
+            samples.append(clock() - start)
+        start = clock()
+        for _ in range(iterations):
+            await op()
+        return samples, clock() - start
+
+    return asyncio.run(run())
+
+
+def run_benchmark(bench: Benchmark, iterations: int, warmup: int) -> Dict[str, Any]:
+    result: Dict[str, Any] = {"name": bench.name, "reference": bench.reference}
+    try:
+        op = bench.setup()
+    except SkipBenchmark as reason:
+        result.update(status="skipped", reason=str(reason))
+        return result
+    cleanup = None
+    if isinstance(op, tuple):
+        op, cleanup = op
+    measure = _measure_async if bench.is_async else _measure_sync
+    try:
+        samples, elapsed_ns = measure(op, iterations, warmup)
+    finally:
+        if cleanup is not None:
+            cleanup()
+    samples.sort()
+    ops_per_s = iterations / (elapsed_ns / 1e9) if elapsed_ns else float("inf")
+    result.update(
+        status="ok",
+        iterations=iterations,
+        p50_ms=_percentile(samples, 0.50),
+        p95_ms=_percentile(samples, 0.95),
+        p99_ms=_percentile(samples, 0.99),
+        max_ms=samples[-1] / 1e6,
+        ops_per_s=ops_per_s,
+        target_p95_ms=bench.target_p95_ms,
+        target_ops_per_s=bench.target_ops,
+    )
+    meets = True
+    if bench.target_p95_ms is not None:
+        meets = meets and result["p95_ms"] <= bench.target_p95_ms
+    if bench.target_ops is not None:
+        meets = meets and ops_per_s >= bench.target_ops
+    result["meets_target"] = meets
+    return result
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, check=True, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print_report(results: List[Dict[str, Any]], baseline: Optional[Dict[str, Dict]]):
+    header = f"{'benchmark':44} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ops/s':>11}  target"
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        if result["status"] != "ok":
+            print(f"{result['name']:44} skipped: {result['reason']}")
+            continue
+        line = (
+            f"{result['name']:44} {result['p50_ms']:9.3f} {result['p95_ms']:9.3f} "
+            f"{result['p99_ms']:9.3f} {result['ops_per_s']:11.0f}  "
+            f"{'PASS' if result['meets_target'] else 'MISS'}"
+        )
+        previous = (baseline or {}).get(result["name"])
+        if previous and previous.get("status") == "ok":
+            change = (result["p95_ms"] - previous["p95_ms"]) / previous["p95_ms"] * 100
+            line += f"  (p95 {change:+.1f}% vs baseline)"
+        print(line)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="TML latency and throughput benchmarks")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument(
+        "--only",
+        action="append",
+        default=[],
+        help="run benchmarks whose name contains this text (repeatable)",
+    )
+    parser.add_argument("--output", help="write machine-readable results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file from an earlier run")
+    args = parser.parse_args(argv)
+
+    selected = [
+        bench
+        for bench in BENCHMARKS
+        if not args.only or any(text in bench.name for text in args.only)
+    ]
+    results = [run_benchmark(bench, args.iterations, args.warmup) for bench in selected]
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = {entry["name"]: entry for entry in json.load(handle)["results"]}
+    _print_report(results, baseline)
+
+    if args.output:
+        report = {
+            "commit": _git_commit(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "results": results,
+        }
+        with open(args.output, "w") as handle:
+            json.dump(report, handle, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,369 @@
+"""
+Always Memory Core Test Suite
+Validates canonical hashing and memory entry creation in the Python library
+Creator: Lev Goukassian (ORCID: 0009-0006-5966-1243)
+"""
+
+import asyncio
+import dataclasses
+import hashlib
+import json
+import unittest
+import sys
+import os
+
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "implementations")
+)
+
+from python_library.canonical import canonical_digest, update_canonical
+from python_library.clock import (
+    ClockDriftError,
+    HybridLogicalClock,
+    LOGICAL_MASK,
+    format_hlc,
+    logical,
+    physical_ms,
+)
+from python_library.input_cache import InputHashCache
+from python_library.core import (
+    AlwaysMemory,
+    MemoryEntry,
+    TMLState,
+    always_memory,
+    hash_call_arguments,
+)
+
+
+@dataclasses.dataclass
+class _Request:
+    prompt: str
+
+
+@dataclasses.dataclass
+class _Appeal:
+    prompt: str
+
+
+class _SlottedRequest:
+    __slots__ = ("prompt",)
+
+    def __init__(self, prompt):
+        self.prompt = prompt
+
+
+class _PlainRequest:
+    def __init__(self, prompt):
+        self.prompt = prompt
+
+
+class _Model:
+    """pydantic-style model"""
+
+    def __init__(self, **fields):
+        self._fields = fields
+
+    def model_dump(self, mode="python"):
+        return dict(self._fields)
+
+
+def _json_digest(data):
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).digest()
+
+
+class CanonicalHashTests(unittest.TestCase):
+    """Streaming canonical encoder must match the legacy JSON digest"""
+
+    def test_matches_json_for_compatible_inputs(self):
+        cases = [
+            None,
+            True,
+            0,
+            -17,
+            3.25,
+            float("inf"),
+            "plain",
+            'unicode é中 \U0001f3ee "quoted"\n',
+            [],
+            {},
+            [1, "two", 3.0, None, [True, False]],
+            {"b": 1, "a": {"nested": [1, 2, {"z": "y"}]}, "c": (1, 2)},
+            {1: "int key", 2.5: "float key", 3: [{}]},
+            {None: [None]},
+            {"classification": TMLState.SACRED_ZERO, "items": list(range(3000))},
+        ]
+        for data in cases:
+            with self.subTest(data=repr(data)[:40]):
+                self.assertEqual(canonical_digest(data), _json_digest(data))
+
+    def test_large_string_is_streamed_identically(self):
+        data = {"context": "éx\U0001f3ee" * 100_000, "meta": [1, 2]}
+        self.assertEqual(canonical_digest(data), _json_digest(data))
+
+    def test_buffers_hash_without_json(self):
+        payload = b"model context" * 1000
+        self.assertEqual(canonical_digest(payload), canonical_digest(bytearray(payload)))
+        self.assertEqual(canonical_digest(payload), canonical_digest(memoryview(payload)))
+        self.assertNotEqual(canonical_digest(payload), canonical_digest(payload[:-1]))
+        self.assertNotEqual(
+            canonical_digest({"doc": payload}), canonical_digest({"doc": payload.decode()})
+        )
+
+    def test_update_canonical_feeds_existing_hasher(self):
+        hasher = hashlib.sha256()
+        update_canonical(hasher, {"a": [1, {"b": None}]})
+        self.assertEqual(hasher.digest(), _json_digest({"a": [1, {"b": None}]}))
+
+    def test_rejects_unserializable_and_circular(self):
+        with self.assertRaises(TypeError):
+            canonical_digest({"a": object()})
+        loop = []
+        loop.append([loop])
+        with self.assertRaises(ValueError):
+            canonical_digest(loop)
+
+
+class AlwaysMemoryTests(unittest.TestCase):
+    """Memory entries keep their schema-compatible shape"""
+
+    def setUp(self):
+        self.memory = AlwaysMemory(system_id="test-system")
+
+    def test_create_memory_hashes(self):
+        entry = self.memory.create_memory(
+            action="loan_decision",
+            classification=TMLState.PROCEED,
+            input_data={"applicant": "A-1", "amount": 5000},
+            output_data={"approved": True},
+        )
+        self.assertEqual(
+            entry["input_hash"], "0x" + _json_digest({"applicant": "A-1", "amount": 5000}).hex()
+        )
+        self.assertEqual(entry["output_hash"], "0x" + _json_digest({"approved": True}).hex())
+        self.assertEqual(entry["classification"], 1)
+
+    def test_create_memories_matches_single_entries(self):
+        records = [("classify", TMLState.PROCEED, {"doc": i}, {"label": i % 2}) for i in range(50)]
+        records.append(
+            (
+                "harvest",
+                TMLState.SACRED_ZERO,
+                {"area": "x"},
+                None,
+                "planetary_harm",
+                {"recovery_years": 60},
+            )
+        )
+        batch = self.memory.create_memories(records)
+        self.assertEqual(len(batch), 51)
+        self.assertEqual(len({entry["timestamp"] for entry in batch}), 1)
+        self.assertTrue(batch[0]["timestamp"].endswith("Z"))
+        for record, entry in zip(records, batch):
+            single = self.memory.create_memory(*record)
+            single["timestamp"] = entry["timestamp"]
+            single["hlc"] = entry["hlc"]
+            self.assertEqual(entry, single)
+
+    def test_compact_entry_expands_to_memory_dict(self):
+        entry = self.memory.create_entry(
+            "screen", TMLState.REFUSE, {"q": 1}, {"a": 2}, sacred_zero_trigger="weapons"
+        )
+        self.assertIsInstance(entry, MemoryEntry)
+        self.assertEqual(len(entry.input_digest), 32)
+        self.assertFalse(hasattr(entry, "__dict__"))
+        expected = self.memory.create_memory(
+            "screen", TMLState.REFUSE, {"q": 1}, {"a": 2}, sacred_zero_trigger="weapons"
+        )
+        expected["timestamp"] = format_hlc(entry.timestamp)
+        expected["hlc"] = entry.timestamp
+        self.assertEqual(entry.to_dict(), expected)
+
+    def test_logical_counter_is_part_of_the_record(self):
+        clock = HybridLogicalClock(wall_clock_ns=lambda: 1_700_000_000_000_000_000)
+        memory = AlwaysMemory("hlc", clock=clock)
+        first, second = memory.create_entries([("a", 1, {}, None), ("a", 1, {}, None)])
+        self.assertEqual(first.to_dict()["timestamp"], second.to_dict()["timestamp"])
+        self.assertEqual(second.to_dict()["hlc"], first.to_dict()["hlc"] + 1)
+        self.assertNotEqual(first.digest(), second.digest())
+
+    def test_compact_entries_share_envelope(self):
+        entries = self.memory.create_entries([("a", 1, {"i": i}, None) for i in range(3)])
+        self.assertIs(entries[0].envelope, entries[2].envelope)
+        self.assertIsNone(entries[1].output_hash)
+        self.assertIsNot(
+            entries[0].to_dict()["goukassian_promise"], entries[1].to_dict()["goukassian_promise"]
+        )
+
+
+class HybridLogicalClockTests(unittest.TestCase):
+    """Clock values stay strictly increasing when the wall clock steps back"""
+
+    def test_monotonic_across_wall_clock_regression(self):
+        wall = [1_700_000_000_000_000_000]
+        clock = HybridLogicalClock(wall_clock_ns=lambda: wall[0])
+        first = clock.now()
+        wall[0] -= 5_000_000_000
+        second = clock.now()
+        self.assertGreater(second, first)
+        self.assertEqual(physical_ms(second), physical_ms(first))
+        wall[0] += 10_000_000_000
+        self.assertEqual(physical_ms(clock.now()), 1_700_000_005_000)
+
+    def test_reserve_and_update(self):
+        clock = HybridLogicalClock(wall_clock_ns=lambda: 1_000_000_000)
+        first = clock.reserve(10)
+        self.assertEqual(clock.now(), first + 10)
+        remote = first + 1_000_000
+        self.assertEqual(clock.update(remote), remote + 1)
+
+    def test_exhausted_logical_counter_carries_into_milliseconds(self):
+        calls = []
+
+        def wall_clock_ns():
+            calls.append(1)
+            return 1_000_000_000
+
+        clock = HybridLogicalClock(wall_clock_ns=wall_clock_ns)
+        first = clock.reserve(LOGICAL_MASK + 1)
+        self.assertEqual(logical(first), 0)
+        following = clock.now()
+        self.assertEqual(logical(following), 0)
+        self.assertEqual(physical_ms(following), physical_ms(first) + 1)
+        self.assertEqual(len(calls), 2)  # no waiting on the wall clock
+        with self.assertRaises(ValueError):
+            clock.reserve(LOGICAL_MASK + 2)
+        stamps = clock.timestamps(LOGICAL_MASK + 10)
+        self.assertEqual(len(set(stamps)), LOGICAL_MASK + 10)
+        self.assertEqual(stamps, sorted(stamps))
+
+    def test_remote_timestamps_beyond_max_drift_are_rejected(self):
+        wall_ms = 1_700_000_000_000
+        clock = HybridLogicalClock(wall_clock_ns=lambda: wall_ms * 1_000_000, max_drift_ms=500)
+        accepted = clock.update((wall_ms + 500) << 16)
+        self.assertEqual(physical_ms(accepted), wall_ms + 500)
+        with self.assertRaises(ClockDriftError):
+            clock.update((wall_ms + 3_600_000) << 16)
+        self.assertEqual(clock.last, accepted)
+
+    def test_format_matches_isoformat(self):
+        clock = HybridLogicalClock(wall_clock_ns=lambda: 1_758_412_800_123_000_000)
+        self.assertEqual(format_hlc(clock.now()), "2025-09-21T00:00:00.123000Z")
+
+
+class AlwaysMemoryDecoratorTests(unittest.TestCase):
+    """Decorator reuses its AlwaysMemory and wraps coroutine functions"""
+
+    def test_sync_function(self):
+        @always_memory(system_id="sync", tag_opaque_arguments=True)
+        def decide(x, *, policy=None):
+            return x * 2
+
+        self.assertEqual(decide(21, policy=object()), 42)
+        self.assertEqual(decide.__name__, "decide")
+        self.assertEqual(decide.memory.system_id, "sync")
+
+    def test_async_function_and_async_check(self):
+        seen = []
+
+        async def check(prompt):
+            seen.append(prompt)
+            return "weapons" if "weapon" in prompt else None
+
+        @always_memory(system_id="async", check_sacred_zero=check)
+        async def generate(prompt):
+            await asyncio.sleep(0)
+            return prompt.upper()
+
+        self.assertTrue(asyncio.iscoroutinefunction(generate))
+        self.assertEqual(asyncio.run(generate("weapon design")), "WEAPON DESIGN")
+        self.assertEqual(seen, ["weapon design"])
+
+    def test_argument_digest_is_canonical(self):
+        self.assertEqual(
+            hash_call_arguments(({"b": 1, "a": 2},), {}),
+            hash_call_arguments(({"a": 2, "b": 1},), {}),
+        )
+        self.assertNotEqual(hash_call_arguments((1,), {}), hash_call_arguments((), {"x": 1}))
+
+    def test_objects_are_hashed_by_content(self):
+        for make in (_Request, _SlottedRequest, _PlainRequest, lambda p: _Model(prompt=p)):
+            approve = hash_call_arguments((make("approve loan"),), {})
+            self.assertEqual(approve, hash_call_arguments((make("approve loan"),), {}))
+            self.assertNotEqual(
+                approve, hash_call_arguments((make("deny loan and delete audit trail"),), {})
+            )
+        self.assertNotEqual(
+            hash_call_arguments((_Request("approve loan"),), {}),
+            hash_call_arguments((_Appeal("approve loan"),), {}),
+        )
+        self.assertNotEqual(
+            hash_call_arguments((_Request("approve loan"),), {}),
+            hash_call_arguments(({"prompt": "approve loan"},), {}),
+        )
+
+    def test_opaque_arguments_are_tagged_by_type_only_on_request(self):
+        opaque = object()
+        with self.assertRaises(TypeError):
+            hash_call_arguments((opaque,), {})
+        self.assertEqual(
+            hash_call_arguments((opaque,), {}, tag_opaque=True),
+            hash_call_arguments((object(),), {}, tag_opaque=True),
+        )
+        self.assertNotEqual(
+            hash_call_arguments((opaque,), {}, tag_opaque=True),
+            hash_call_arguments((repr(opaque),), {}),
+        )
+        with self.assertRaises(TypeError):
+            canonical_digest(opaque)
+
+
+class InputHashCacheTests(unittest.TestCase):
+    """Cached digests equal fresh ones and are invalidated on mutation"""
+
+    def setUp(self):
+        self.cache = InputHashCache(min_size=10)
+        self.policy = {"system_prompt": "Be careful. " * 500, "rules": ["no", "spy"]}
+
+    def test_hit_returns_same_digest(self):
+        first = self.cache.digest(self.policy)
+        second = self.cache.digest(self.policy)
+        self.assertEqual(first, second)
+        self.assertEqual(first, canonical_digest(self.policy))
+        self.assertEqual(self.cache.stats()["hits"], 1)
+        self.assertEqual(self.cache.stats()["misses"], 1)
+
+    def test_mutation_invalidates(self):
+        self.cache.digest(self.policy)
+        self.policy["rules"].append("weapon")
+        self.assertEqual(self.cache.digest(self.policy), canonical_digest(self.policy))
+        self.assertEqual(self.cache.stats()["invalidations"], 1)
+        self.policy["system_prompt"] = "Be kind. " * 500
+        self.assertEqual(self.cache.digest(self.policy), canonical_digest(self.policy))
+
+    def test_small_and_opaque_inputs_are_not_cached(self):
+        self.cache.digest({"x": 1})
+        self.cache.digest(bytearray(b"mutable" * 100))
+        self.cache.digest([_PlainRequest("x" * 100)] * 3)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_lru_eviction(self):
+        cache = InputHashCache(max_entries=2, min_size=1)
+        docs = ["doc %d" % i for i in range(3)]
+        for doc in docs:
+            cache.digest(doc)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_call_digest_unchanged_by_cache(self):
+        args, kwargs = (self.policy, 3), {"context": ["a" * 2000]}
+        self.assertEqual(
+            hash_call_arguments(args, kwargs, self.cache), hash_call_arguments(args, kwargs)
+        )
+        self.assertEqual(
+            hash_call_arguments(args, kwargs, self.cache), hash_call_arguments(args, kwargs)
+        )
+        self.assertGreater(self.cache.stats()["hits"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
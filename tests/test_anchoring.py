@@ -0,0 +1,714 @@
+"""
+Multi-Chain Anchoring Test Suite
+Validates concurrent anchoring with quorum completion and per-backend timeouts
+Creator: Lev Goukassian (ORCID: 0009-0006-5966-1243)
+"""
+
+import hashlib
+import json
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+import sys
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "implementations")
+)
+
+from python_library.anchor_queue import AnchorQueue, AnchorQueueInUseError
+from python_library.anchor_scheduler import AnchorScheduler, ChainPolicy
+from python_library.blockchain import TMLBlockchain
+from python_library.chain_index import AnchorLogIndex
+from python_library.merkle import MerkleTree
+from python_library.rpc_provider import (
+    ANCHOR_EVENT_TOPIC,
+    JSONRPCClient,
+    LocalChain,
+    RPCError,
+    _JSONRPC,
+    decode_anchor_event,
+    encode_anchor_call,
+)
+from python_library.anchoring import (
+    CONFIRMED,
+    FAILED,
+    PENDING,
+    TIMED_OUT,
+    AnchorQuorum,
+    AnchorQuorumError,
+    MultiChainAnchorer,
+)
+
+
+def _after(seconds, proof=None, release=None):
+    def backend(anchor_hash):
+        if release is not None:
+            release.wait(5)
+        else:
+            time.sleep(seconds)
+        return proof or f"{anchor_hash}@{seconds}"
+
+    return backend
+
+
+def _failing(anchor_hash, leaf_count=1):
+    raise ConnectionError("rpc unavailable")
+
+
+class MultiChainAnchorerTests(unittest.TestCase):
+    """Anchors complete on quorum while slower backends finish in the background"""
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.anchorers = []
+
+    def tearDown(self):
+        self.release.set()
+        for anchorer in self.anchorers:
+            anchorer.close()
+
+    def _anchorer(self, backends, **options):
+        anchorer = MultiChainAnchorer(backends, **options)
+        self.anchorers.append(anchorer)
+        return anchorer
+
+    def test_backends_run_concurrently(self):
+        anchorer = self._anchorer({name: _after(0.2) for name in ("a", "b", "c", "d")})
+        started = time.monotonic()
+        receipt = anchorer.anchor("ab" * 32)
+        self.assertLess(time.monotonic() - started, 0.6)
+        self.assertTrue(receipt.complete)
+        self.assertEqual(sorted(receipt.results), ["a", "b", "c", "d"])
+
+    def test_returns_on_quorum_and_updates_receipt(self):
+        updates = []
+        anchorer = self._anchorer(
+            {
+                "polygon": _after(0.01, "0xpoly"),
+                "ethereum": _after(0.05, "0xeth"),
+                "bitcoin": _after(None, "ots", release=self.release),
+            },
+            quorum={"required": ["polygon"], "min_confirmations": 2},
+        )
+        receipt = anchorer.anchor("cd" * 32)
+        receipt.add_listener(lambda r, backend: updates.append(backend.backend))
+        self.assertTrue(receipt.quorum_met)
+        self.assertEqual(receipt.status()["bitcoin"], PENDING)
+        self.assertEqual(receipt.results, {"polygon": "0xpoly", "ethereum": "0xeth"})
+
+        self.release.set()
+        self.assertTrue(receipt.wait(5))
+        self.assertEqual(receipt.results["bitcoin"], "ots")
+        self.assertEqual(updates, ["bitcoin"])
+        self.assertEqual(receipt.to_dict()["backends"]["bitcoin"]["status"], CONFIRMED)
+
+    def test_required_backend_failure(self):
+        anchorer = self._anchorer(
+            {"polygon": _failing, "ethereum": _after(0.01), "ipfs": _after(0.01)},
+            quorum=AnchorQuorum(["polygon"], 2),
+        )
+        with self.assertRaises(AnchorQuorumError) as caught:
+            anchorer.anchor("ef" * 32)
+        self.assertEqual(caught.exception.receipt.status()["polygon"], FAILED)
+        self.assertIn(
+            "ConnectionError", caught.exception.receipt.to_dict()["backends"]["polygon"]["error"]
+        )
+
+    def test_timeout_counts_against_quorum_and_late_result_is_kept(self):
+        anchorer = self._anchorer(
+            {"polygon": _after(None, "0xlate", release=self.release), "ethereum": _after(0.01)},
+            quorum={"required": ["polygon"], "min_confirmations": 1},
+            timeouts={"polygon": 0.1},
+        )
+        started = time.monotonic()
+        with self.assertRaises(AnchorQuorumError) as caught:
+            anchorer.anchor("12" * 32)
+        self.assertLess(time.monotonic() - started, 1.0)
+        receipt = caught.exception.receipt
+        self.assertEqual(receipt.status()["polygon"], TIMED_OUT)
+
+        self.release.set()
+        deadline = time.monotonic() + 5
+        while receipt.status()["polygon"] != CONFIRMED and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(receipt.results["polygon"], "0xlate")
+
+    def test_unreachable_quorum_is_rejected(self):
+        with self.assertRaises(ValueError):
+            MultiChainAnchorer({"ethereum": _after(0)}, quorum={"required": ["polygon"]})
+        with self.assertRaises(ValueError):
+            MultiChainAnchorer({"ethereum": _after(0)}, quorum={"min_confirmations": 2})
+
+
+def _log_hash(index):
+    return hashlib.sha256(str(index).encode()).hexdigest()
+
+
+def _eventually(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return predicate()
+
+
+class _RecordingChain:
+    def __init__(self, fail_first=0, release=None):
+        self.roots = []
+        self.fail_first = fail_first
+        self.release = release
+
+    def __call__(self, root, leaf_count):
+        if self.release is not None:
+            self.release.wait(5)
+        if self.fail_first:
+            self.fail_first -= 1
+            raise TimeoutError("rpc timeout")
+        self.roots.append(root)
+        return f"tx{len(self.roots)}"
+
+
+class AnchorSchedulerTests(unittest.TestCase):
+    """Hashes are batched into one commitment per chain per flush"""
+
+    def test_cost_driven_flush_and_proofs(self):
+        chain = _RecordingChain()
+        # $0.005 per commitment meets $0.0005 per log at 10 logs
+        policy = ChainPolicy(latency_slo=60, cost_per_commitment=0.005)
+        self.assertEqual(policy.efficient_batch, 10)
+        with AnchorScheduler({"polygon": chain}, {"polygon": policy}) as scheduler:
+            hashes = [_log_hash(i) for i in range(25)]
+            for log_hash in hashes[:9]:
+                scheduler.submit(log_hash)
+            time.sleep(0.05)
+            self.assertEqual(chain.roots, [])
+            # The tenth hash makes a commitment cost-efficient well before the SLO
+            scheduler.submit(hashes[9])
+            self.assertTrue(_eventually(lambda: len(chain.roots) == 1))
+            for log_hash in hashes[10:]:
+                scheduler.submit(log_hash)
+            self.assertTrue(scheduler.flush(timeout=5))
+            stats = scheduler.stats()["polygon"]
+            self.assertEqual(stats["anchored_logs"], 25)
+            self.assertEqual(stats["commitments"], len(chain.roots))
+            self.assertLessEqual(stats["cost_per_log"], 0.0005 * 25 / 20)
+            for log_hash in hashes:
+                proof = scheduler.proof(log_hash, "polygon")
+                steps = [(bytes.fromhex(sibling[2:]), left) for sibling, left in proof["proof"]]
+                self.assertIn(proof["merkle_root"], chain.roots)
+                self.assertTrue(
+                    MerkleTree.verify(
+                        bytes.fromhex(log_hash), steps, bytes.fromhex(proof["merkle_root"][2:])
+                    )
+                )
+
+    def test_latency_slo_flush(self):
+        chain = _RecordingChain()
+        with AnchorScheduler({"polygon": chain}, {"polygon": {"latency_slo": 0.3}}) as scheduler:
+            for i in range(3):
+                scheduler.submit(_log_hash(i))
+            time.sleep(0.05)
+            self.assertEqual(chain.roots, [])
+            self.assertTrue(_eventually(lambda: len(chain.roots) == 1))
+            self.assertEqual(scheduler.proof(_log_hash(2), "polygon")["leaf_count"], 3)
+
+    def test_chains_flush_independently(self):
+        release = threading.Event()
+        polygon, bitcoin = _RecordingChain(), _RecordingChain(release=release)
+        scheduler = AnchorScheduler(
+            {"polygon": polygon, "bitcoin": bitcoin},
+            {"polygon": {"latency_slo": 0.05}, "bitcoin": {"latency_slo": 0.05}},
+        )
+        try:
+            scheduler.submit(_log_hash(1))
+            self.assertTrue(_eventually(lambda: len(polygon.roots) == 1))
+            scheduler.submit(_log_hash(2))
+            self.assertTrue(_eventually(lambda: len(polygon.roots) == 2))
+            self.assertEqual(bitcoin.roots, [])
+        finally:
+            release.set()
+            scheduler.close()
+        self.assertEqual(scheduler.stats()["bitcoin"]["anchored_logs"], 2)
+
+    def test_failed_commit_is_retried(self):
+        chain = _RecordingChain(fail_first=1)
+        policy = {"latency_slo": 60, "retry_interval": 0.05}
+        with AnchorScheduler({"polygon": chain}, {"polygon": policy}) as scheduler:
+            scheduler.submit(_log_hash(1))
+            self.assertFalse(scheduler.flush(timeout=5))
+            self.assertIsNone(scheduler.proof(_log_hash(1), "polygon"))
+            self.assertTrue(scheduler.flush(timeout=5))
+            self.assertEqual(scheduler.proof(_log_hash(1), "polygon")["result"], "tx1")
+
+    def test_retry_backoff_is_exponential_with_jitter(self):
+        policy = ChainPolicy(
+            latency_slo=5, retry_interval=1.0, max_retry_interval=30.0, retry_jitter=0.5
+        )
+        for failures, full in ((1, 1.0), (2, 2.0), (4, 8.0), (6, 30.0), (200, 30.0)):
+            delays = [policy.retry_delay(failures) for _ in range(50)]
+            self.assertTrue(all(full * 0.5 <= delay <= full for delay in delays))
+            self.assertGreater(len(set(delays)), 1)
+
+        chain = _RecordingChain(fail_first=3)
+        policy = {"latency_slo": 0.01, "retry_interval": 0.05, "retry_jitter": 0.0}
+        with AnchorScheduler({"polygon": chain}, {"polygon": policy}) as scheduler:
+            scheduler.submit(_log_hash(1))
+            self.assertTrue(
+                _eventually(lambda: scheduler.stats()["polygon"]["consecutive_failures"] == 2)
+            )
+            self.assertGreater(scheduler.stats()["polygon"]["retry_in_s"], 0.05)
+            self.assertTrue(_eventually(lambda: len(chain.roots) == 1))
+            stats = scheduler.stats()["polygon"]
+            self.assertEqual(stats["consecutive_failures"], 0)
+            self.assertEqual(stats["backlog"], 0)
+
+    def test_pending_hashes_survive_restart(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "anchor_queue.db")
+            policies = {
+                "polygon": {"latency_slo": 60, "retry_interval": 60},
+                "bitcoin": {"latency_slo": 60},
+            }
+            queue = AnchorQueue(path)
+            down, bitcoin = _RecordingChain(fail_first=1), _RecordingChain()
+            scheduler = AnchorScheduler(
+                {"polygon": down, "bitcoin": bitcoin}, policies, queue=queue
+            )
+            for i in range(3):
+                scheduler.submit(_log_hash(i))
+            self.assertFalse(scheduler.flush(timeout=5))
+            stats = scheduler.stats()
+            self.assertEqual(stats["polygon"]["backlog"], 3)
+            self.assertGreaterEqual(stats["polygon"]["oldest_pending_s"], 0)
+            self.assertEqual(stats["bitcoin"]["backlog"], 0)
+            metrics = queue.metrics()
+            self.assertEqual(set(metrics), {"polygon"})
+            self.assertEqual(metrics["polygon"]["backlog"], 3)
+            scheduler.close(flush=False)
+            queue.close()
+
+            queue = AnchorQueue(path)
+            polygon = _RecordingChain()
+            with AnchorScheduler(
+                {"polygon": polygon, "bitcoin": bitcoin}, policies, queue=queue
+            ) as scheduler:
+                self.assertEqual(scheduler.stats()["polygon"]["backlog"], 3)
+                self.assertTrue(scheduler.flush(timeout=5))
+                self.assertEqual(len(polygon.roots), 1)
+                self.assertEqual(scheduler.proof(_log_hash(2), "polygon")["leaf_count"], 3)
+            self.assertEqual(len(bitcoin.roots), 1)
+            self.assertEqual(len(queue), 0)
+            queue.close()
+
+
+def _serve(chain, drops=None):
+    """Serve a LocalChain over keep-alive HTTP on a free local port
+
+    While drops[0] is positive, requests are processed but the connection
+    is closed instead of answering them.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            result = chain.send(payload)
+            if drops and drops[0] > 0:
+                drops[0] -= 1
+                self.close_connection = True
+                return
+            body = json.dumps(result).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class RPCProviderTests(unittest.TestCase):
+    """Pooled JSON-RPC and the deterministic local chain"""
+
+    def _anchor(self, chain, data):
+        return chain.request("eth_sendTransaction", [{"to": "0x" + "aa" * 20, "data": data}])
+
+    def test_local_chain_is_deterministic(self):
+        chains = [LocalChain(block_time=2.0, clock=None) for _ in range(2)]
+        for chain in chains:
+            self.assertEqual(chain.block_number, 0)
+            self._anchor(chain, "0x" + "11" * 32)
+            chain.advance(5.0)
+        first, second = [
+            chain.request("eth_getBlockByNumber", ["latest", False]) for chain in chains
+        ]
+        self.assertEqual(first, second)
+        self.assertEqual(int(first["number"], 16), 2)
+        self.assertEqual(int(first["timestamp"], 16), chains[0].genesis_timestamp + 4)
+
+        block = chains[0].request("eth_getBlockByNumber", ["0x1", False])
+        receipt = chains[0].request("eth_getTransactionReceipt", [block["transactions"][0]])
+        self.assertEqual(receipt["blockHash"], block["hash"])
+        self.assertEqual(
+            int(receipt["effectiveGasPrice"], 16),
+            int(block["baseFeePerGas"], 16) + chains[0].priority_fee,
+        )
+        logs = chains[0].request(
+            "eth_getLogs",
+            [{"fromBlock": "0x0", "toBlock": "latest", "topics": [ANCHOR_EVENT_TOPIC]}],
+        )
+        self.assertEqual([log["data"] for log in logs], ["0x" + "11" * 32])
+
+    def test_base_fee_follows_block_fullness(self):
+        chain = LocalChain(block_time=1.0, clock=None, gas_limit=60_000)
+        for i in range(3):
+            self._anchor(chain, "0x" + "ff" * 32)
+        chain.advance(1.0)
+        full = chain.request("eth_getBlockByNumber", ["latest", False])
+        self.assertGreater(int(full["gasUsed"], 16), 30_000)
+        self.assertEqual(len(full["transactions"]), 2)  # the third one no longer fits
+        chain.advance(2.0)
+        fees = [
+            int(chain.request("eth_getBlockByNumber", [hex(n), False])["baseFeePerGas"], 16)
+            for n in range(4)
+        ]
+        self.assertLess(fees[1], fees[0])  # genesis is empty
+        self.assertGreater(fees[2], fees[1])
+        self.assertLess(fees[3], fees[2])
+
+    def test_errors_and_block_range_limit(self):
+        chain = LocalChain(clock=None, max_log_blocks=10)
+        with self.assertRaises(RPCError) as caught:
+            chain.request("eth_unknownMethod")
+        self.assertEqual(caught.exception.code, -32601)
+        chain.advance(100.0)
+        with self.assertRaises(RPCError):
+            chain.request("eth_getLogs", [{"fromBlock": "0x0", "toBlock": "latest"}])
+
+    def test_client_without_send_cannot_be_constructed(self):
+        class Incomplete(_JSONRPC):
+            pass
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+    def test_pooled_client_reuses_connections_and_batches(self):
+        chain = LocalChain(clock=None)
+        server = _serve(chain)
+        client = JSONRPCClient(f"http://127.0.0.1:{server.server_address[1]}/", pool_size=2)
+        try:
+            for _ in range(20):
+                self.assertEqual(client.request("eth_chainId"), hex(chain.chain_id))
+            self.assertEqual(client.pool.connections_opened, 1)
+
+            requests = chain.requests
+            results = client.batch(
+                [("eth_chainId", []), ("eth_blockNumber", []), ("net_version", [])]
+            )
+            self.assertEqual(results, [hex(chain.chain_id), "0x0", str(chain.chain_id)])
+            self.assertEqual(chain.requests, requests + 1)
+            with self.assertRaises(RPCError):
+                client.batch([("eth_chainId", []), ("eth_unknownMethod", [])])
+
+            threads = [
+                threading.Thread(
+                    target=lambda: [client.request("eth_blockNumber") for _ in range(20)]
+                )
+                for _ in range(4)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertLessEqual(client.pool.connections_opened, 2)
+        finally:
+            client.close()
+            server.shutdown()
+            server.server_close()
+
+    def test_dropped_response_is_resent_only_when_idempotent(self):
+        chain = LocalChain(clock=None)
+        drops = [0]
+        server = _serve(chain, drops)
+        client = JSONRPCClient(f"http://127.0.0.1:{server.server_address[1]}/", pool_size=1)
+        try:
+            client.request("eth_chainId")
+            drops[0] = 1
+            self.assertEqual(client.request("eth_blockNumber"), "0x0")
+
+            drops[0] = 1
+            requests = chain.requests
+            with self.assertRaises(ConnectionError):
+                client.request("eth_sendTransaction", [{"to": "0x" + "aa" * 20, "data": "0x11"}])
+            self.assertEqual(chain.requests, requests + 1)
+        finally:
+            client.close()
+            server.shutdown()
+            server.server_close()
+
+
+class AnchorLogIndexTests(unittest.TestCase):
+    """Anchor logs are indexed incrementally and survive reorgs"""
+
+    CONTRACT = "0x" + "cc" * 20
+    COMPANIES = ["0x" + "a1" * 20, "0x" + "b2" * 20]
+
+    def setUp(self):
+        # Providers commonly cap log queries at a block range
+        self.chain = LocalChain(block_time=1.0, clock=None, max_log_blocks=50)
+
+    def _anchor_blocks(self, blocks, company=0):
+        for block in range(blocks):
+            self.chain.request(
+                "eth_sendTransaction",
+                [
+                    {
+                        "from": self.COMPANIES[company],
+                        "to": self.CONTRACT,
+                        "data": "0x"
+                        + hashlib.sha256(
+                            f"{company}:{block}:{self.chain.block_number}".encode()
+                        ).hexdigest(),
+                    }
+                ],
+            )
+            self.chain.advance(1.0)
+
+    def test_incremental_sync_with_batched_ranges(self):
+        self._anchor_blocks(120, company=0)
+        self._anchor_blocks(30, company=1)
+        index = AnchorLogIndex(self.chain, contracts=[self.CONTRACT], batch_blocks=400)
+        self.assertEqual(index.sync(), 150)
+        self.assertLessEqual(index.batch_blocks, 50)
+        self.assertEqual(index.synced_block, 150)
+        self.assertEqual(index.count(self.COMPANIES[0]), 120)
+        self.assertEqual(index.count(self.COMPANIES[1].upper().replace("0X", "0x")), 30)
+        self.assertEqual(index.count(self.COMPANIES[0], from_block=101), 20)
+        self.assertEqual(index.logs(self.COMPANIES[1], limit=1)[0]["block_number"], 121)
+
+        self._anchor_blocks(3, company=1)
+        requests = self.chain.requests
+        self.assertEqual(index.sync(), 3)
+        # Head, checkpoint check and one batch for the new blocks
+        self.assertEqual(self.chain.requests - requests, 3)
+        self.assertEqual(index.count(self.COMPANIES[1]), 33)
+
+    def test_reorg_rolls_back_to_surviving_checkpoint(self):
+        index = AnchorLogIndex(self.chain, contracts=[self.CONTRACT], batch_blocks=10)
+        self._anchor_blocks(40)
+        index.sync()
+        self.assertEqual(index.count(self.COMPANIES[0]), 40)
+
+        self.chain.reorg(15, drop_transactions=True)
+        index.sync()
+        self.assertEqual(index.reorgs, 1)
+        self.assertEqual(index.count(self.COMPANIES[0]), 25)
+        tip = self.chain.request("eth_getBlockByNumber", ["latest", False])
+        self.assertEqual(index.synced_block, int(tip["number"], 16))
+
+        self.chain.reorg(5)  # the same transactions in new blocks
+        self._anchor_blocks(2)
+        index.sync()
+        self.assertEqual(index.reorgs, 2)
+        self.assertEqual(index.count(self.COMPANIES[0]), 27)
+        on_chain = self.chain.request(
+            "eth_getLogs", [{"fromBlock": "0x0", "address": self.CONTRACT}]
+        )
+        self.assertEqual(
+            [log["block_hash"] for log in index.logs(self.COMPANIES[0])],
+            [log["blockHash"] for log in on_chain],
+        )
+
+    def test_merkle_roots_count_their_leaves(self):
+        for leaves in (1, 4, 10):
+            root = hashlib.sha256(str(leaves).encode()).hexdigest()
+            self.chain.request(
+                "eth_sendTransaction",
+                [
+                    {
+                        "from": self.COMPANIES[0],
+                        "to": self.CONTRACT,
+                        "data": encode_anchor_call(root, leaves),
+                    }
+                ],
+            )
+            self.chain.advance(1.0)
+        index = AnchorLogIndex(self.chain, contracts=[self.CONTRACT])
+        self.assertEqual(index.sync(), 3)
+        self.assertEqual(index.count(self.COMPANIES[0]), 15)
+        self.assertEqual([log["leaf_count"] for log in index.logs(self.COMPANIES[0])], [1, 4, 10])
+        index.close()
+
+    def test_backfill_runs_in_the_background(self):
+        self._anchor_blocks(60)
+        index = AnchorLogIndex(self.chain, contracts=[self.CONTRACT], batch_blocks=10)
+        self.assertFalse(index.ready.is_set())
+        index.start()
+        self.assertTrue(index.ready.wait(5))
+        self.assertEqual(index.count(self.COMPANIES[0]), 60)
+        index.close()
+
+    def test_index_resumes_after_restart(self):
+        self._anchor_blocks(20)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "anchor_logs.db")
+            index = AnchorLogIndex(self.chain, path, contracts=[self.CONTRACT])
+            index.sync()
+            index.close()
+            self._anchor_blocks(5)
+            reopened = AnchorLogIndex(self.chain, path, contracts=[self.CONTRACT])
+            self.assertEqual(reopened.sync(), 5)
+            self.assertEqual(reopened.count(self.COMPANIES[0]), 25)
+            reopened.close()
+
+
+class OfflineBlockchainTests(unittest.TestCase):
+    """TMLBlockchain anchors against local chains without an RPC endpoint"""
+
+    def setUp(self):
+        self.chains = {
+            name: LocalChain(block_time=2.0, clock=None) for name in ("ethereum", "polygon")
+        }
+        self.tml = TMLBlockchain(self._config(anchor_schedule={"polygon": {"latency_slo": 60.0}}))
+
+    def _config(self, **overrides):
+        return dict(
+            {
+                "ethereum_rpc": self.chains["ethereum"],
+                "polygon_rpc": self.chains["polygon"],
+                "sacred_zero_contract": "0x" + "cc" * 20,
+                "penalty_contract": "0x" + "dd" * 20,
+                "whistleblower_contract": "0x" + "ee" * 20,
+                "anchor_account": "0x" + "a1" * 20,
+                "anchor_quorum": {"required": ["polygon", "ethereum"]},
+                "log_index_sync_interval": 0.0,
+                "sacred_zero_deploy_block": 0,
+                "anchor_queue_path": ":memory:",
+            },
+            **overrides,
+        )
+
+    def _wait_for_index(self, tml):
+        self.assertTrue(tml.log_index.ready.wait(5))
+
+    def tearDown(self):
+        self.tml.close()
+
+    def test_immediate_and_batched_anchors(self):
+        log_hashes = [
+            self.tml.create_always_memory_log({"action": "loan", "id": i}, immediate=(i == 0))
+            for i in range(5)
+        ]
+        receipt = self.tml.anchor_receipt(log_hashes[0])
+        self.assertTrue(receipt.quorum_met)
+        self.assertTrue(self.tml.anchor_scheduler.flush(timeout=5))
+
+        polygon = self.chains["polygon"]
+        polygon.advance(2.0)
+        tx = polygon.request("eth_getTransactionByHash", [receipt.results["polygon"]])
+        self.assertEqual(tx["input"], encode_anchor_call(log_hashes[0], 1))
+        root = self.tml.anchor_proof(log_hashes[3], "polygon")["merkle_root"]
+        logs = polygon.request("eth_getLogs", [{"fromBlock": "0x1", "address": "0x" + "cc" * 20}])
+        self.assertEqual(
+            [decode_anchor_event(log["data"]) for log in logs],
+            [("0x" + log_hashes[0], 1), (root, 5)],
+        )
+        self._wait_for_index(self.tml)
+        self.tml.log_index.sync(force=True)
+        # The immediate log is also in the batched root
+        self.assertEqual(self.tml._count_blockchain_logs("0x" + "a1" * 20), 6)
+        self.assertEqual(self.tml._count_blockchain_logs("0x" + "b2" * 20), 0)
+
+    def test_compliance_is_not_judged_during_backfill(self):
+        self.tml.close()
+        # Nothing listens on the discard port, so the backfill keeps retrying
+        self.tml = TMLBlockchain(self._config(polygon_rpc="http://127.0.0.1:9"))
+        verdict = self.tml.verify_compliance("0x" + "a1" * 20)
+        self.assertIsNone(verdict["compliant"])
+        self.assertEqual(verdict["status"], "INDEX_BACKFILLING")
+
+    def test_only_implemented_backends_are_used(self):
+        config = self._config()
+        del config["anchor_quorum"]
+        tml = TMLBlockchain(config)
+        try:
+            self.assertEqual(sorted(tml.anchor_scheduler.chains), ["ethereum", "polygon"])
+            log_hash = tml.create_always_memory_log({"action": "loan"}, immediate=True)
+            self.assertEqual(sorted(tml.anchor_receipt(log_hash).status()), ["ethereum", "polygon"])
+            self.assertTrue(tml.anchor_scheduler.flush(timeout=5))
+            self.assertEqual(len(tml.anchor_queue), 0)
+        finally:
+            tml.close()
+
+    def test_compliance_is_answered_from_the_index(self):
+        self._wait_for_index(self.tml)
+        self.tml._calculate_expected_logs = lambda company: 0
+        polygon = self.chains["polygon"]
+        with self.tml.log_index._sync_lock:  # a sync waiting on the chain
+            requests = polygon.requests
+            verdict = self.tml.verify_compliance("0x" + "a1" * 20)
+        self.assertEqual(polygon.requests, requests)
+        self.assertTrue(verdict["compliant"])
+        self.assertEqual(verdict["synced_block"], self.tml.log_index.synced_block)
+        self.assertGreaterEqual(verdict["index_age_s"], 0)
+
+    def test_missing_deploy_block_falls_back_to_genesis(self):
+        config = self._config()
+        del config["sacred_zero_deploy_block"]
+        with self.assertLogs("python_library.blockchain", "WARNING"):
+            tml = TMLBlockchain(config)
+        try:
+            self.assertEqual(tml.log_index.start_block, 0)
+        finally:
+            tml.close()
+
+    def test_log_index_is_kept_next_to_the_anchor_queue(self):
+        with tempfile.TemporaryDirectory() as directory:
+            tml = TMLBlockchain(
+                self._config(anchor_queue_path=os.path.join(directory, "anchor_queue.db"))
+            )
+            tml.close()
+            self.assertEqual(tml.log_index.path, os.path.join(directory, "anchor_logs.db"))
+            self.assertTrue(os.path.exists(tml.log_index.path))
+
+    def test_anchor_queue_defaults_to_one_file_per_process(self):
+        config = self._config()
+        del config["anchor_queue_path"]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "state", "anchor_queue.db")
+            with mock.patch.dict(os.environ, {"TML_ANCHOR_QUEUE_PATH": path}):
+                tml = TMLBlockchain(config)
+            try:
+                self.assertEqual(tml.anchor_queue.path, path)
+                with self.assertRaises(AnchorQueueInUseError):
+                    AnchorQueue(path)
+            finally:
+                tml.close()
+            AnchorQueue(path).close()
+
+    def test_anchor_outage_does_not_reach_the_caller(self):
+        self.tml._anchor_ethereum = _failing
+        self.tml._anchor_polygon = _failing
+        log_hash = self.tml.create_always_memory_log({"action": "loan"}, immediate=True)
+        self.assertFalse(self.tml.anchor_receipt(log_hash).quorum_met)
+        metrics = self.tml.anchor_metrics()["polygon"]
+        self.assertEqual(metrics["queued"], 1)
+        self.assertGreaterEqual(metrics["oldest_queued_s"], 0)
+
+        del self.tml._anchor_polygon
+        self.assertTrue(self.tml.anchor_scheduler.flush(timeout=5))
+        self.assertEqual(self.tml.anchor_metrics()["polygon"]["queued"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
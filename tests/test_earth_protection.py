@@ -0,0 +1,963 @@
+"""
+Earth Protection Test Suite
+Validates harm screening and community checks in the Python library
+Creator: Lev Goukassian (ORCID: 0009-0006-5966-1243)
+"""
+
+import asyncio
+import contextlib
+import io
+import json
+import math
+import random
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+import sys
+import os
+
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "implementations")
+)
+
+from python_library import harm_batch
+from python_library.earth import (
+    HARM_INDICATORS,
+    CommunityRegistry,
+    EarthProtection,
+    GovernanceProtocol,
+    check_environmental_harm,
+    configure_earth_protection,
+    default_earth_protection,
+    validate_community_directive,
+    with_earth_protection,
+)
+from python_library.community_store import SQLiteCommunityStore
+from python_library.eco_ingest import EcologicalEventIngestor, event_harm_record
+from python_library.eco_rules import DEFAULT_ECO_HARM_RULES, EcoHarmRuleEngine, load_rule_file
+from python_library.harm_matcher import DIRECT_SCAN_MAX_KEYWORDS, HarmMatcher, compile_harm_matcher
+from python_library.schema_validator import SchemaError, compile_schema, earth_validators
+from python_library.segment_store import SegmentStore
+from python_library.stewardship_ledger import StewardshipAward, StewardshipLedger
+from python_library.spatial import SpatialIndex, TileCoverIndex, geohash, parse_territory
+
+
+def _square(x, y, size):
+    return [[x, y], [x + size, y], [x + size, y + size], [x, y + size], [x, y]]
+
+
+def _substring_categories(vocabulary, text):
+    lowered = text.lower()
+    return [
+        category
+        for category, keywords in vocabulary.items()
+        if any(keyword in lowered for keyword in keywords)
+    ]
+
+
+class HarmMatcherTests(unittest.TestCase):
+    """Compiled matcher keeps `keyword in action.lower()` semantics"""
+
+    def test_matches_substring_semantics(self):
+        rng = random.Random(11)
+        for trial in range(300):
+            # Tiny alphabet forces overlapping, nested and prefix-sharing keywords
+            vocabulary = {
+                f"harm_{c}": [
+                    "".join(rng.choice("abc") for _ in range(rng.randint(0, 4)))
+                    for _ in range(rng.randint(0, 3))
+                ]
+                for c in range(rng.randint(1, 6))
+            }
+            padding = {f"pad_{i}": [f"zz{i:03d}"] for i in range(DIRECT_SCAN_MAX_KEYWORDS)}
+            for vocab in (vocabulary, {**vocabulary, **padding}):
+                matcher = HarmMatcher(vocab)
+                for _ in range(10):
+                    text = "".join(rng.choice("abcAB ") for _ in range(rng.randint(0, 20)))
+                    with self.subTest(trial=trial, vocab=vocab, text=text):
+                        self.assertEqual(matcher.match(text), _substring_categories(vocab, text))
+
+    def test_large_vocabulary_on_long_document(self):
+        vocabulary = dict(HARM_INDICATORS)
+        vocabulary.update({f"custom_{i}": [f"hazard{i}", f"spill{i}"] for i in range(200)})
+        document = "routine maintenance report. " * 5000 + "spill42 in the FOSSIL storage"
+        matcher = HarmMatcher(vocabulary)
+        self.assertEqual(matcher.match(document), _substring_categories(vocabulary, document))
+        self.assertEqual(matcher.match(document), ["carbon_intensive", "custom_4", "custom_42"])
+
+    def test_compiled_once_per_version(self):
+        first = compile_harm_matcher("test-v1", {"a": ["x"]})
+        self.assertIs(compile_harm_matcher("test-v1", {"a": ["x"]}), first)
+        self.assertIsNot(compile_harm_matcher("test-v1", {"a": ["y"]}), first)
+        self.assertIs(EarthProtection().harm_matcher, EarthProtection().harm_matcher)
+
+
+class EnvironmentalHarmTests(unittest.TestCase):
+    """check_environmental_harm result shape"""
+
+    def setUp(self):
+        self.earth = EarthProtection()
+
+    def test_reports_categories_in_rule_order(self):
+        result = self.earth.check_environmental_harm("Industrial LOGGING and mining expansion")
+        self.assertTrue(result["triggered"])
+        self.assertEqual(
+            result["harm_types"], ["deforestation", "habitat_destruction", "carbon_intensive"]
+        )
+        self.assertEqual(result["sacred_zero_trigger"], "planetary_harm")
+
+    def test_benign_action(self):
+        self.assertEqual(
+            self.earth.check_environmental_harm("plant native trees"), {"triggered": False}
+        )
+
+    def test_irreversibility_without_keywords(self):
+        result = self.earth.check_environmental_harm(
+            "survey", resource_impact={"recovery_years": 60, "species_affected": 2}
+        )
+        self.assertTrue(result["triggered"])
+        self.assertEqual(result["harm_types"], [])
+        self.assertAlmostEqual(result["irreversibility_score"], 1.0)
+
+
+class HarmBatchTests(unittest.TestCase):
+    """Batch scoring agrees with check_environmental_harm record by record"""
+
+    def setUp(self):
+        self.earth = EarthProtection()
+        rng = random.Random(3)
+        words = ["survey", "logging", "coal combustion", "river diversion", "school", "Mining"]
+        self.records = []
+        for _ in range(400):
+            impact = rng.choice(
+                [
+                    None,
+                    {},
+                    {"recovery_years": rng.choice([0, 5, 10, 11, 50, 51, 200])},
+                    {
+                        "recovery_years": rng.choice([0, 30, 80]),
+                        "species_affected": rng.choice([0, 1, 7]),
+                    },
+                ]
+            )
+            self.records.append({"action": rng.choice(words) + " plan", "resource_impact": impact})
+
+    def _assert_matches_scalar(self, result):
+        self.assertEqual(len(result), len(self.records))
+        for index, record in enumerate(self.records):
+            expected = self.earth.check_environmental_harm(
+                record["action"], resource_impact=record["resource_impact"]
+            )
+            with self.subTest(index=index, record=record):
+                self.assertEqual(bool(result.triggered[index]), expected["triggered"])
+                if len(expected) > 1:
+                    self.assertEqual(result.harm_types(index), expected["harm_types"])
+                    self.assertEqual(
+                        float(result.irreversibility_score[index]),
+                        expected["irreversibility_score"],
+                    )
+                    if expected["harm_types"] or expected["irreversibility_score"]:
+                        self.assertEqual(result.record(index), expected)
+
+    def test_records_without_numpy(self):
+        with mock.patch.object(harm_batch, "np", None):
+            result = self.earth.check_environmental_harm_batch(records=self.records)
+        self.assertIsInstance(result.irreversibility_score, list)
+        self._assert_matches_scalar(result)
+
+    @unittest.skipIf(harm_batch.np is None, "numpy not installed")
+    def test_numpy_columns(self):
+        actions, columns = harm_batch.harm_batch_columns(self.records)
+        np = harm_batch.np
+        result = self.earth.check_environmental_harm_batch(
+            actions,
+            np.array(columns["recovery_years"], dtype=float),
+            np.array(columns["species_affected"]),
+        )
+        self._assert_matches_scalar(result)
+
+    def test_column_lengths_must_agree(self):
+        with self.assertRaises(ValueError):
+            self.earth.check_environmental_harm_batch(["a", "b"], [1])
+        result = self.earth.check_environmental_harm_batch(recovery_years=[60, 0])
+        self.assertEqual([bool(t) for t in result.triggered], [True, False])
+
+
+class EcoHarmRuleEngineTests(unittest.TestCase):
+    """Versioned screening rules load, hot-reload and roll back"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "rules.json")
+        self._write(
+            {
+                "version": "test-2030-01-01",
+                "harm_categories": {"noise": ["blasting"]},
+                "irreversibility": {
+                    "trigger_above": 0.5,
+                    "max_score": 1.0,
+                    "factors": {"acres_cleared": [{"above": 100, "score": 0.6}]},
+                },
+            }
+        )
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _write(self, data):
+        with open(self.path, "w") as handle:
+            json.dump(data, handle)
+        # Distinct mtime even on coarse-grained filesystems
+        stamp = time.time() + len(os.listdir(self.directory.name)) + random.random()
+        os.utime(self.path, (stamp, stamp))
+
+    def test_shipped_rules_match_builtin(self):
+        path = os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            "policies",
+            "earth",
+            "ECO_HARM_SCREENING.yaml",
+        )
+        shipped = load_rule_file(path)
+        self.assertEqual(
+            {key: shipped[key] for key in DEFAULT_ECO_HARM_RULES}, DEFAULT_ECO_HARM_RULES
+        )
+        engine = EcoHarmRuleEngine(path, check_interval=None)
+        self.assertEqual(engine.version, shipped["version"])
+        self.assertTrue(
+            EarthProtection(rules=engine).check_environmental_harm("logging road")["triggered"]
+        )
+
+    def test_hot_reload_and_rollback(self):
+        engine = EcoHarmRuleEngine(self.path, check_interval=0)
+        earth = EarthProtection(rules=engine)
+        result = earth.check_environmental_harm(
+            "quarry blasting", resource_impact={"acres_cleared": 120}
+        )
+        self.assertEqual(result["harm_types"], ["noise"])
+        self.assertEqual(result["eco_harm_rules_version"], "test-2030-01-01")
+        self.assertFalse(earth.check_environmental_harm("logging")["triggered"])
+
+        first = engine.current()
+        self._write(dict(DEFAULT_ECO_HARM_RULES, version="test-2030-02-01"))
+        self.assertEqual(earth.eco_harm_rules_version, "test-2030-02-01")
+        self.assertTrue(earth.check_environmental_harm("logging")["triggered"])
+        batch = earth.check_environmental_harm_batch(["logging", "blasting"])
+        self.assertEqual(batch.eco_harm_rules_version, "test-2030-02-01")
+
+        engine.activate("test-2030-01-01")
+        self.assertIs(engine.current(), first)
+
+    def test_invalid_file_keeps_active_rules(self):
+        engine = EcoHarmRuleEngine(self.path, check_interval=0)
+        active = engine.current()
+        self._write({"version": "test-broken", "harm_categories": ["not", "a", "mapping"]})
+        with self.assertLogs("python_library.eco_rules", "WARNING"):
+            self.assertIs(engine.current(), active)
+
+    def test_same_version_compiled_once(self):
+        engine = EcoHarmRuleEngine(self.path, check_interval=None)
+        other = EcoHarmRuleEngine(self.path, check_interval=None)
+        self.assertIs(engine.current(), other.current())
+
+
+class SpatialIndexTests(unittest.TestCase):
+    """Exact point-in-polygon lookup of community territories"""
+
+    def test_holes_and_multipolygons(self):
+        geometry = parse_territory(
+            {
+                "type": "MultiPolygon",
+                "coordinates": [[_square(0, 0, 10), _square(4, 4, 2)], [_square(20, 20, 1)]],
+            }
+        )
+        self.assertTrue(geometry.contains(1, 1))
+        self.assertFalse(geometry.contains(5, 5))
+        self.assertTrue(geometry.contains(20.5, 20.5))
+        self.assertFalse(geometry.contains(15, 15))
+
+    def test_registration_boundary_formats(self):
+        feature = {
+            "type": "Feature",
+            "geometry": {"type": "Polygon", "coordinates": [_square(0, 0, 1)]},
+        }
+        wrapped = {
+            "description": "river basin",
+            "boundaries": {
+                "type": "coordinates",
+                "points": [
+                    {"lat": 0, "lng": 0},
+                    {"lat": 0, "lng": 1},
+                    {"lat": 1, "lng": 1},
+                    {"lat": 1, "lng": 0},
+                ],
+            },
+        }
+        for territory in (feature, wrapped, {"boundaries": {"type": "geojson", "data": feature}}):
+            with self.subTest(territory=territory):
+                self.assertTrue(parse_territory(territory).contains(0.5, 0.5))
+        self.assertIsNone(parse_territory({"description": "the northern valleys"}))
+        with self.assertRaises(ValueError):
+            parse_territory({"type": "Polygon", "coordinates": [[[0, 0], [1, 1]]]})
+
+    def test_matches_brute_force(self):
+        rng = random.Random(5)
+        index = SpatialIndex(cell_size=1.0, max_cells=16)
+        geometries = {}
+        for key in range(300):
+            size = rng.choice([0.3, 2.5, 9.0])
+            geometries[key] = parse_territory(
+                {
+                    "type": "Polygon",
+                    "coordinates": [_square(rng.uniform(-20, 20), rng.uniform(-20, 20), size)],
+                }
+            )
+            index.insert(key, geometries[key])
+        for key in range(0, 300, 7):
+            index.remove(key)
+            del geometries[key]
+        for _ in range(500):
+            x, y = rng.uniform(-22, 30), rng.uniform(-22, 30)
+            expected = [key for key, geometry in geometries.items() if geometry.contains(x, y)]
+            self.assertEqual(index.query(x, y), expected)
+
+
+class TileCoverTests(unittest.TestCase):
+    """Tile cover lookups agree with exact geometry"""
+
+    def _blob(self, rng, cx, cy, radius, vertices):
+        ring = [
+            [
+                cx + radius * rng.uniform(0.3, 1) * math.cos(2 * math.pi * i / vertices),
+                cy + radius * rng.uniform(0.3, 1) * math.sin(2 * math.pi * i / vertices),
+            ]
+            for i in range(vertices)
+        ]
+        return ring + [ring[0]]
+
+    def test_matches_exact_index(self):
+        rng = random.Random(21)
+        for precision, max_tiles in ((5, 4096), (4, 64)):
+            tiles = TileCoverIndex(precision=precision, max_tiles=max_tiles, hot_tiles=64)
+            exact = SpatialIndex()
+            for key in range(120):
+                cx, cy = rng.uniform(-4, 4), rng.uniform(-4, 4)
+                rings = [self._blob(rng, cx, cy, rng.choice([0.05, 0.4, 1.5]), rng.randint(3, 30))]
+                if rng.random() < 0.3:
+                    rings.append(self._blob(rng, cx, cy, 0.02, 5))
+                geometry = parse_territory({"type": "Polygon", "coordinates": rings})
+                tiles.insert(key, geometry)
+                exact.insert(key, geometry)
+            for key in range(0, 120, 7):
+                tiles.remove(key)
+                exact.remove(key)
+            for _ in range(3000):
+                x, y = rng.gauss(0, 2), rng.gauss(0, 2)
+                with self.subTest(precision=precision, x=x, y=y):
+                    self.assertEqual(tiles.query(x, y), exact.query(x, y))
+
+    def test_tiles_are_geohash_cells(self):
+        self.assertEqual(geohash(57.64911, 10.40744, 11), "u4pruydqqvj")
+        tiles = TileCoverIndex(precision=5)
+        rng = random.Random(4)
+        for _ in range(500):
+            x, y = rng.uniform(-180, 179.9), rng.uniform(-90, 89.9)
+            box = tiles.tile_bbox(tiles.tile(x, y))
+            self.assertEqual(
+                geohash((box[1] + box[3]) / 2, (box[0] + box[2]) / 2, 5), geohash(y, x, 5)
+            )
+
+    def test_grid_aligned_territory(self):
+        tiles = TileCoverIndex(precision=3)
+        width, height = tiles.tile_width, tiles.tile_height
+        geometry = parse_territory(
+            {
+                "type": "Polygon",
+                "coordinates": [
+                    [[0, 0], [2 * width, 0], [2 * width, 2 * height], [0, 2 * height], [0, 0]]
+                ],
+            }
+        )
+        tiles.insert("square", geometry)
+        rng = random.Random(6)
+        for _ in range(2000):
+            x, y = rng.uniform(-width, 3 * width), rng.uniform(-height, 3 * height)
+            self.assertEqual(tiles.query(x, y), ["square"] if geometry.contains(x, y) else [])
+
+
+class CommunityDirectiveTests(unittest.TestCase):
+    """Location-based directive checks see every overlapping territory"""
+
+    def setUp(self):
+        self.earth = EarthProtection()
+        self.river = self.earth.register_community(
+            "River Council",
+            {"type": "Polygon", "coordinates": [_square(0, 0, 10)]},
+            GovernanceProtocol.CONSENSUS_COUNCIL,
+            [{"keywords": "dam, diversion"}],
+        )["community_id"]
+        self.forest = self.earth.register_community(
+            "Forest Assembly",
+            {"type": "Polygon", "coordinates": [_square(5, 5, 10)]},
+            GovernanceProtocol.FPIC_PROCESS,
+            [{"keywords": "logging"}],
+        )["community_id"]
+
+    def test_overlapping_territories(self):
+        self.assertEqual(
+            self.earth.find_communities_by_location({"lat": 7, "lon": 7}), [self.river, self.forest]
+        )
+        self.assertEqual(
+            self.earth.find_communities_by_location({"lat": 2, "lng": 2}), [self.river]
+        )
+        self.assertEqual(self.earth.find_communities_by_location({"lat": 50, "lon": 50}), [])
+
+    def test_directive_from_any_governing_community(self):
+        result = self.earth.check_community_directive("selective logging", {"lat": 7, "lon": 7})
+        self.assertTrue(result["has_directive"])
+        self.assertEqual(result["community_id"], self.forest)
+        self.assertEqual(result["governing_communities"], [self.river, self.forest])
+        self.assertFalse(
+            self.earth.check_community_directive("selective logging", {"lat": 2, "lon": 2})[
+                "has_directive"
+            ]
+        )
+        self.assertEqual(
+            self.earth.check_community_directive("logging", {"lat": 50, "lon": 50}),
+            {"has_directive": False},
+        )
+
+
+class ProtectionIndexTests(unittest.TestCase):
+    """Indexed directive checks agree with per-protection keyword scans"""
+
+    def test_matches_per_protection_scan(self):
+        earth = EarthProtection()
+        rng = random.Random(8)
+        words = ["dam", "damage", "sacred grove", "Fishing", "net", "burn", "road", "salmon run"]
+        protections = [
+            {"name": f"p{i}", "keywords": ", ".join(rng.sample(words, rng.randint(1, 3)))}
+            for i in range(120)
+        ]
+        community = earth.register_community(
+            "Watershed Nations",
+            {"description": "upper basin"},
+            GovernanceProtocol.CONSENSUS_COUNCIL,
+            protections,
+        )
+        community_id = community["community_id"]
+        for _ in range(200):
+            action = " ".join(rng.sample(words + ["survey", "school"], 3)).upper()
+            expected = [p for p in protections if earth._violates_protection(action, p)]
+            result = earth.check_community_directive(action, {}, community_id)
+            self.assertEqual(result["violations"], expected)
+            self.assertEqual(result["has_directive"], bool(expected))
+
+    def test_update_reindexes_community(self):
+        earth = EarthProtection()
+        community_id = earth.register_community(
+            "Reef Keepers", {}, GovernanceProtocol.ELDER_COUNCIL, [{"keywords": "anchoring"}]
+        )["community_id"]
+        self.assertTrue(
+            earth.check_community_directive("boat anchoring", {}, community_id)["has_directive"]
+        )
+        self.assertTrue(earth.update_protections(community_id, [{"keywords": "Trawling"}]))
+        self.assertFalse(
+            earth.check_community_directive("boat anchoring", {}, community_id)["has_directive"]
+        )
+        self.assertEqual(
+            earth.check_community_directive("bottom trawling", {}, community_id)["violations"],
+            [{"keywords": "Trawling"}],
+        )
+        self.assertFalse(earth.update_protections("unknown", []))
+
+
+class PersistentRegistryTests(unittest.TestCase):
+    """SQLite-backed registry survives restarts and is shared between handles"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "communities.db")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _register(self, earth, name, x, protocol=GovernanceProtocol.CONSENSUS_COUNCIL):
+        return earth.register_community(
+            name,
+            {"type": "Polygon", "coordinates": [_square(x, 0, 2)]},
+            protocol,
+            [{"keywords": "quarry"}],
+        )["community_id"]
+
+    def test_restart_and_location_lookup(self):
+        with SQLiteCommunityStore(self.path) as store:
+            earth = EarthProtection(registry=store)
+            first = self._register(earth, "Hill Clans", 0)
+            second = self._register(earth, "Lake Council", 1, GovernanceProtocol.ELDER_COUNCIL)
+            self._register(earth, "No Territory", 50)
+
+        with SQLiteCommunityStore(self.path, cache_size=1, geometry_cache_size=1) as store:
+            earth = EarthProtection(registry=store)
+            self.assertEqual(len(store), 3)
+            self.assertEqual(
+                earth.find_communities_by_location({"lat": 1, "lon": 1.5}), [first, second]
+            )
+            self.assertEqual(earth.find_communities_by_location({"lat": 1, "lon": 2.5}), [second])
+            self.assertEqual(earth.find_communities_by_location({"lat": 1, "lon": 9}), [])
+            self.assertEqual(store.by_governance("elder_council"), [second])
+            self.assertEqual(store[first]["territory"]["type"], "Polygon")
+            result = earth.check_community_directive("new quarry", {"lat": 1, "lon": 0.5})
+            self.assertEqual(result["community_id"], first)
+            self.assertTrue(result["has_directive"])
+
+    def test_handles_see_each_others_writes(self):
+        with (
+            SQLiteCommunityStore(self.path) as writer_store,
+            SQLiteCommunityStore(self.path) as reader_store,
+        ):
+            writer = CommunityRegistry(EarthProtection(registry=writer_store))
+            reader = EarthProtection(registry=reader_store)
+            community_id = self._register(writer.earth_protection, "Coast Guardians", 0)
+            self.assertEqual(reader.registered_communities[community_id]["stewardship_tokens"], 100)
+            self.assertEqual(
+                writer.award_stewardship_tokens(community_id, 25, "water samples")["new_balance"],
+                125,
+            )
+            self.assertEqual(reader.registered_communities[community_id]["stewardship_tokens"], 125)
+            writer.earth_protection.update_protections(community_id, [{"keywords": "trawling"}])
+            self.assertTrue(
+                reader.check_community_directive("trawling", {}, community_id)["has_directive"]
+            )
+            self.assertFalse(
+                reader.check_community_directive("quarry", {}, community_id)["has_directive"]
+            )
+            del writer_store[community_id]
+            self.assertNotIn(community_id, reader_store)
+
+    def test_awards_from_separate_handles_are_not_lost(self):
+        with (
+            SQLiteCommunityStore(self.path) as first_store,
+            SQLiteCommunityStore(self.path) as second_store,
+        ):
+            first = CommunityRegistry(EarthProtection(registry=first_store))
+            second = CommunityRegistry(EarthProtection(registry=second_store))
+            community_id = self._register(first.earth_protection, "Coast Guardians", 0)
+            self.assertEqual(
+                first.award_stewardship_tokens(community_id, 10, "a")["new_balance"], 110
+            )
+            self.assertEqual(
+                second.award_stewardship_tokens(community_id, 5, "b")["new_balance"], 115
+            )
+            self.assertEqual(
+                first.award_stewardship_tokens(community_id, 1, "c")["new_balance"], 116
+            )
+            results = second.award_stewardship_tokens_batch(
+                [(community_id, 2, "d"), (community_id, 3, "e")]
+            )
+            self.assertEqual([result["new_balance"] for result in results], [118, 121])
+            self.assertEqual(first_store[community_id]["stewardship_tokens"], 121)
+
+    def test_award_ids_are_applied_once(self):
+        with SQLiteCommunityStore(self.path) as store:
+            earth = EarthProtection(registry=store)
+            community_id = self._register(earth, "Coast Guardians", 0)
+            self.assertEqual(
+                store.add_stewardship_tokens({community_id: 5}, "award-1"), {community_id: 105}
+            )
+            self.assertEqual(
+                store.add_stewardship_tokens({community_id: 5}, "award-1"), {community_id: 105}
+            )
+            self.assertEqual(store[community_id]["stewardship_tokens"], 105)
+
+    def test_protection_index_survives_unrelated_writes(self):
+        with (
+            SQLiteCommunityStore(self.path) as writer_store,
+            SQLiteCommunityStore(self.path) as reader_store,
+        ):
+            writer = EarthProtection(registry=writer_store)
+            reader = EarthProtection(registry=reader_store)
+            community_id = self._register(writer, "Coast Guardians", 0)
+            self.assertTrue(
+                reader.check_community_directive("new quarry", {}, community_id)["has_directive"]
+            )
+            self.assertEqual(len(reader._protection_index), 1)
+            self._register(writer, "River Council", 5)
+            with mock.patch.object(
+                reader, "_index_protections", wraps=reader._index_protections
+            ) as index_protections:
+                for _ in range(3):
+                    self.assertTrue(
+                        reader.check_community_directive("new quarry", {}, community_id)[
+                            "has_directive"
+                        ]
+                    )
+                index_protections.assert_not_called()
+                writer.update_protections(community_id, [{"keywords": "trawling"}])
+                self.assertFalse(
+                    reader.check_community_directive("new quarry", {}, community_id)[
+                        "has_directive"
+                    ]
+                )
+                index_protections.assert_called_once()
+
+    def test_reloaded_records_are_not_redigested(self):
+        with SQLiteCommunityStore(self.path, cache_size=0) as store:
+            earth = EarthProtection(registry=store)
+            community_id = self._register(earth, "Coast Guardians", 0)
+            self.assertIsNot(store[community_id], store[community_id])
+            with mock.patch("python_library.earth.canonical_digest") as digest:
+                for _ in range(3):
+                    self.assertTrue(
+                        earth.check_community_directive("new quarry", {}, community_id)[
+                            "has_directive"
+                        ]
+                    )
+                digest.assert_not_called()
+
+    def test_open_classmethod(self):
+        registry = CommunityRegistry.open(self.path)
+        community_id = self._register(registry.earth_protection, "Valley Assembly", 0)
+        registry.earth_protection.registered_communities.close()
+        reopened = CommunityRegistry.open(self.path)
+        self.assertTrue(reopened.validate_community_directive({}, community_id))
+        reopened.earth_protection.registered_communities.close()
+
+
+class StewardshipLedgerTests(unittest.TestCase):
+    """Concurrent awards never lose updates and the history replays"""
+
+    def test_concurrent_awards(self):
+        ledger = StewardshipLedger(opening_balance=lambda community_id: 100, stripes=4)
+        communities = [f"com_{i}" for i in range(6)]
+
+        def worker(seed):
+            rng = random.Random(seed)
+            for _ in range(50):
+                batch = [(rng.choice(communities), 1, "sample") for _ in range(rng.randint(1, 5))]
+                if len(batch) == 1:
+                    ledger.award(*batch[0])
+                else:
+                    ledger.award_batch(batch)
+
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        history = list(ledger.history())
+        awarded = {community_id: 0 for community_id in communities}
+        for record in history:
+            awarded[record.community_id] += record.amount
+        for community_id in communities:
+            self.assertEqual(ledger.balance(community_id), 100 + awarded[community_id])
+        self.assertEqual(ledger.replay(), {c: ledger.balance(c) for c in communities if awarded[c]})
+        timestamps = [record.timestamp for record in history]
+        self.assertEqual(timestamps, sorted(timestamps))
+
+    def test_durable_history_replays_after_restart(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with SegmentStore(directory) as store:
+                ledger = StewardshipLedger(store, opening_balance=lambda community_id: 10)
+                records = ledger.award_batch(
+                    [("com_a", 5, "water"), ("com_b", 7, "soil"), ("com_a", 1, "birds")]
+                )
+                self.assertEqual([record.balance for record in records], [15, 17, 16])
+            with SegmentStore(directory) as store:
+                ledger = StewardshipLedger(store)
+                self.assertEqual((ledger.balance("com_a"), ledger.balance("com_b")), (16, 17))
+                self.assertEqual([r.reason for r in ledger.history("com_a")], ["water", "birds"])
+
+    def test_history_is_written_before_balances(self):
+        balances = {"com_a": 10}
+        calls = []
+
+        def add_balances(increments, award_id):
+            calls.append(len(list(ledger.history())))
+            if "com_b" in increments:
+                raise sqlite3.OperationalError("database is locked")
+            for community_id, amount in increments.items():
+                balances[community_id] = balances.get(community_id, 0) + amount
+            return {community_id: balances[community_id] for community_id in increments}
+
+        with tempfile.TemporaryDirectory() as directory:
+            with SegmentStore(directory) as store:
+                ledger = StewardshipLedger(
+                    store, opening_balance=lambda c: balances.get(c, 0), add_balances=add_balances
+                )
+                ledger.award("com_a", 5, "water")
+                self.assertEqual(calls, [1])
+                with self.assertRaises(sqlite3.OperationalError):
+                    ledger.award_batch([("com_a", 1, "soil"), ("com_b", 2, "birds")])
+                self.assertEqual(balances, {"com_a": 15})
+                self.assertEqual([r.reason for r in ledger.history()], ["water"])
+            with SegmentStore(directory) as store:
+                ledger = StewardshipLedger(store, add_balances=add_balances)
+                self.assertEqual([r.reason for r in ledger.history()], ["water"])
+                self.assertEqual(ledger.replay(), {"com_a": 15})
+
+    def test_batch_left_unapplied_by_a_crash_is_applied_on_open(self):
+        applied = []
+
+        def add_balances(increments, award_id):
+            applied.append((award_id, dict(increments)))
+            return dict(increments)
+
+        with tempfile.TemporaryDirectory() as directory:
+            with SegmentStore(directory) as store:
+                # History committed, process gone before the balances were applied
+                record = StewardshipAward("com_a", 5, "water", 1, 5, "award-1")
+                store.append(record.encode())
+            for _ in range(2):
+                with SegmentStore(directory) as store:
+                    StewardshipLedger(store, add_balances=add_balances)
+            self.assertEqual(applied, [("award-1", {"com_a": 5})])
+
+    def test_in_memory_history_is_bounded(self):
+        ledger = StewardshipLedger(max_history=3)
+        for index in range(5):
+            ledger.award("com_a", 1, f"sample {index}")
+        self.assertEqual([r.reason for r in ledger.history()], ["sample 2", "sample 3", "sample 4"])
+        self.assertEqual(ledger.balance("com_a"), 5)
+
+    def test_registry_batch_awards_mirror_registrations(self):
+        earth = EarthProtection()
+        registry = CommunityRegistry(earth)
+        community_id = earth.register_community(
+            "Steppe Herders", {}, GovernanceProtocol.VILLAGE_ASSEMBLY, []
+        )["community_id"]
+        results = registry.award_stewardship_tokens_batch(
+            [(community_id, 5, "transect"), ("com_missing", 5, "x"), (community_id, 10, "survey")]
+        )
+        self.assertEqual(results[1], False)
+        self.assertEqual([r["new_balance"] for r in (results[0], results[2])], [105, 115])
+        self.assertEqual(earth.registered_communities[community_id]["stewardship_tokens"], 115)
+        self.assertEqual(
+            registry.award_stewardship_tokens(community_id, 1, "photo")["new_balance"], 116
+        )
+        self.assertFalse(registry.award_stewardship_tokens("com_missing", 1, "photo"))
+        other = CommunityRegistry(earth)
+        self.assertIs(other.ledger, registry.ledger)
+        self.assertEqual(
+            other.award_stewardship_tokens(community_id, 5, "transect")["new_balance"], 121
+        )
+        self.assertEqual(
+            registry.award_stewardship_tokens(community_id, 1, "photo")["new_balance"], 122
+        )
+
+
+def _event(index, action="logging road", timeline="5_years", coordinates=None, **extra):
+    event = {
+        "event_id": f"eco_2025_09_21_{index:08d}",
+        "timestamp": "2025-09-21T10:00:00.000001Z",
+        "event_type": "deforestation",
+        "severity": {"level": "high", "reversibility": 0.9, "timeline": timeline},
+        "location": {"description": action},
+        "impact": {"primary_impact": {"area_affected_km2": 3.5}},
+    }
+    if coordinates is not None:
+        event["location"]["coordinates"] = coordinates
+    event.update(extra)
+    return event
+
+
+class SchemaValidationTests(unittest.TestCase):
+    """Compiled validators enforce the earth schemas"""
+
+    def test_earth_schemas_compile_once(self):
+        validators = earth_validators()
+        self.assertTrue(
+            {"ecological_event", "earth_extension", "community_registration"} <= set(validators)
+        )
+        self.assertIs(earth_validators(), validators)
+
+    def test_ecological_event_errors(self):
+        validator = earth_validators()["ecological_event"]
+        self.assertIsNone(validator.error(_event(1, coordinates={"latitude": 1, "longitude": 2})))
+        cases = [
+            (_event(1, event_id="eco_2025_9_21_x"), "/event_id"),
+            (_event(1, timestamp="2025-02-30T10:00:00Z"), "/timestamp"),
+            (
+                _event(1, coordinates={"latitude": 91, "longitude": 0}),
+                "/location/coordinates/latitude",
+            ),
+            (
+                _event(1, severity={"level": "high", "reversibility": True, "timeline": "1_years"}),
+                "/severity/reversibility",
+            ),
+            (_event(1, unknown_field=1), "unexpected properties"),
+            ({"event_id": "eco_2025_09_21_00000001"}, "missing required property"),
+        ]
+        for event, expected in cases:
+            with self.subTest(expected=expected):
+                self.assertIn(expected, validator.error(event))
+
+    def test_date_formats_match_the_whole_string(self):
+        date = compile_schema({"type": "string", "format": "date"})
+        date_time = compile_schema({"type": "string", "format": "date-time"})
+        self.assertIsNone(date("2024-01-01"))
+        self.assertIsNone(date_time("2024-01-01T10:00:00Z"))
+        for value in ("2024-01-01\n", "\u0662024-01-01"):
+            with self.subTest(value=value):
+                self.assertIsNotNone(date(value))
+        self.assertIsNotNone(date_time("2024-01-01T10:00:00Z\n"))
+
+    def test_combinators_and_unsupported_keywords(self):
+        check = compile_schema({"oneOf": [{"type": "integer"}, {"type": "number", "minimum": 1}]})
+        self.assertIsNone(check(0))
+        self.assertIsNone(check(1.5))
+        self.assertIsNotNone(check(3))
+        self.assertIsNone(compile_schema({"enum": [1, "a"]})(1.0))
+        self.assertIsNotNone(compile_schema({"enum": [1, "a"]})(True))
+        with self.assertRaises(SchemaError):
+            compile_schema({"properties": {"a": {"$ref": "#/definitions/a"}}})
+
+    def test_deeply_nested_schema(self):
+        schema, instance = {"type": "integer", "minimum": 0}, -1
+        for depth in range(30):
+            schema = {"type": "array", "items": {"properties": {f"l{depth}": schema}}}
+            instance = [{f"l{depth}": instance}]
+        error = compile_schema(schema)(instance)
+        self.assertTrue(error.startswith("/0/l29/0/l28/"), error)
+        self.assertTrue(error.endswith("/0/l0: -1 is less than minimum 0"), error)
+
+
+class EventIngestionTests(unittest.TestCase):
+    """NDJSON events are validated and checked in batches"""
+
+    def setUp(self):
+        self.earth = EarthProtection()
+        self.community = self.earth.register_community(
+            "River Keepers",
+            {"type": "Polygon", "coordinates": [_square(10, 10, 1)]},
+            GovernanceProtocol.ELDER_COUNCIL,
+            [{"keywords": "dredging"}],
+        )["community_id"]
+        self.rejects = []
+        self.ingestor = EcologicalEventIngestor(
+            self.earth,
+            batch_size=4,
+            max_line_bytes=2048,
+            on_reject=lambda number, reason, line: self.rejects.append((number, reason)),
+        )
+
+    def _ndjson(self, items):
+        return io.BytesIO(
+            b"".join(
+                (item if isinstance(item, bytes) else json.dumps(item).encode()) + b"\n"
+                for item in items
+            )
+        )
+
+    def test_batches_match_scalar_checks(self):
+        events = [
+            _event(
+                i,
+                action=random.Random(i).choice(["survey", "mining pit", "river dredging"]),
+                timeline=random.Random(i).choice(["3_days", "2_decades", "60_years"]),
+                coordinates={"latitude": 10.5, "longitude": 10.5} if i % 2 else None,
+            )
+            for i in range(10)
+        ]
+        batches = list(self.ingestor.ingest_stream(self._ndjson(events)))
+        self.assertEqual([len(batch) for batch in batches], [4, 4, 2])
+        self.assertEqual(self.ingestor.accepted, 10)
+        results = [
+            (batch.harm.record(i), batch.directives[i])
+            for batch in batches
+            for i in range(len(batch))
+        ]
+        for event, (harm, directive) in zip(events, results):
+            record = event_harm_record(event)
+            expected = self.earth.check_environmental_harm(
+                record["action"], resource_impact=record["resource_impact"]
+            )
+            self.assertEqual(harm["triggered"], expected["triggered"])
+            if expected.get("harm_types") or expected.get("irreversibility_score"):
+                self.assertEqual(harm, expected)
+            has_directive = "coordinates" in event["location"] and "dredging" in record["action"]
+            self.assertEqual(directive["has_directive"], has_directive)
+        self.assertEqual(
+            event_harm_record(events[0])["resource_impact"]["recovery_years"],
+            {"3_days": 3 / 365.25, "2_decades": 20, "60_years": 60}[
+                events[0]["severity"]["timeline"]
+            ],
+        )
+
+    def test_rejects_do_not_stop_the_stream(self):
+        stream = self._ndjson(
+            [_event(1), b"{not json", _event(2, event_type="meteor"), b"x" * 5000, b"", _event(3)]
+        )
+        batches = list(self.ingestor.ingest_stream(stream))
+        self.assertEqual([event["event_id"][-1] for event in batches[0].events], ["1", "3"])
+        self.assertEqual(batches[0].line_numbers, [1, 6])
+        self.assertEqual([number for number, _ in self.rejects], [2, 3, 4])
+        self.assertIn("/event_type", self.rejects[1][1])
+        self.assertEqual(self.ingestor.rejected, 3)
+
+    def test_socket_source(self):
+        server, client = socket.socketpair()
+        payload = self._ndjson([_event(i, action="coal combustion") for i in range(6)]).getvalue()
+        sender = threading.Thread(target=lambda: (client.sendall(payload), client.close()))
+        sender.start()
+        batches = list(self.ingestor.ingest_socket(server))
+        sender.join()
+        server.close()
+        self.assertEqual(sum(len(batch) for batch in batches), 6)
+        self.assertTrue(all(batch.triggered() == list(range(len(batch))) for batch in batches))
+
+
+class SharedContextTests(unittest.TestCase):
+    """Decorator and helpers share one configured protection context"""
+
+    def setUp(self):
+        self.earth = EarthProtection()
+        self.previous = configure_earth_protection(self.earth)
+        self.community = self.earth.register_community(
+            "Delta Elders",
+            {"type": "Polygon", "coordinates": [_square(0, 0, 1)]},
+            GovernanceProtocol.FPIC_PROCESS,
+            [{"keywords": "dredging"}],
+        )["community_id"]
+
+    def tearDown(self):
+        configure_earth_protection(self.previous)
+
+    def test_helpers_use_shared_context(self):
+        self.assertIs(default_earth_protection(), self.earth)
+        self.assertIs(CommunityRegistry().earth_protection, self.earth)
+        self.assertTrue(validate_community_directive({}, self.community))
+        self.assertEqual(check_environmental_harm("mining")["harm_types"], ["habitat_destruction"])
+
+    def test_decorator_sees_registered_communities(self):
+        @with_earth_protection()
+        def act(action, location=None):
+            return action.upper()
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertEqual(
+                act("river dredging", location={"lat": 0.5, "lon": 0.5}), "RIVER DREDGING"
+            )
+        self.assertIn("community_sovereignty", output.getvalue())
+        self.assertEqual(act.__name__, "act")
+
+    def test_async_functions(self):
+        @with_earth_protection()
+        async def act(action):
+            await asyncio.sleep(0)
+            return action
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertEqual(asyncio.run(act(action="coal combustion")), "coal combustion")
+        self.assertIn("planetary_harm", output.getvalue())
+        self.assertTrue(asyncio.iscoroutinefunction(act))
+
+
+if __name__ == "__main__":
+    unittest.main()
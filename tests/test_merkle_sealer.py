@@ -0,0 +1,90 @@
+"""
+Merkle Sealer Test Suite
+Validates Merkle batching and inclusion proofs for Always Memory entries
+Creator: Lev Goukassian (ORCID: 0009-0006-5966-1243)
+"""
+
+import hashlib
+import time
+import unittest
+import sys
+import os
+
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "implementations")
+)
+
+from python_library.core import AlwaysMemory, TMLState
+from python_library.merkle import MerkleSealer, MerkleTree, entry_digest
+
+
+def _digests(count):
+    return [hashlib.sha256(str(i).encode()).digest() for i in range(count)]
+
+
+class MerkleTreeTests(unittest.TestCase):
+    """Every leaf of every tree shape proves against the root"""
+
+    def test_proofs_for_all_sizes(self):
+        for count in (1, 2, 3, 5, 8, 13, 100):
+            digests = _digests(count)
+            tree = MerkleTree(digests)
+            for index, digest in enumerate(digests):
+                with self.subTest(count=count, index=index):
+                    proof = tree.proof(index)
+                    self.assertLessEqual(len(proof), max(1, (count - 1).bit_length()))
+                    self.assertTrue(MerkleTree.verify(digest, proof, tree.root))
+
+    def test_tampered_leaf_fails(self):
+        digests = _digests(10)
+        tree = MerkleTree(digests)
+        self.assertFalse(MerkleTree.verify(digests[4], tree.proof(3), tree.root))
+        self.assertNotEqual(MerkleTree(digests[:9]).root, tree.root)
+
+
+class MerkleSealerTests(unittest.TestCase):
+    """Batches seal by count and by time window"""
+
+    def setUp(self):
+        self.sealed = []
+        self.memory = AlwaysMemory("sealer")
+
+    def test_seals_by_count_and_serves_proofs(self):
+        sealer = MerkleSealer(max_leaves=100, max_age=60, on_seal=self.sealed.append)
+        entries = self.memory.create_entries(
+            [("decide", TMLState.PROCEED, {"i": i}, None) for i in range(250)]
+        )
+        locations = [sealer.add(entry) for entry in entries]
+        self.assertEqual([batch.leaf_count for batch in self.sealed], [100, 100])
+        self.assertEqual(sealer.flush().leaf_count, 50)
+
+        batch_id, index = locations[142]
+        batch = sealer.batch(batch_id)
+        self.assertEqual((batch_id, index), (1, 42))
+        self.assertTrue(
+            MerkleTree.verify(entry_digest(entries[142]), sealer.proof(batch_id, index), batch.root)
+        )
+        record = batch.to_dict()
+        self.assertEqual(record["leaf_count"], 100)
+        self.assertLessEqual(record["time_range"]["start"], record["time_range"]["end"])
+
+    def test_seals_by_time_window(self):
+        sealer = MerkleSealer(max_leaves=1000, max_age=0.2, on_seal=self.sealed.append)
+        sealer.add({"decision": 1})
+        self.assertIsNone(sealer.poll())
+        time.sleep(0.25)
+        batch = sealer.poll()
+        self.assertEqual(batch.leaf_count, 1)
+        self.assertEqual(self.sealed, [batch])
+
+    def test_retention_limit(self):
+        sealer = MerkleSealer(max_leaves=1, retain_batches=2)
+        for i in range(4):
+            sealer.add({"i": i})
+        with self.assertRaises(KeyError):
+            sealer.proof(0, 0)
+        self.assertEqual(len(sealer.proof(3, 0)), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,266 @@
+"""
+Segment Store Test Suite
+Validates durable append-only storage of Always Memory entries
+Creator: Lev Goukassian (ORCID: 0009-0006-5966-1243)
+"""
+
+import asyncio
+import mmap
+import os
+import queue
+import tempfile
+import threading
+import time
+import unittest
+import sys
+
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "implementations")
+)
+
+from python_library.core import AlwaysMemory, TMLState, always_memory
+from python_library.segment_store import (
+    DurabilityMode,
+    SegmentStore,
+    decode_entry,
+)
+from python_library.write_behind import WriteBehindError, WriteBehindWriter
+
+SMALL_SEGMENT = 4 * mmap.PAGESIZE
+
+
+class SegmentStoreTests(unittest.TestCase):
+    """Append, rotate, reopen and recover"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.directory = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _segment_files(self):
+        return sorted(name for name in os.listdir(self.directory) if name.endswith(".tml"))
+
+    def test_append_and_read_back_across_segments(self):
+        payloads = [f"entry-{i}".encode() * 40 for i in range(200)]
+        with SegmentStore(self.directory, segment_size=SMALL_SEGMENT) as store:
+            seqs = store.append_batch(payloads[:100])
+            seqs += [store.append(payload) for payload in payloads[100:]]
+            store.commit()
+            self.assertEqual(seqs, list(range(200)))
+            self.assertEqual(store.durable_seq, 199)
+            self.assertEqual(store.read(150), payloads[150])
+        self.assertGreater(len(self._segment_files()), 1)
+
+        with SegmentStore(self.directory, segment_size=SMALL_SEGMENT) as store:
+            self.assertEqual(len(store), 200)
+            self.assertEqual([payload for _, payload in store.scan()], payloads)
+            self.assertEqual(store.append(b"after reopen"), 200)
+
+    def test_torn_tail_is_dropped_on_reopen(self):
+        with SegmentStore(self.directory, segment_size=SMALL_SEGMENT) as store:
+            store.append_batch([b"first", b"second"])
+        path = os.path.join(self.directory, self._segment_files()[-1])
+        with open(path, "r+b") as handle:
+            handle.seek(24 + 8 + 5 + 8 + 6)
+            handle.write(b"\x40\x00\x00\x00\xde\xad\xbe\xefpartial")
+
+        with SegmentStore(self.directory, segment_size=SMALL_SEGMENT) as store:
+            self.assertEqual(len(store), 2)
+            self.assertEqual(store.append(b"third"), 2)
+        with SegmentStore(self.directory, segment_size=SMALL_SEGMENT) as store:
+            self.assertEqual(
+                [payload for _, payload in store.scan()], [b"first", b"second", b"third"]
+            )
+
+    def test_unverifiable_footer_falls_back_to_scan(self):
+        payloads = [f"entry-{i}".encode() * 40 for i in range(200)]
+        with SegmentStore(self.directory, segment_size=SMALL_SEGMENT) as store:
+            store.append_batch(payloads)
+        first = os.path.join(self.directory, self._segment_files()[0])
+        with open(first, "r+b") as handle:
+            # The trailer reached the disk but the footer it points to did not
+            handle.seek(SMALL_SEGMENT - 32)
+            footer_offset = int.from_bytes(handle.read(8), "little")
+            handle.seek(footer_offset)
+            handle.write(bytes(16))
+
+        with SegmentStore(self.directory, segment_size=SMALL_SEGMENT) as store:
+            self.assertEqual([payload for _, payload in store.scan()], payloads)
+
+    def test_interrupted_segment_creation_is_discarded(self):
+        with SegmentStore(self.directory, segment_size=SMALL_SEGMENT) as store:
+            store.append(b"first")
+        partial = os.path.join(self.directory, f"segment-{1:020d}.tml.partial")
+        with open(partial, "wb") as handle:
+            handle.truncate(SMALL_SEGMENT)
+
+        with SegmentStore(self.directory, segment_size=SMALL_SEGMENT) as store:
+            self.assertEqual(len(store), 1)
+            self.assertEqual(store.append(b"second"), 1)
+        self.assertFalse(os.path.exists(partial))
+
+    def test_group_commit_under_concurrency(self):
+        store = SegmentStore(
+            self.directory, segment_size=SMALL_SEGMENT * 4, durability=DurabilityMode.PER_ENTRY
+        )
+
+        not_durable = []
+
+        def writer(worker):
+            for i in range(50):
+                seq = store.append(f"{worker}:{i}".encode())
+                if seq > store.durable_seq:
+                    not_durable.append(seq)
+
+        threads = [threading.Thread(target=writer, args=(w,)) for w in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(store), 200)
+        self.assertEqual(not_durable, [])
+        store.close()
+
+    def test_time_window_flusher(self):
+        with SegmentStore(
+            self.directory,
+            durability=DurabilityMode.TIME_WINDOW,
+            segment_size=SMALL_SEGMENT,
+            sync_interval=0.01,
+        ) as store:
+            store.append(b"eventually durable")
+            for _ in range(200):
+                if store.durable_seq == 0:
+                    break
+                threading.Event().wait(0.01)
+            self.assertEqual(store.durable_seq, 0)
+
+    def test_rejects_segment_size_beyond_offset_range(self):
+        with self.assertRaises(ValueError):
+            SegmentStore(self.directory, segment_size=(1 << 32) + mmap.PAGESIZE)
+
+    def test_rejects_oversized_entry(self):
+        with SegmentStore(self.directory, segment_size=SMALL_SEGMENT) as store:
+            with self.assertRaises(ValueError):
+                store.append(b"x" * SMALL_SEGMENT)
+
+    def test_decorator_persists_before_action(self):
+        with SegmentStore(self.directory, segment_size=SMALL_SEGMENT) as store:
+            calls = []
+
+            @always_memory(system_id="persisted", store=store)
+            def act(value):
+                calls.append(len(store))
+                return value
+
+            act("a")
+            act("b")
+            self.assertEqual(calls, [1, 2])
+            record = decode_entry(store.read(1))
+            self.assertEqual(record["system_id"], "persisted")
+            self.assertEqual(record["action"], "act")
+
+    def test_entries_round_trip(self):
+        memory = AlwaysMemory("round-trip")
+        entries = memory.create_entries([("a", TMLState.PROCEED, {"i": i}, None) for i in range(3)])
+        with SegmentStore(self.directory, segment_size=SMALL_SEGMENT) as store:
+            store.append_entries(entries)
+            self.assertEqual(decode_entry(store.read(2)), entries[2].to_dict())
+
+
+class WriteBehindTests(unittest.TestCase):
+    """Background writer keeps sequence order and applies backpressure"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.store = SegmentStore(self._tmp.name, segment_size=SMALL_SEGMENT * 4)
+
+    def tearDown(self):
+        self.store.close()
+        self._tmp.cleanup()
+
+    def test_receipts_match_store_sequence(self):
+        memory = AlwaysMemory("write-behind")
+        with WriteBehindWriter(self.store, max_pending=8, batch_size=4) as writer:
+            receipts = [
+                writer.submit(entry)
+                for entry in memory.create_entries(
+                    [("decide", TMLState.PROCEED, {"i": i}, None) for i in range(40)]
+                )
+            ]
+            self.assertTrue(writer.flush(timeout=5))
+        self.assertEqual([receipt.seq for receipt in receipts], list(range(40)))
+        self.assertEqual(self.store.durable_seq, 39)
+        self.assertEqual(decode_entry(self.store.read(7))["input_hash"], receipts[7].input_hash)
+
+    def test_decorator_returns_before_storage(self):
+        writer = WriteBehindWriter(self.store)
+        receipts = []
+
+        @always_memory(system_id="async-log", writer=writer, on_receipt=receipts.append)
+        def act(value):
+            return value * 2
+
+        self.assertEqual(act(4), 8)
+        (receipt,) = receipts
+        self.assertTrue(writer.wait(receipt.seq, timeout=5))
+        self.assertEqual(decode_entry(self.store.read(receipt.seq))["action"], "act")
+        writer.close()
+
+    def test_coroutine_receipts_are_per_call(self):
+        writer = WriteBehindWriter(self.store, max_pending=2)
+
+        async def run():
+            async def call(value):
+                receipts = []
+
+                @always_memory(system_id="async-log", writer=writer, on_receipt=receipts.append)
+                async def act(value):
+                    await asyncio.sleep(0)
+                    return value
+
+                await act(value)
+                return receipts
+
+            return await asyncio.gather(*(call(value) for value in range(8)))
+
+        per_call = asyncio.run(run())
+        self.assertTrue(all(len(receipts) == 1 for receipts in per_call))
+        self.assertEqual(sorted(receipts[0].seq for receipts in per_call), list(range(8)))
+        writer.close()
+
+    def test_full_queue_does_not_serialize_producers(self):
+        memory = AlwaysMemory("backpressure")
+        entries = memory.create_entries([("a", TMLState.PROCEED, {"i": i}, None) for i in range(3)])
+        writer = WriteBehindWriter(self.store, max_pending=1, batch_size=1)
+        with self.store._lock:
+            # The writer thread takes entry 0 and stalls on the store
+            writer.submit(entries[0])
+            while writer.pending:
+                time.sleep(0.001)
+            writer.submit(entries[1])
+            blocked = threading.Thread(target=writer.submit, args=(entries[2],))
+            blocked.start()
+            started = time.monotonic()
+            with self.assertRaises(queue.Full):
+                writer.submit(entries[2], timeout=0.05)
+            self.assertLess(time.monotonic() - started, 2)
+        blocked.join(timeout=5)
+        writer.close()
+        self.assertEqual(self.store.durable_seq, 2)
+
+    def test_failure_is_reported_to_callers(self):
+        memory = AlwaysMemory("failing")
+        writer = WriteBehindWriter(self.store)
+        self.store.close()
+        receipt = writer.submit(memory.create_entry("x", TMLState.PROCEED, {}))
+        with self.assertRaises(WriteBehindError):
+            writer.wait(receipt.seq, timeout=5)
+        with self.assertRaises(WriteBehindError):
+            writer.close()
+
+
+if __name__ == "__main__":
+    unittest.main()